@@ -0,0 +1,125 @@
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pymongo
+
+# Journal entry / writer operation kinds
+CHECK_IN = "check_in"
+CHECK_OUT = "check_out"
+
+TIMES_PROJECTION = {"_id": 0, "employee_id": 1, "check_in_time": 1, "check_out_time": 1}
+
+
+def attendance_day(moment):
+    """Calendar day key stored on attendance records, e.g. '2025-06-30'"""
+    return moment.strftime("%Y-%m-%d")
+
+
+def day_bounds(moment):
+    """[start, end) datetimes of the day containing moment"""
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(days=1)
+
+
+class CheckOutRules(namedtuple("CheckOutRules", ["min_minutes", "repeat_minutes"])):
+    """When a repeat scan on the same day counts as a check-out.
+
+    The first check-out must come at least ``min_minutes`` after the
+    check-in; later scans move the check-out, but only ``repeat_minutes``
+    or more after the previous one. Anything sooner is a duplicate scan.
+    """
+
+    def allows(self, check_in_time, check_out_time, now):
+        if now - check_in_time < timedelta(minutes=self.min_minutes):
+            return False
+        return check_out_time is None or now - check_out_time >= timedelta(minutes=self.repeat_minutes)
+
+
+class DailyAttendanceSet:
+    """Today's check-in and check-out times per employee, answered from memory.
+
+    Rebuilt from MongoDB and the local journal at startup and whenever the
+    day rolls over, then kept current by ``mark`` and ``check_out``. This
+    only stops repeated scans on this kiosk; the unique (employee_id,
+    attendance_day) index is what keeps several kiosks from writing
+    duplicates.
+    """
+
+    def __init__(self, collection, writer=None):
+        self.collection = collection
+        self.writer = writer
+        self.day = None
+        # employee_id -> [check_in_time, check_out_time or None]
+        self._times = {}
+        self._lock = threading.Lock()
+
+    def rebuild(self, now=None):
+        now = now or datetime.now()
+        start, end = day_bounds(now)
+        times = {}
+        try:
+            for doc in self.collection.find({"check_in_time": {"$gte": start, "$lt": end}}, TIMES_PROJECTION):
+                times[doc["employee_id"]] = [doc["check_in_time"], doc.get("check_out_time")]
+        except pymongo.errors.PyMongoError as e:
+            # Offline: fall back to what this kiosk has journaled itself
+            print(f"Could not load today's attendance: {e}")
+        if self.writer is not None:
+            for employee_id, kind, moment in self.writer.pending_events(start, end):
+                entry = times.setdefault(employee_id, [moment, None])
+                if kind == CHECK_OUT:
+                    entry[1] = max(entry[1] or moment, moment)
+        with self._lock:
+            self.day = attendance_day(now)
+            self._times = times
+
+    def mark(self, employee_id, now=None):
+        """Record employee_id as present. Returns False if already marked today."""
+        now = now or datetime.now()
+        if attendance_day(now) != self.day:
+            self.rebuild(now)
+        with self._lock:
+            if employee_id in self._times:
+                return False
+            self._times[employee_id] = [now, None]
+            return True
+
+    def unmark(self, employee_id):
+        """Undo a mark whose record could not be journaled"""
+        with self._lock:
+            self._times.pop(employee_id, None)
+
+    def check_out(self, employee_id, now, rules):
+        """Record a check-out for someone marked present today.
+
+        Returns (allowed, previous check-out time); pass the latter to
+        ``unmark_out`` if the check-out could not be journaled.
+        """
+        with self._lock:
+            entry = self._times.get(employee_id)
+            if entry is None or not rules.allows(entry[0], entry[1], now):
+                return False, None
+            previous, entry[1] = entry[1], now
+            return True, previous
+
+    def unmark_out(self, employee_id, previous):
+        with self._lock:
+            entry = self._times.get(employee_id)
+            if entry is not None:
+                entry[1] = previous
+
+    def observe(self, records):
+        """Merge today's check-ins written by other kiosks, e.g. from the recent feed"""
+        with self._lock:
+            for record in records:
+                if attendance_day(record["check_in_time"]) != self.day:
+                    continue
+                entry = self._times.setdefault(record["employee_id"], [record["check_in_time"], None])
+                if record["check_in_time"] < entry[0]:
+                    entry[0] = record["check_in_time"]
+
+    def __contains__(self, employee_id):
+        return employee_id in self._times
+
+    def __len__(self):
+        return len(self._times)
@@ -0,0 +1,137 @@
+import os
+from collections import namedtuple
+from datetime import datetime
+
+from attendance_dedup import CHECK_OUT, CheckOutRules, DailyAttendanceSet, attendance_day
+from attendance_writer import AttendanceWriter
+from employee_cache import EmployeeDirectory
+from metrics import metrics
+from rollups import AttendanceRollups
+
+# --- Configuration ---
+# Read from environment variables or use default values
+# Record a later scan on the same day as a check-out; 0 keeps check-ins only
+ATTENDANCE_CHECK_OUT = os.getenv("ATTENDANCE_CHECK_OUT", "1") == "1"
+# Earliest check-out, in minutes after the check-in
+CHECK_OUT_MIN_MINUTES = float(os.getenv("CHECK_OUT_MIN_MINUTES", "60"))
+# Later scans move the check-out only if this many minutes after the last one
+CHECK_OUT_REPEAT_MINUTES = float(os.getenv("CHECK_OUT_REPEAT_MINUTES", "5"))
+# ---------------------
+
+MARKED = "marked"
+CHECKED_OUT = "checked_out"
+DUPLICATE = "duplicate"
+UNKNOWN = "unknown"
+
+# status is MARKED, CHECKED_OUT, DUPLICATE or UNKNOWN; employee/record may be None
+CheckInResult = namedtuple("CheckInResult", ["status", "employee", "record"])
+
+
+class AttendanceService:
+    """Check-in path shared by the kiosk window and the headless gate server.
+
+    Wires together the in-memory employee directory, today's attendance set,
+    the journaled writer and the daily rollups. ``check_in`` touches only
+    memory and the local journal, so it is safe to call from capture or
+    decode threads. With ``check_out`` rules a later scan on the same day
+    records a check-out instead of being refused as a duplicate.
+    """
+
+    def __init__(self, db, on_flushed=None, check_out=None):
+        self.db = db
+        if check_out is None and ATTENDANCE_CHECK_OUT:
+            check_out = CheckOutRules(CHECK_OUT_MIN_MINUTES, CHECK_OUT_REPEAT_MINUTES)
+        self.check_out_rules = check_out
+        self.rollups = AttendanceRollups(db)
+        self.writer = AttendanceWriter(db["attendance"], rollups=self.rollups, on_flushed=on_flushed,
+                                       check_out=self.check_out_rules)
+        # The directory snapshot lives next to the journal, for offline starts
+        self.directory = EmployeeDirectory(db["employees"], snapshot=self.writer.journal)
+        self.today = DailyAttendanceSet(db["attendance"], self.writer)
+
+    def start(self, connected=True):
+        """Start the writer; pass connected=False when the database is unreachable.
+
+        Check-ins are still journaled while offline; call ``on_connected``
+        once the database is reachable to load everything that needs it.
+        """
+        self.writer.start()
+        # Badges resolve from the last saved directory until the database answers
+        self.directory.restore()
+        if connected:
+            self.on_connected()
+        else:
+            self.on_disconnected()
+            self.today.rebuild()
+
+    def on_connected(self):
+        """Load the directory and today's state; safe to call on every reconnect"""
+        self.directory.online = True
+        # Employee lookups are served from memory, refreshed in the background
+        self.directory.start()
+        # Rollups are not recounted here: a $merge recount races with the live
+        # $inc from every kiosk's writer. `rollups.py --backfill` does that offline.
+        # Pick up check-ins other kiosks wrote while this one was offline
+        self.today.rebuild()
+
+    def on_disconnected(self):
+        """Stop falling back to the database for unknown badges until on_connected"""
+        self.directory.online = False
+
+    def stop(self):
+        self.writer.stop()
+        self.directory.stop()
+
+    def check_in(self, employee_id, verification_method="qr_only", now=None):
+        with metrics.time("check_in"):
+            result = self._check_in(employee_id, verification_method, now)
+        metrics.inc(f"scans_{result.status}")
+        return result
+
+    def _check_in(self, employee_id, verification_method, now):
+        with metrics.time("employee_lookup"):
+            employee = self.directory.get(employee_id)
+        if not employee:
+            return CheckInResult(UNKNOWN, None, None)
+
+        # Check if attendance already marked today (in memory, no query)
+        now = now or datetime.now()
+        if not self.today.mark(employee['employee_id'], now):
+            return self._check_out(employee, now)
+
+        attendance_record = {
+            "employee_id": employee['employee_id'],
+            "name": employee['name'],
+            "department": employee.get('department'),
+            "check_in_time": now,
+            "attendance_day": attendance_day(now),
+            "verification_method": verification_method
+        }
+        # Journal locally; the writer upserts it in the background
+        try:
+            with metrics.time("journal_append"):
+                self.writer.submit(attendance_record)
+        except Exception:
+            self.today.unmark(employee['employee_id'])
+            raise
+        return CheckInResult(MARKED, employee, attendance_record)
+
+    def _check_out(self, employee, now):
+        if self.check_out_rules is None:
+            return CheckInResult(DUPLICATE, employee, None)
+        allowed, previous = self.today.check_out(employee['employee_id'], now, self.check_out_rules)
+        if not allowed:
+            return CheckInResult(DUPLICATE, employee, None)
+
+        check_out_event = {
+            "employee_id": employee['employee_id'],
+            "attendance_day": attendance_day(now),
+            "check_out_time": now,
+        }
+        try:
+            with metrics.time("journal_append"):
+                self.writer.submit(check_out_event, CHECK_OUT)
+        except Exception:
+            self.today.unmark_out(employee['employee_id'], previous)
+            raise
+        return CheckInResult(CHECKED_OUT, employee, check_out_event)
@@ -0,0 +1,379 @@
+import json
+import os
+import sqlite3
+import itertools
+import threading
+from datetime import datetime, timedelta
+
+import pymongo
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from attendance_dedup import CHECK_IN, CHECK_OUT, attendance_day, day_bounds
+from create_indexes import ATTENDANCE_DAY_INDEX, create_index
+from metrics import metrics
+
+# --- Configuration ---
+ATTENDANCE_JOURNAL_PATH = os.getenv(
+    "ATTENDANCE_JOURNAL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "attendance_journal.db"),
+)
+ATTENDANCE_FLUSH_BATCH = int(os.getenv("ATTENDANCE_FLUSH_BATCH", "100"))
+ATTENDANCE_FLUSH_INTERVAL = float(os.getenv("ATTENDANCE_FLUSH_INTERVAL", "1.0"))
+ATTENDANCE_MAX_RETRY_DELAY = float(os.getenv("ATTENDANCE_MAX_RETRY_DELAY", "60"))
+# ---------------------
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    raise TypeError(f"Cannot journal value of type {type(value).__name__}")
+
+
+def _decode(obj):
+    if len(obj) == 1:
+        if "$date" in obj:
+            return datetime.fromisoformat(obj["$date"])
+        if "$oid" in obj:
+            return ObjectId(obj["$oid"])
+    return obj
+
+
+class AttendanceJournal:
+    """Durable local queue of accepted attendance records.
+
+    Records are written to SQLite with a full fsync before the scan is
+    confirmed, and removed only once MongoDB has acknowledged them. Each
+    entry is a CHECK_IN record or a CHECK_OUT event; ``check_in_time`` holds
+    the event time for both.
+    """
+
+    def __init__(self, path=ATTENDANCE_JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                employee_id TEXT NOT NULL,
+                check_in_time TEXT NOT NULL,
+                record TEXT NOT NULL
+            )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        if "kind" not in columns:
+            # Journals from before check-outs only hold check-ins
+            self._conn.execute(f"ALTER TABLE entries ADD COLUMN kind TEXT NOT NULL DEFAULT '{CHECK_IN}'")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_employee ON entries (employee_id, check_in_time)")
+        # Records MongoDB rejected outright, kept for inspection instead of
+        # blocking the queue behind them forever
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS rejected (
+                id INTEGER PRIMARY KEY,
+                record TEXT NOT NULL,
+                error TEXT NOT NULL
+            )"""
+        )
+        # Last employee directory snapshot, so a kiosk that starts while
+        # MongoDB is down still recognises everyone (see EmployeeDirectory)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS employees (
+                employee_id TEXT PRIMARY KEY,
+                record TEXT NOT NULL
+            )"""
+        )
+
+    def append(self, record, kind=CHECK_IN):
+        payload = json.dumps(record, default=_encode)
+        moment = record["check_out_time"] if kind == CHECK_OUT else record["check_in_time"]
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO entries (employee_id, check_in_time, record, kind) VALUES (?, ?, ?, ?)",
+                (record["employee_id"], moment.isoformat(), payload, kind),
+            )
+            return cursor.lastrowid
+
+    def pending(self, limit):
+        """Oldest journaled entries first, as (entry id, kind, record)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, kind, record FROM entries ORDER BY id LIMIT ?", (limit,)).fetchall()
+        return [(entry_id, kind, json.loads(payload, object_hook=_decode)) for entry_id, kind, payload in rows]
+
+    def remove(self, entry_ids):
+        if not entry_ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM entries WHERE id = ?", [(entry_id,) for entry_id in entry_ids])
+
+    def reject(self, entry_id, error):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rejected (id, record, error) SELECT id, record, ? FROM entries WHERE id = ?",
+                (str(error), entry_id),
+            )
+            self._conn.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+            self._conn.execute("COMMIT")
+
+    def events(self, start, end):
+        """Unflushed (employee_id, kind, time) entries in [start, end), oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT employee_id, kind, check_in_time FROM entries"
+                " WHERE check_in_time >= ? AND check_in_time < ? ORDER BY id",
+                (start.isoformat(), end.isoformat()),
+            ).fetchall()
+        return [(employee_id, kind, datetime.fromisoformat(moment)) for employee_id, kind, moment in rows]
+
+    def save_employees(self, employees):
+        """Replace the saved directory snapshot in one transaction"""
+        rows = [(employee["employee_id"], json.dumps(employee)) for employee in employees]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM employees")
+                self._conn.executemany("INSERT INTO employees (employee_id, record) VALUES (?, ?)", rows)
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def employees(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT record FROM employees").fetchall()
+        return [json.loads(payload) for payload, in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AttendanceWriter:
+    """Background writer that drains the journal into MongoDB.
+
+    ``submit`` journals a record and returns immediately. A worker thread
+    uploads journaled records in ordered ``bulk_write`` batches, retrying
+    with exponential backoff while MongoDB is unreachable. Anything left in
+    the journal from a previous run is replayed on start.
+
+    Each record is an upsert keyed on (employee_id, attendance_day) under a
+    unique index, so one check-in per employee per day is enforced by the
+    database itself, across kiosks and across replays. Records that were
+    actually inserted are then counted into the daily ``rollups``.
+    Check-outs ``$max`` the check_out_time of that same document, so the
+    latest scan wins whatever order kiosks upload in. A check-in that finds
+    the day's record already written (the person entered through another
+    kiosk) is applied as a check-out when it satisfies the ``check_out``
+    rules.
+    """
+
+    def __init__(self, collection, journal=None, batch_size=ATTENDANCE_FLUSH_BATCH,
+                 flush_interval=ATTENDANCE_FLUSH_INTERVAL, max_retry_delay=ATTENDANCE_MAX_RETRY_DELAY,
+                 rollups=None, on_flushed=None, check_out=None):
+        self.collection = collection
+        self.check_out = check_out
+        self.rollups = rollups
+        self.journal = journal if journal is not None else AttendanceJournal()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retry_delay = max_retry_delay
+        self.on_flushed = on_flushed
+        self.flushed = 0
+        self.duplicates = 0
+        self.last_error = None
+        self._index_ready = False
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="attendance-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, record, kind=CHECK_IN):
+        """Durably queue an attendance record (or check-out event) for upload"""
+        record = dict(record)
+        if kind == CHECK_IN:
+            record.setdefault("attendance_day", attendance_day(record["check_in_time"]))
+        self.journal.append(record, kind)
+        self._wakeup.set()
+        return record
+
+    def pending_events(self, start, end):
+        return self.journal.events(start, end)
+
+    def ensure_index(self):
+        """Unique (employee_id, attendance_day) index backing the upserts"""
+        _, keys, options = ATTENDANCE_DAY_INDEX
+        create_index(self.collection, keys, options)
+        self._index_ready = True
+
+    def pending_count(self):
+        return self.journal.count()
+
+    def _run(self):
+        retry_delay = 1.0
+        while True:
+            try:
+                if not self._index_ready:
+                    self.ensure_index()
+                while self.flush_once():
+                    pass
+                retry_delay = 1.0
+                self.last_error = None
+                timeout = self.flush_interval
+            except Exception as e:
+                # Anything else (a journal error, a malformed entry) must not
+                # kill the thread: the kiosk would keep confirming scans that
+                # never upload
+                metrics.inc("db_errors")
+                self.last_error = e
+                print(f"Attendance upload failed, retrying in {retry_delay:.0f}s: {e!r}")
+                timeout = retry_delay
+                retry_delay = min(retry_delay * 2, self.max_retry_delay)
+            if not self._running:
+                break
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def flush_once(self):
+        """Upload the oldest journaled check-ins, or the oldest check-out.
+
+        Returns True if more entries may be waiting.
+        """
+        entries = self.journal.pending(self.batch_size)
+        if not entries:
+            return False
+        if entries[0][1] == CHECK_OUT:
+            self._flush_check_out(entries[0])
+            return True
+        # Check-ins up to the next check-out, which has to follow them
+        check_ins = list(itertools.takewhile(lambda entry: entry[1] == CHECK_IN, entries))
+        more = self._flush_check_ins(check_ins)
+        return more or len(check_ins) < len(entries) or len(entries) == self.batch_size
+
+    def _flush_check_ins(self, entries):
+        """Upsert check-ins in order. Returns True if it stopped on a failed record."""
+        entry_ids = [entry_id for entry_id, _, _ in entries]
+        records = [record for _, _, record in entries]
+        operations = []
+        for record in records:
+            record.setdefault("attendance_day", attendance_day(record["check_in_time"]))
+            operations.append(UpdateOne(
+                {"employee_id": record["employee_id"], "attendance_day": record["attendance_day"]},
+                {"$setOnInsert": record},
+                upsert=True,
+            ))
+        try:
+            with metrics.time("db_write"):
+                result = self.collection.bulk_write(operations, ordered=True)
+        except pymongo.errors.BulkWriteError as e:
+            if not e.details.get("writeErrors"):
+                # Only the write concern failed; the upserts are idempotent, so
+                # leave the batch in the journal and let _run retry it
+                raise
+            # Ordered writes stop at the first error; everything before it was
+            # applied. A duplicate key is a concurrent upsert from another kiosk.
+            error = e.details["writeErrors"][0]
+            done = error["index"]
+            upserted = {item["index"] for item in e.details.get("upserted", [])}
+            self.duplicates += done - len(upserted)
+            self._record_rollups([records[index] for index in sorted(upserted)])
+            # Before removing them, so a failed check-out is retried with the batch
+            self._rescans([records[index] for index in range(done) if index not in upserted])
+            self.journal.remove(entry_ids[:done])
+            if error["code"] == DUPLICATE_KEY_ERROR:
+                self.journal.remove([entry_ids[done]])
+                self.duplicates += 1
+                done += 1
+            else:
+                metrics.inc("db_errors")
+                print(f"Attendance record rejected by database: {error.get('errmsg')}")
+                self.journal.reject(entry_ids[done], error.get("errmsg"))
+            self._flushed(done)
+            return True
+
+        upserted = result.upserted_ids
+        self.duplicates += len(entries) - len(upserted)
+        self._record_rollups([records[index] for index in sorted(upserted)])
+        self._rescans([record for index, record in enumerate(records) if index not in upserted])
+        self.journal.remove(entry_ids)
+        self._flushed(len(entries))
+        return False
+
+    def _rescans(self, records):
+        """Check-ins that found the day's record already there, e.g. written by
+        another kiosk: apply each as a check-out under the same rules"""
+        if self.check_out is None:
+            return
+        for record in records:
+            moment = record["check_in_time"]
+            if self._check_out(record, moment, self.check_out):
+                metrics.inc("check_outs_from_rescans")
+
+    def _flush_check_out(self, entry):
+        entry_id, _, record = entry
+        if self._check_out(record, record["check_out_time"]):
+            self.journal.remove([entry_id])
+            self._flushed(1)
+            return
+        # No record for that day: nothing to check out of, keep it for inspection
+        metrics.inc("db_errors")
+        print(f"No attendance record for check-out of {record['employee_id']} on {record['attendance_day']}")
+        self.journal.reject(entry_id, "no attendance record to check out of")
+
+    def _check_out(self, record, moment, rules=None):
+        """$max the check-out of the employee's record for that day. Returns True if one matched.
+
+        Matches on the check_in_time range, as DailyAttendanceSet.rebuild
+        does, so records from before attendance_day existed are found too.
+        """
+        start, end = day_bounds(datetime.strptime(record["attendance_day"], "%Y-%m-%d"))
+        query = {"employee_id": record["employee_id"], "check_in_time": {"$gte": start, "$lt": end}}
+        if rules is not None:
+            query["check_in_time"]["$lte"] = moment - timedelta(minutes=rules.min_minutes)
+            query["$or"] = [
+                {"check_out_time": {"$exists": False}},
+                {"check_out_time": {"$lte": moment - timedelta(minutes=rules.repeat_minutes)}},
+            ]
+        with metrics.time("db_write"):
+            result = self.collection.update_one(query, {"$max": {"check_out_time": moment}})
+        return result.matched_count > 0
+
+    def _record_rollups(self, inserted):
+        if self.rollups is None or not inserted:
+            return
+        try:
+            self.rollups.record(inserted)
+        except pymongo.errors.PyMongoError as e:
+            metrics.inc("db_errors")
+            # The check-ins themselves are safe; `rollups.py --backfill` recounts
+            print(f"Could not update attendance rollups: {e}")
+
+    def _flushed(self, count):
+        if not count:
+            return
+        self.flushed += count
+        metrics.inc("records_flushed", count)
+        if self.on_flushed is not None:
+            self.on_flushed(count)
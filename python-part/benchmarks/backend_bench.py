@@ -0,0 +1,51 @@
+"""QR decoder backends: calibration table and the fast path with each backend.
+
+Runs the startup calibration (every installed backend on the same
+downscaled frames), prints which backend QR_BACKEND=auto would pick, then
+decodes a full clip through FastQRDecoder once per backend. Run from
+python-part/:
+
+    python -m benchmarks.backend_bench
+    python -m benchmarks.backend_bench --video entrance.mp4 --min-rate 0.95
+"""
+import argparse
+
+from benchmarks.decode_bench import run, synthetic_sequence, video_frames
+from qr_backends import available_backends, calibrate
+from qr_decode import QR_SCAN_WIDTH, create_fast_decoder, downscale, sample_frames, to_gray
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", help="calibrate and decode frames from a recorded video")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--min-rate", type=float, default=0.9, help="detection rate a backend must reach")
+    args = parser.parse_args()
+
+    backends = available_backends()
+    print(f"installed backends: {', '.join(backend.name for backend in backends)}")
+
+    if args.video:
+        frames = video_frames(args.video, args.frames)
+        samples = frames
+    else:
+        frames = synthetic_sequence(args.frames, (args.width, args.height))
+        samples = sample_frames(resolution=(args.width, args.height))
+    chosen, results = calibrate([downscale(to_gray(frame), QR_SCAN_WIDTH)[0] for frame in samples],
+                                backends, args.min_rate)
+    print(f"calibration on {len(samples)} frames at {QR_SCAN_WIDTH} px wide:")
+    for result in results:
+        marker = "*" if result.name == chosen else " "
+        print(f" {marker} {result.name:<13} {result.mean_ms:6.2f} ms/frame  {result.detection_rate * 100:5.1f}% detected")
+
+    print(f"fast path on {len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]}:")
+    for backend in backends:
+        decoder = create_fast_decoder(backend.name)
+        run(backend.name, decoder.decode, frames)
+        print(f"{'':<10} resolved by: {decoder.stats}")
+
+
+if __name__ == "__main__":
+    main()
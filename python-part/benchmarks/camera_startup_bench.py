@@ -0,0 +1,90 @@
+"""Camera startup time: sequential probing vs. concurrent discovery vs. cached profile.
+
+Needs the kiosk's real camera(s). Run from python-part/:
+
+    python -m benchmarks.camera_startup_bench --runs 3
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+
+from camera_discovery import (CAMERA_BACKEND, RESOLUTIONS, discover_cameras, negotiate_resolution, open_camera,
+                              open_profiled_camera, save_profile)
+
+
+def legacy_startup():
+    """What setup_camera/initialize_camera used to do"""
+    cameras = []
+    for i in range(10):
+        cap = cv2.VideoCapture(i)
+        if cap.isOpened():
+            ret, _ = cap.read()
+            if ret:
+                cameras.append(i)
+            cap.release()
+    if not cameras:
+        return None
+    cap = cv2.VideoCapture(cameras[0])
+    negotiate_resolution(cap, RESOLUTIONS)
+    cap.read()
+    return cap
+
+
+def discovery_startup():
+    cameras = discover_cameras()
+    if not cameras:
+        return None
+    cap, _ = open_camera(cameras[0])
+    return cap
+
+
+def profile_startup(profile_path):
+    opened = open_profiled_camera(profile_path)
+    return opened[0] if opened else None
+
+
+def timed(startup, *args):
+    start = time.perf_counter()
+    cap = startup(*args)
+    elapsed = time.perf_counter() - start
+    if cap is not None:
+        cap.release()
+    return elapsed, cap is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    cameras = discover_cameras()
+    if not cameras:
+        print("No cameras found")
+        return
+    profile_path = os.path.join(tempfile.mkdtemp(), "camera_profile.json")
+    cap, resolution = open_camera(cameras[0])
+    cap.release()
+    save_profile(cameras[0], CAMERA_BACKEND, resolution, profile_path)
+    print(f"Cameras: {cameras}, profile: camera {cameras[0]} at {resolution[0]}x{resolution[1]}")
+
+    for name, startup, extra in (
+        ("sequential probe", legacy_startup, ()),
+        ("concurrent probe", discovery_startup, ()),
+        ("cached profile", profile_startup, (profile_path,)),
+    ):
+        timings = []
+        for _ in range(args.runs):
+            elapsed, ok = timed(startup, *extra)
+            if not ok:
+                print(f"{name}: failed to open a camera")
+                break
+            timings.append(elapsed)
+        if timings:
+            print(f"{name:<18} best {min(timings):6.2f} s  mean {sum(timings) / len(timings):6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
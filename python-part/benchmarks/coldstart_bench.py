@@ -0,0 +1,71 @@
+"""Kiosk cold start: time until the window is usable and until the database state is known.
+
+Launches desktop-app.py in a fresh interpreter with a hidden probe flag,
+once against MONGO_URI as configured and once against an unreachable
+address, and reports the median over several runs. For reference it also
+times importing the vision/database stack, which used to sit in front of
+the first window. Needs a display. Run from python-part/:
+
+    python -m benchmarks.coldstart_bench --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# TEST-NET-1 address: connections hang instead of being refused
+UNREACHABLE_URI = "mongodb://192.0.2.1:27017/"
+HEAVY_IMPORTS = "import cv2, numpy, PIL.ImageTk, pyzbar.pyzbar, pymongo"
+
+
+def probe(mongo_uri=None):
+    """(seconds to window, seconds to db state, db state) for one cold start"""
+    env = dict(os.environ)
+    if mongo_uri:
+        env["MONGO_URI"] = mongo_uri
+    start = time.time()
+    output = subprocess.run(
+        [sys.executable, "desktop-app.py", "--startup-probe"],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, timeout=60,
+    ).stdout
+    window = db = state = None
+    for line in output.splitlines():
+        parts = line.split()
+        if parts[:1] == ["window"]:
+            window = float(parts[1]) - start
+        elif parts[:1] == ["db"]:
+            state, db = parts[1], float(parts[2]) - start
+    if window is None:
+        raise RuntimeError(f"probe produced no timings:\n{output}")
+    return window, db, state
+
+
+def import_cost():
+    code = f"import time; t = time.perf_counter(); {HEAVY_IMPORTS}; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, capture_output=True, text=True)
+    return float(output.stdout.strip())
+
+
+def report(name, runs):
+    windows = [window for window, _, _ in runs]
+    dbs = [db for _, db, _ in runs if db is not None]
+    states = sorted({state for _, _, state in runs if state})
+    db = f"{statistics.median(dbs) * 1000:7.0f} ms ({'/'.join(states)})" if dbs else "     n/a"
+    print(f"{name:<12} window {statistics.median(windows) * 1000:6.0f} ms (max {max(windows) * 1000:.0f})  db {db}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"heavy imports ({HEAVY_IMPORTS[7:]}): {import_cost() * 1000:.0f} ms")
+    report("configured", [probe() for _ in range(args.runs)])
+    report("unreachable", [probe(UNREACHABLE_URI) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
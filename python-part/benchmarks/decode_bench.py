@@ -0,0 +1,91 @@
+"""Per-frame QR decode time: full-frame pyzbar vs. the fast multi-resolution path.
+
+Run from python-part/:
+
+    python -m benchmarks.decode_bench
+    python -m benchmarks.decode_bench --video recording.mp4
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from qr_decode import FastQRDecoder, decode_full
+from synthetic_frames import employee_payload, make_badge, render_frame
+
+
+def synthetic_sequence(count, resolution):
+    """A badge walking slowly across the frame, with empty frames in between"""
+    rng = np.random.default_rng(42)
+    badge = make_badge(employee_payload("EMP001"))
+    width, height = resolution
+    frames = []
+    for i in range(count):
+        if i % 10 == 9:
+            frames.append(render_frame(None, resolution, rng=rng))
+            continue
+        t = i / float(count)
+        center = (width * (0.3 + 0.4 * t), height * (0.4 + 0.2 * np.sin(t * 6)))
+        frames.append(render_frame(
+            badge, resolution,
+            badge_width=int(height * (0.18 + 0.1 * t)),
+            center=center,
+            angle=8 * np.sin(t * 4),
+            blur=0.6,
+            rng=rng,
+        ))
+    return frames
+
+
+def video_frames(path, limit):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run(name, decode, frames):
+    timings = []
+    detected = 0
+    for frame in frames:
+        start = time.perf_counter()
+        results = decode(frame)
+        timings.append((time.perf_counter() - start) * 1000)
+        if results:
+            detected += 1
+    timings = np.array(timings)
+    print(f"{name:<10} mean {timings.mean():7.2f} ms  p50 {np.percentile(timings, 50):7.2f} ms  "
+          f"p95 {np.percentile(timings, 95):7.2f} ms  max {timings.max():7.2f} ms  "
+          f"detected {detected}/{len(frames)}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", help="decode frames from a recorded video instead of synthetic ones")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    if args.video:
+        frames = video_frames(args.video, args.frames)
+    else:
+        frames = synthetic_sequence(args.frames, (args.width, args.height))
+    print(f"{len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    before = run("full", decode_full, frames)
+    fast = FastQRDecoder()
+    after = run("fast", fast.decode, frames)
+    print(f"resolved by: {fast.stats}")
+    print(f"speedup (mean): {before.mean() / after.mean():.1f}x")
+
+
+if __name__ == "__main__":
+    main()
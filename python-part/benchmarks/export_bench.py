@@ -0,0 +1,109 @@
+"""Attendance export throughput and memory: rows/s and peak memory for CSV and Parquet.
+
+Seeds --rows synthetic attendance records into a scratch database (dropped
+afterwards unless --keep), creates the export index, then runs
+export_attendance for each format. Needs a running MongoDB at MONGO_URI and
+pyarrow for Parquet. Run from python-part/:
+
+    python -m benchmarks.export_bench
+    python -m benchmarks.export_bench --rows 2000000 --batch-size 10000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pymongo
+
+from attendance_dedup import attendance_day
+from export_attendance import MONGO_URI, export_attendance
+
+DEPARTMENTS = ["Engineering", "Sales", "Support", "Finance", "Operations"]
+
+
+def seed(db, rows, employees=2000, chunk=20000):
+    """One check-in per employee per day, going back as many days as needed"""
+    collection = db["attendance"]
+    day = datetime(2025, 1, 1, 8, 30)
+    batch = []
+    for index in range(rows):
+        employee = index % employees
+        if employee == 0 and index:
+            day += timedelta(days=1)
+        moment = day + timedelta(seconds=employee * 7)
+        batch.append({
+            "employee_id": f"EMP{employee:05d}",
+            "name": f"Employee {employee}",
+            "department": DEPARTMENTS[employee % len(DEPARTMENTS)],
+            "check_in_time": moment,
+            "attendance_day": attendance_day(moment),
+            "verification_method": "qr_only",
+        })
+        if len(batch) >= chunk:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+    collection.create_index([("check_in_time", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)])
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run(db, fmt, output, batch_size):
+    tracemalloc.start()
+    result = export_attendance(db, output, fmt, batch_size=batch_size, restart=True, progress_every=10 ** 9)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if os.path.isdir(output):
+        size = sum(os.path.getsize(os.path.join(output, name)) for name in os.listdir(output))
+    else:
+        size = os.path.getsize(output)
+    rss = peak_rss_mb()
+    print(f"{fmt:<8} {result['rows']:9d} rows  {result['seconds']:6.1f} s  {result['rows_per_second']:8.0f} rows/s  "
+          f"python peak {peak / 2 ** 20:6.1f} MiB  {size / 2 ** 20:7.1f} MiB on disk"
+          + (f"  process max RSS {rss:.0f} MiB" if rss is not None else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--formats", nargs="+", choices=["csv", "parquet"], default=["csv", "parquet"])
+    parser.add_argument("--db", default="attendance_export_bench", help="scratch database name")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient(MONGO_URI)
+    db = client[args.db]
+    workdir = tempfile.mkdtemp(prefix="export_bench_")
+    try:
+        if db["attendance"].estimated_document_count() != args.rows:
+            client.drop_database(args.db)
+            start = time.perf_counter()
+            seed(db, args.rows)
+            print(f"seeded {args.rows} rows in {time.perf_counter() - start:.1f} s")
+        for fmt in args.formats:
+            output = os.path.join(workdir, "export.csv" if fmt == "csv" else "export")
+            try:
+                run(db, fmt, output, args.batch_size)
+            except RuntimeError as e:
+                print(f"{fmt:<8} skipped: {e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if not args.keep:
+            client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Multi-kiosk load on one MongoDB: check-in latency, throughput and duplicate records.
+
+Each simulated kiosk is a thread replaying the database side of a check-in
+as fast as --interval allows:
+
+  legacy  the original process_qr_detection: employees.find_one,
+          attendance.find_one for today, insert_one, then the 10-row
+          recent-attendance query
+  upsert  the current path: employee from a preloaded directory, today's
+          set in memory, the writer's (employee_id, attendance_day) upsert
+          plus rollup increment, then a RecentAttendanceFeed poll
+
+Every pattern runs against a fresh scratch database (dropped afterwards
+unless --keep). --same-order makes every kiosk scan the same badges in the
+same order, so each check-in races on all kiosks at once. Needs a running
+mongod at MONGO_URI, or mongomock installed for --mongomock. Run from
+python-part/:
+
+    python -m benchmarks.kiosk_load
+    python -m benchmarks.kiosk_load --kiosks 50 --scans 200 --same-order
+    python -m benchmarks.kiosk_load --mongomock --kiosks 4
+"""
+import argparse
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+import pymongo
+
+from attendance_dedup import DailyAttendanceSet, attendance_day, day_bounds
+from create_indexes import ATTENDANCE_DAY_INDEX, INDEXES, MONGO_URI, create_index
+from employee_cache import PROJECTION as EMPLOYEE_PROJECTION
+from recent_feed import RecentAttendanceFeed
+from rollups import AttendanceRollups
+
+STEPS = ["lookup", "dedup", "write", "refresh"]
+MARKED, DUPLICATE, UNKNOWN = "marked", "duplicate", "unknown"
+
+
+class LegacyKiosk:
+    """process_qr_detection as it was: four round trips per scan, no unique index"""
+
+    def __init__(self, db):
+        self.employees = db["employees"]
+        self.attendance = db["attendance"]
+
+    def check_in(self, employee_id, timings):
+        start = time.perf_counter()
+        employee = self.employees.find_one({"employee_id": employee_id})
+        timings["lookup"].append(time.perf_counter() - start)
+        if not employee:
+            return UNKNOWN
+
+        now = datetime.now()
+        today, tomorrow = day_bounds(now)
+        start = time.perf_counter()
+        already_marked = self.attendance.find_one({
+            "employee_id": employee["employee_id"],
+            "check_in_time": {"$gte": today, "$lt": tomorrow},
+        })
+        timings["dedup"].append(time.perf_counter() - start)
+        if already_marked:
+            return DUPLICATE
+
+        start = time.perf_counter()
+        self.attendance.insert_one({
+            "employee_id": employee["employee_id"],
+            "name": employee["name"],
+            "check_in_time": now,
+            "verification_method": "qr_only",
+        })
+        timings["write"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        list(self.attendance.find({"check_in_time": {"$gte": today, "$lt": tomorrow}})
+             .sort("check_in_time", -1).limit(10))
+        timings["refresh"].append(time.perf_counter() - start)
+        return MARKED
+
+
+class UpsertKiosk:
+    """The current check-in path, with the background upload done inline"""
+
+    def __init__(self, db, directory):
+        self.attendance = db["attendance"]
+        self.directory = directory
+        self.today = DailyAttendanceSet(self.attendance)
+        self.rollups = AttendanceRollups(db)
+        self.feed = RecentAttendanceFeed(self.attendance)
+
+    def check_in(self, employee_id, timings):
+        start = time.perf_counter()
+        employee = self.directory.get(employee_id)
+        timings["lookup"].append(time.perf_counter() - start)
+        if not employee:
+            return UNKNOWN
+
+        now = datetime.now()
+        start = time.perf_counter()
+        marked = self.today.mark(employee["employee_id"], now)
+        timings["dedup"].append(time.perf_counter() - start)
+        if not marked:
+            return DUPLICATE
+
+        record = {
+            "employee_id": employee["employee_id"],
+            "name": employee["name"],
+            "department": employee.get("department"),
+            "check_in_time": now,
+            "attendance_day": attendance_day(now),
+            "verification_method": "qr_only",
+        }
+        start = time.perf_counter()
+        try:
+            # Same operation AttendanceWriter.flush_once sends, one record at a time
+            result = self.attendance.update_one(
+                {"employee_id": record["employee_id"], "attendance_day": record["attendance_day"]},
+                {"$setOnInsert": record},
+                upsert=True,
+            )
+            inserted = result.upserted_id is not None
+        except pymongo.errors.DuplicateKeyError:
+            # Two kiosks upserting the same new key at once; the other one won
+            inserted = False
+        if inserted:
+            self.rollups.record([record])
+        timings["write"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        self.feed.poll(now)
+        timings["refresh"].append(time.perf_counter() - start)
+        return MARKED if inserted else DUPLICATE
+
+
+def prepare(db, employees, pattern):
+    db["employees"].insert_many([
+        {"employee_id": f"EMP{i:05d}", "name": f"Employee {i}", "department": f"Dept {i % 10}"}
+        for i in range(employees)
+    ])
+    for collection_name, keys, options in INDEXES:
+        # The legacy code ran without the unique per-day index
+        if pattern == "legacy" and (collection_name, keys, options) == ATTENDANCE_DAY_INDEX:
+            continue
+        create_index(db[collection_name], keys, options)
+
+
+def scan_order(kiosk, scans, employees, same_order, seed):
+    rng = random.Random(seed if same_order else seed + kiosk)
+    return [f"EMP{rng.randrange(employees):05d}" for _ in range(scans)]
+
+
+def duplicate_records(collection):
+    """Records beyond the first per employee per day"""
+    pipeline = [
+        {"$group": {"_id": {"employee_id": "$employee_id", "day": {
+            "$dateToString": {"format": "%Y-%m-%d", "date": "$check_in_time"}}}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    return sum(group["count"] - 1 for group in collection.aggregate(pipeline))
+
+
+def percentile(values, q):
+    """np.percentile, or NaN when every scan failed"""
+    return np.percentile(values, q) if len(values) else float("nan")
+
+
+def run(client, db_name, pattern, args):
+    client.drop_database(db_name)
+    db = client[db_name]
+    prepare(db, args.employees, pattern)
+    if pattern == "upsert":
+        directory = {doc["employee_id"]: doc for doc in db["employees"].find({}, EMPLOYEE_PROJECTION)}
+        kiosks = [UpsertKiosk(db, directory) for _ in range(args.kiosks)]
+    else:
+        kiosks = [LegacyKiosk(db) for _ in range(args.kiosks)]
+
+    latencies = []
+    timings = defaultdict(list)
+    outcomes = defaultdict(int)
+    errors = set()
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.kiosks + 1)
+
+    def kiosk_loop(index, kiosk):
+        local_latencies = []
+        local_timings = defaultdict(list)
+        local_outcomes = defaultdict(int)
+        badges = scan_order(index, args.scans, args.employees, args.same_order, args.seed)
+        barrier.wait()
+        for employee_id in badges:
+            start = time.perf_counter()
+            try:
+                status = kiosk.check_in(employee_id, local_timings)
+            except Exception as e:
+                # Count it and keep going; a dead kiosk thread would skew every figure
+                status = "error"
+                with lock:
+                    errors.add(f"{type(e).__name__}: {e}")
+            local_latencies.append(time.perf_counter() - start)
+            local_outcomes[status] += 1
+            if args.interval:
+                time.sleep(args.interval)
+        with lock:
+            latencies.extend(local_latencies)
+            for step, values in local_timings.items():
+                timings[step].extend(values)
+            for status, count in local_outcomes.items():
+                outcomes[status] += count
+
+    threads = [threading.Thread(target=kiosk_loop, args=(i, kiosk), daemon=True) for i, kiosk in enumerate(kiosks)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    records = db["attendance"].count_documents({})
+    duplicates = duplicate_records(db["attendance"])
+    ms = np.array(latencies) * 1000
+    print(f"{pattern:<7} {len(latencies):6d} scans  {len(latencies) / elapsed:7.0f} scans/s  "
+          f"p50 {percentile(ms, 50):6.2f} ms  p99 {percentile(ms, 99):7.2f} ms  "
+          f"{outcomes[MARKED]} marked / {outcomes[DUPLICATE]} duplicate / {outcomes['error']} errors  "
+          f"{records} records, {duplicates} duplicate records")
+    print("        " + "  ".join(
+        f"{step} p50 {percentile(timings[step], 50) * 1000:.2f} / p99 {percentile(timings[step], 99) * 1000:.2f} ms"
+        for step in STEPS if timings[step]
+    ))
+    for error in sorted(errors):
+        print(f"        error: {error}")
+    if not args.keep:
+        client.drop_database(db_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kiosks", type=int, default=20)
+    parser.add_argument("--scans", type=int, default=200, help="scans per kiosk")
+    parser.add_argument("--employees", type=int, default=2000)
+    parser.add_argument("--interval", type=float, default=0.0, help="seconds between scans on a kiosk")
+    parser.add_argument("--same-order", action="store_true", help="every kiosk scans the same badge sequence")
+    parser.add_argument("--patterns", nargs="+", choices=["legacy", "upsert"], default=["legacy", "upsert"])
+    parser.add_argument("--mongomock", action="store_true", help="in-process stand-in instead of a mongod")
+    parser.add_argument("--db", default="attendance_kiosk_load", help="scratch database name")
+    parser.add_argument("--keep", action="store_true", help="keep the last scratch database")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        client = pymongo.MongoClient(MONGO_URI, maxPoolSize=max(100, args.kiosks))
+    print(f"{args.kiosks} kiosks x {args.scans} scans over {args.employees} employees"
+          f"{', same order' if args.same_order else ''}"
+          f"{', ' + str(args.interval) + ' s apart' if args.interval else ''}"
+          f" ({'mongomock' if args.mongomock else MONGO_URI})")
+    try:
+        for pattern in args.patterns:
+            run(client, args.db, pattern, args)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""CPU use of the kiosk pipeline with and without motion gating.
+
+Replays an empty scene, a person walking up with a badge, then the empty
+scene again, in real time through FramePipeline + QRScanner, and reports
+process CPU time per run and whether the badge was still scanned. Run from
+python-part/:
+
+    python -m benchmarks.motion_bench
+    python -m benchmarks.motion_bench --idle-seconds 20 --idle-fps 2
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.vision_bench import EMPLOYEE_ID, StubService
+from motion import MotionGate
+from pipeline import FramePipeline
+from qr_decode import QRScanner, create_decoder
+from synthetic_frames import approach_clip, employee_payload, render_frame
+
+RESOLUTION = (1280, 720)
+
+
+class LiveReplaySource:
+    """cap.read() stand-in that behaves like a camera: frames keep coming
+    at ``fps`` whether or not anyone reads them, and read() returns the
+    current one. The last frame repeats once the timeline has ended."""
+
+    def __init__(self, frames, fps=30.0):
+        self.frames = frames
+        self.fps = fps
+        self.start = None
+
+    @property
+    def finished(self):
+        return self.start is not None and (time.perf_counter() - self.start) * self.fps >= len(self.frames)
+
+    def read(self):
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = now
+        position = (now - self.start) * self.fps
+        # Block until the next frame "arrives", as a camera read would
+        time.sleep((1 - position % 1) / self.fps)
+        index = min(int(position) + 1, len(self.frames) - 1)
+        return True, self.frames[index]
+
+
+def timeline(idle_seconds, fps):
+    rng = np.random.default_rng(11)
+    empty = [render_frame(None, RESOLUTION, rng=rng) for _ in range(int(fps))]
+    idle = [empty[i % len(empty)] for i in range(int(idle_seconds * fps))]
+    visit, _ = approach_clip(employee_payload(EMPLOYEE_ID), resolution=RESOLUTION, frames=int(3 * fps), lead_in=0)
+    return idle + visit + idle
+
+
+def run(name, frames, fps, motion):
+    service = StubService()
+    scanner = QRScanner(service.check_in, decode=create_decoder())
+    source = LiveReplaySource(frames, fps)
+    pipeline = FramePipeline(source, decode=scanner.scan, render=lambda frame: None, motion=motion)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    pipeline.start()
+    while not source.finished:
+        time.sleep(0.05)
+    pipeline.stop()
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    stats = pipeline.stats()
+    scanned = any(employee_id == EMPLOYEE_ID for _, employee_id in service.scans)
+    print(f"{name:<9} cpu {cpu:6.2f} s over {wall:5.1f} s ({cpu / wall * 100:5.1f}% of a core)  "
+          f"decoded {stats['decode']['processed']:4d} frames  badge {'scanned' if scanned else 'MISSED'}")
+    if motion is not None:
+        print(f"          {stats['motion']}")
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--idle-seconds", type=float, default=10.0, help="empty scene before and after the visit")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--idle-fps", type=float, default=4.0)
+    parser.add_argument("--hold", type=float, default=2.0, help="seconds at full rate after the last motion")
+    args = parser.parse_args()
+
+    frames = timeline(args.idle_seconds, args.fps)
+    print(f"{len(frames)} frames at {args.fps:.0f} fps ({len(frames) / args.fps:.0f} s), "
+          f"{RESOLUTION[0]}x{RESOLUTION[1]}")
+    always = run("always-on", frames, args.fps, None)
+    gated = run("gated", frames, args.fps, MotionGate(idle_fps=args.idle_fps, hold=args.hold))
+    print(f"cpu saved: {(1 - gated / always) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Badge payload formats: QR version and detection rate at 640x480, legacy JSON vs. compact signed.
+
+Uses QR_SIGNING_KEY if set, otherwise a throwaway key. Run from python-part/:
+
+    python -m benchmarks.payload_bench
+    python -m benchmarks.payload_bench --ids EMP001 CODTECS-000123
+"""
+import argparse
+import os
+import time
+
+import qrcode
+
+from qr_decode import create_decoder
+from qr_payload import decode_payload, encode_payload, legacy_payload
+from synthetic_frames import approach_clip
+
+RESOLUTION = (640, 480)
+# Badge height as a fraction of the frame: far away -> close
+BADGE_FRACTIONS = [0.08, 0.1, 0.12, 0.15, 0.2]
+
+
+def qr_version(payload):
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr.version
+
+
+def detection(payload, employee_id, badge_fraction, key, frames):
+    """Share of badge frames decoded to the right id, and mean decode ms"""
+    clip, first_badge = approach_clip(payload, resolution=RESOLUTION, frames=frames, badge_fraction=badge_fraction)
+    decode = create_decoder()
+    detected = 0
+    elapsed = 0.0
+    for frame in clip[first_badge:]:
+        start = time.perf_counter()
+        codes = decode(frame)
+        elapsed += time.perf_counter() - start
+        if any(decode_payload(code.data, key)[0] == employee_id for code in codes):
+            detected += 1
+    badge_frames = len(clip) - first_badge
+    return detected / float(badge_frames), elapsed / badge_frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ids", nargs="+", default=["EMP001", "CODTECS-000123"])
+    parser.add_argument("--frames", type=int, default=40, help="frames per synthetic clip")
+    args = parser.parse_args()
+    key = os.getenv("QR_SIGNING_KEY") or "benchmark-key"
+
+    for employee_id in args.ids:
+        formats = {"legacy": legacy_payload(employee_id), "compact": encode_payload(employee_id, key)}
+        for name, payload in formats.items():
+            print(f"{employee_id} {name:<8} {len(payload):3d} chars  QR version {qr_version(payload)}  {payload}")
+        for badge_fraction in BADGE_FRACTIONS:
+            line = f"  badge {badge_fraction:.2f} of frame height:"
+            for name, payload in formats.items():
+                rate, ms = detection(payload, employee_id, badge_fraction, key, args.frames)
+                line += f"  {name} {rate * 100:5.1f}% ({ms:4.1f} ms)"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Per-frame preview rendering cost: the old PIL path vs. PreviewRenderer.
+
+Measures CPU time and bytes allocated per frame. When a display is
+available the Tk PhotoImage step is included; otherwise only the work done
+off the UI thread is compared. Run from python-part/:
+
+    python -m benchmarks.preview_bench
+    python -m benchmarks.preview_bench --width 1280 --height 720
+"""
+import argparse
+import time
+import tkinter as tk
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+from preview import PreviewRenderer
+from synthetic_frames import employee_payload, make_badge, render_frame
+
+SIZE = (480, 360)
+OVERLAY = "Scan QR Code Here"
+
+
+def legacy_render(frame, show):
+    """What the kiosk did before: copy, convert at full size, resize with PIL"""
+    display = frame.copy()
+    cv2.putText(display, OVERLAY, (10, 30), cv2.FONT_HERSHEY_COMPLEX_SMALL, 1, (0, 0, 0), 1)
+    frame_rgb = cv2.cvtColor(display, cv2.COLOR_BGR2RGB)
+    frame_pil = Image.fromarray(frame_rgb).resize(SIZE)
+    if show:
+        return ImageTk.PhotoImage(frame_pil)
+    return frame_pil
+
+
+class _Label:
+    """Stands in for the Tk label when there is no display"""
+
+    def after(self, delay, callback):
+        pass
+
+    def configure(self, **kwargs):
+        pass
+
+
+def run(name, render, frames):
+    timings = []
+    for frame in frames:
+        start = time.process_time()
+        render(frame)
+        timings.append((time.process_time() - start) * 1000)
+    timings = np.array(timings)
+
+    # Separate pass: tracing allocations would skew the timings
+    samples = frames[:20]
+    tracemalloc.start()
+    peak = 0
+    for frame in samples:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        render(frame)
+        peak += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    print(f"{name:<8} cpu mean {timings.mean():6.2f} ms  p95 {np.percentile(timings, 95):6.2f} ms  "
+          f"peak allocation {peak / len(samples) / 1024:8.1f} KiB/frame")
+    return timings.mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    badge = make_badge(employee_payload("EMP001"))
+    frames = [render_frame(badge, (args.width, args.height), rng=rng) for _ in range(30)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+
+    try:
+        root = tk.Tk()
+        root.withdraw()
+        label = tk.Label(root)
+        show = True
+    except tk.TclError:
+        root = None
+        label = _Label()
+        show = False
+    print(f"{args.frames} frames at {args.width}x{args.height} -> {SIZE[0]}x{SIZE[1]}, "
+          f"{'including' if show else 'without (no display)'} the PhotoImage step")
+
+    renderer = PreviewRenderer(label, SIZE, overlay=OVERLAY)
+
+    def new_render(frame):
+        renderer.prepare(frame)
+        if show:
+            renderer._paste()
+
+    before = run("legacy", lambda frame: legacy_render(frame, show), frames)
+    after = run("renderer", new_render, frames)
+    print(f"cpu reduction: {(1 - after / before) * 100:.0f}%")
+    if root is not None:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Check-ins per minute for a queue of people: global cooldown vs. per-badge debounce.
+
+Simulates a line walking past one kiosk camera. Each person holds their
+badge in view for --dwell seconds and the next arrives --gap seconds later,
+so badges overlap in the frame whenever the gap is shorter than the dwell.
+The same frames go through the old scanner (3 s global lockout, first badge
+per frame only) and the current QRScanner, on a simulated clock. Run from
+python-part/:
+
+    python -m benchmarks.queue_bench
+    python -m benchmarks.queue_bench --people 40 --gap 0.8 --dwell 1.5
+"""
+import argparse
+import time
+
+import numpy as np
+
+from qr_decode import QRScanner, create_decoder, employee_id_from_qr
+from synthetic_frames import employee_payload, make_badge, render_frame
+
+RESOLUTION = (1280, 720)
+
+
+class LegacyScanner:
+    """The scan loop before per-badge debounce: global cooldown, first badge wins"""
+
+    def __init__(self, on_scan, cooldown=3, decode=None):
+        self.on_scan = on_scan
+        self.cooldown = cooldown
+        self.decode = decode or create_decoder()
+        self.last_scan_time = -cooldown
+
+    def scan(self, frame, now):
+        if now - self.last_scan_time < self.cooldown:
+            return []
+        for qr_code in self.decode(frame):
+            employee_id = employee_id_from_qr(qr_code.data)
+            if employee_id:
+                self.last_scan_time = now
+                self.on_scan(employee_id)
+                return [employee_id]
+        return []
+
+
+def line_of_people(people, gap, dwell, fps, seed=3):
+    """Yield (time, frame) for the whole queue; badges alternate left/right lanes"""
+    rng = np.random.default_rng(seed)
+    badges = [make_badge(employee_payload(f"EMP{i:03d}")) for i in range(people)]
+    width, height = RESOLUTION
+    duration = gap * (people - 1) + dwell
+    for index in range(int(duration * fps) + 1):
+        now = index / float(fps)
+        visible = [i for i in range(people) if i * gap <= now < i * gap + dwell]
+        # Render each lane as half a frame so two badges can share one frame
+        halves = []
+        for lane in (0, 1):
+            badge = next((badges[i] for i in visible if i % 2 == lane), None)
+            halves.append(render_frame(badge, (width // 2, height), badge_width=height // 3, rng=rng))
+        yield now, np.hstack(halves)
+
+
+def run(name, scanner_class, frames, people, cooldown):
+    scans = []
+    scanner = scanner_class(scans.append, cooldown=cooldown, decode=create_decoder())
+    start = time.perf_counter()
+    for now, frame in frames:
+        scanner.scan(frame, now=now)
+    elapsed = time.perf_counter() - start
+    duration = frames[-1][0]
+    unique = len(set(scans))
+    repeats = len(scans) - unique
+    print(f"{name:<9} {unique:3d}/{people} checked in  {unique / duration * 60:5.1f} per minute  "
+          f"{repeats} repeat scans  ({elapsed / len(frames) * 1000:.1f} ms/frame)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--people", type=int, default=30)
+    parser.add_argument("--gap", type=float, default=1.0, help="seconds between people")
+    parser.add_argument("--dwell", type=float, default=1.5, help="seconds each badge is in view")
+    parser.add_argument("--fps", type=float, default=15.0, help="decoded frames per second")
+    parser.add_argument("--cooldown", type=float, default=3.0)
+    args = parser.parse_args()
+
+    frames = list(line_of_people(args.people, args.gap, args.dwell, args.fps))
+    print(f"{args.people} people, one every {args.gap:.1f}s, badge in view {args.dwell:.1f}s, "
+          f"{len(frames)} frames at {args.fps:.0f} fps")
+    run("global", LegacyScanner, frames, args.people, args.cooldown)
+    run("debounce", QRScanner, frames, args.people, args.cooldown)
+
+
+if __name__ == "__main__":
+    main()
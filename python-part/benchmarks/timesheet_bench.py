@@ -0,0 +1,79 @@
+"""Timesheet computation over a year of attendance: NumPy columns vs. a per-record loop.
+
+Generates one check-in per employee per working day (about 5% without a
+check-out) as AttendanceEvents, then times timesheet.daily + summarize
+against a plain Python loop computing the same totals, and checks that they
+agree. No database needed. Run from python-part/:
+
+    python -m benchmarks.timesheet_bench
+    python -m benchmarks.timesheet_bench --employees 5000 --days 260
+"""
+import argparse
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+
+from timesheet import LATE_GRACE_MINUTES, STANDARD_HOURS, AttendanceEvents, daily, summarize
+
+
+def synthetic_events(employees, days, seed=5):
+    rng = np.random.default_rng(seed)
+    count = employees * days
+    day = np.datetime64("2025-01-01") + np.repeat(np.arange(days), employees)
+    employee = np.tile(np.arange(employees, dtype=np.int32), days)
+    # Arrivals around 08:55, shifts around 8.5 hours
+    arrival = rng.normal(8 * 3600 + 55 * 60, 15 * 60, count).astype(np.int64)
+    shift = rng.normal(8.5 * 3600, 45 * 60, count).astype(np.int64)
+    check_in = day.astype("datetime64[s]") + arrival
+    check_out = check_in + shift
+    check_out[rng.random(count) < 0.05] = np.datetime64("NaT")
+    return AttendanceEvents([f"EMP{i:05d}" for i in range(employees)], employee, check_in, check_out)
+
+
+def loop_totals(events):
+    """The per-record version: worked and overtime hours, late days per employee"""
+    check_ins = events.check_in.tolist()
+    check_outs = events.check_out.tolist()
+    totals = defaultdict(lambda: [0.0, 0.0, 0])
+    for employee, check_in, check_out in zip(events.employee.tolist(), check_ins, check_outs):
+        entry = totals[employee]
+        due = check_in.replace(hour=9, minute=0, second=0)
+        if check_in - due > timedelta(minutes=LATE_GRACE_MINUTES):
+            entry[2] += 1
+        if check_out is not None:
+            worked = (check_out - check_in).total_seconds() / 3600
+            entry[0] += worked
+            entry[1] += max(worked - STANDARD_HOURS, 0.0)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=260, help="working days")
+    args = parser.parse_args()
+
+    events = synthetic_events(args.employees, args.days)
+    print(f"{len(events)} records, {args.employees} employees x {args.days} days")
+
+    start = time.perf_counter()
+    totals = summarize(events, daily(events, workday_start="09:00"))
+    vectorized = time.perf_counter() - start
+    print(f"numpy  {vectorized:6.2f} s  ({len(events) / vectorized:10.0f} records/s)")
+
+    start = time.perf_counter()
+    expected = loop_totals(events)
+    looped = time.perf_counter() - start
+    print(f"loop   {looped:6.2f} s  ({len(events) / looped:10.0f} records/s)  {looped / vectorized:.0f}x slower")
+
+    for code, (worked, overtime, late) in expected.items():
+        assert abs(totals["worked_hours"][code] - worked) < 1e-6 * max(1.0, worked)
+        assert abs(totals["overtime_hours"][code] - overtime) < 1e-6 * max(1.0, overtime)
+        assert totals["late_days"][code] == late
+    print("totals match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Replayable scanner benchmark, no camera or database needed.
+
+Feeds synthetic badge clips (or a recorded video) through the same
+FramePipeline + QRScanner path the kiosk uses, with the attendance service
+stubbed out. Run from python-part/:
+
+    python -m benchmarks.vision_bench                  # one-factor sweep
+    python -m benchmarks.vision_bench --full-grid      # every combination
+    python -m benchmarks.vision_bench --video entrance.mp4
+    QR_DECODE_MODE=full python -m benchmarks.vision_bench   # compare decoders
+"""
+import argparse
+import itertools
+import time
+
+import cv2
+import numpy as np
+
+from pipeline import FramePipeline
+from qr_decode import QRScanner, create_decoder
+from synthetic_frames import approach_clip, employee_payload
+
+EMPLOYEE_ID = "EMP001"
+
+LIGHTING = {"dim": (-70, 0.6), "normal": (0, 1.0), "bright": (50, 1.3)}
+BASELINE = {"resolution": (1280, 720), "badge": 0.25, "blur": 0.0, "angle": 0.0, "lighting": "normal"}
+SWEEPS = {
+    "resolution": [(640, 480), (1280, 720), (1920, 1080)],
+    "badge": [0.1, 0.18, 0.25, 0.4],
+    "blur": [0.0, 1.0, 2.0, 3.0],
+    "angle": [0.0, 15.0, 30.0, 45.0],
+    "lighting": list(LIGHTING),
+}
+
+
+class ReplaySource:
+    """cap.read() stand-in serving a list of frames at a fixed rate"""
+
+    def __init__(self, frames, fps=30.0):
+        self.frames = frames
+        self.interval = 1.0 / fps if fps else 0
+        self.served_at = [None] * len(frames)
+        self.finished = False
+        self._index = 0
+        self._next = None
+
+    def read(self):
+        if self._index >= len(self.frames):
+            self.finished = True
+            time.sleep(0.005)
+            return False, None
+        now = time.perf_counter()
+        if self._next is None:
+            self._next = now
+        if self.interval and now < self._next:
+            time.sleep(self._next - now)
+        self._next += self.interval
+        index = self._index
+        self._index += 1
+        self.served_at[index] = time.perf_counter()
+        return True, self.frames[index]
+
+
+class StubService:
+    """Records scans instead of writing attendance"""
+
+    def __init__(self):
+        self.scans = []
+
+    def check_in(self, employee_id):
+        self.scans.append((time.perf_counter(), employee_id))
+
+
+def decode_latency(frames, first_badge):
+    """Per-frame decode+parse time with no cooldown, and detection rate"""
+    found = []
+    scanner = QRScanner(found.append, cooldown=0, decode=create_decoder())
+    timings = []
+    detected = 0
+    for index, frame in enumerate(frames):
+        start = time.perf_counter()
+        ids = scanner.scan(frame)
+        timings.append((time.perf_counter() - start) * 1000)
+        if index >= first_badge and EMPLOYEE_ID in ids:
+            detected += 1
+    badge_frames = len(frames) - first_badge
+    return np.array(timings), detected / float(badge_frames) if badge_frames else 0.0
+
+
+def end_to_end(frames, first_badge, fps):
+    """Run the clip through the capture/decode pipeline in real time"""
+    service = StubService()
+    scanner = QRScanner(service.check_in, decode=create_decoder())
+    source = ReplaySource(frames, fps)
+    pipeline = FramePipeline(source, decode=scanner.scan, render=lambda frame: None)
+    start = time.perf_counter()
+    pipeline.start()
+    while not source.finished:
+        time.sleep(0.01)
+    # Let the decode stage finish the last frame it took
+    time.sleep(0.2)
+    pipeline.stop()
+    elapsed = time.perf_counter() - start
+    stats = pipeline.stats()
+    first_scan = next((at for at, employee_id in service.scans if employee_id == EMPLOYEE_ID), None)
+    time_to_detect = None
+    if first_scan is not None and source.served_at[first_badge] is not None:
+        time_to_detect = (first_scan - source.served_at[first_badge]) * 1000
+    return stats["decode"]["processed"] / elapsed, stats["decode"]["dropped"], time_to_detect
+
+
+def scenarios(full_grid):
+    if full_grid:
+        keys = list(SWEEPS)
+        for values in itertools.product(*(SWEEPS[key] for key in keys)):
+            yield dict(zip(keys, values))
+        return
+    yield dict(BASELINE)
+    for key, values in SWEEPS.items():
+        for value in values:
+            if value != BASELINE[key]:
+                yield dict(BASELINE, **{key: value})
+
+
+def describe(scenario):
+    width, height = scenario["resolution"]
+    return (f"{width}x{height} badge={scenario['badge']:.2f} blur={scenario['blur']:.1f} "
+            f"angle={scenario['angle']:.0f} {scenario['lighting']}")
+
+
+def report(name, timings, detection_rate, fps, dropped, time_to_detect):
+    ttd = f"{time_to_detect:7.0f} ms" if time_to_detect is not None else "   never"
+    print(f"{name:<52} p50 {np.percentile(timings, 50):6.1f}  p95 {np.percentile(timings, 95):6.1f}  "
+          f"p99 {np.percentile(timings, 99):6.1f} ms  {fps:5.1f} fps  drop {dropped:4d}  "
+          f"detect {detection_rate * 100:5.1f}%  first {ttd}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", help="replay a recorded video instead of synthetic clips")
+    parser.add_argument("--badge-from", type=int, default=0, help="with --video: first frame showing a badge")
+    parser.add_argument("--full-grid", action="store_true", help="every combination instead of a one-factor sweep")
+    parser.add_argument("--frames", type=int, default=60, help="frames per synthetic clip")
+    parser.add_argument("--fps", type=float, default=30.0, help="replay rate for the end-to-end run")
+    args = parser.parse_args()
+
+    print("scenario, decode latency percentiles, sustained decode fps, frames dropped by the decode stage, "
+          "detection rate on badge frames, time from badge appearing to first scan")
+
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        frames = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if not frames:
+            print(f"Could not read {args.video}")
+            return
+        timings, rate = decode_latency(frames, args.badge_from)
+        fps, dropped, ttd = end_to_end(frames, args.badge_from, args.fps)
+        report(args.video, timings, rate, fps, dropped, ttd)
+        return
+
+    all_timings = []
+    for scenario in scenarios(args.full_grid):
+        brightness, contrast = LIGHTING[scenario["lighting"]]
+        frames, first_badge = approach_clip(
+            employee_payload(EMPLOYEE_ID),
+            resolution=scenario["resolution"],
+            frames=args.frames,
+            badge_fraction=scenario["badge"],
+            angle=scenario["angle"],
+            blur=scenario["blur"],
+            brightness=brightness,
+            contrast=contrast,
+        )
+        timings, rate = decode_latency(frames, first_badge)
+        fps, dropped, ttd = end_to_end(frames, first_badge, args.fps)
+        report(describe(scenario), timings, rate, fps, dropped, ttd)
+        all_timings.append(timings)
+
+    overall = np.concatenate(all_timings)
+    print(f"overall: p50 {np.percentile(overall, 50):.1f} ms  p95 {np.percentile(overall, 95):.1f} ms  "
+          f"p99 {np.percentile(overall, 99):.1f} ms over {len(overall)} frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import time
+
+import cv2
+
+# --- Configuration ---
+CAMERA_PROFILE_PATH = os.getenv(
+    "CAMERA_PROFILE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "camera_profile.json"),
+)
+CAMERA_PROBE_COUNT = int(os.getenv("CAMERA_PROBE_COUNT", "10"))
+CAMERA_PROBE_TIMEOUT = float(os.getenv("CAMERA_PROBE_TIMEOUT", "3.0"))
+# OpenCV capture backend name, e.g. "DSHOW" or "MSMF" on Windows, "V4L2" on Linux
+CAMERA_BACKEND = getattr(cv2, "CAP_" + os.getenv("CAMERA_BACKEND", "ANY").upper(), cv2.CAP_ANY)
+# ---------------------
+
+RESOLUTIONS = [(1920, 1080), (1280, 720), (640, 480)]
+
+
+def load_profile(path=CAMERA_PROFILE_PATH):
+    """Last known-good camera: {"index", "backend", "resolution"} or None"""
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+        return {
+            "index": int(profile["index"]),
+            "backend": int(profile.get("backend", CAMERA_BACKEND)),
+            "resolution": tuple(profile["resolution"]) if profile.get("resolution") else None,
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_profile(index, backend, resolution, path=CAMERA_PROFILE_PATH):
+    try:
+        with open(path, "w") as f:
+            json.dump({"index": index, "backend": backend, "resolution": list(resolution) if resolution else None}, f)
+    except OSError as e:
+        print(f"Could not save camera profile: {e}")
+
+
+def probe_camera(index, backend=CAMERA_BACKEND):
+    """Open a device and read one frame. Returns (index, backend) or None."""
+    cap = cv2.VideoCapture(index, backend)
+    try:
+        if not cap.isOpened():
+            return None
+        ret, _ = cap.read()
+        if not ret:
+            return None
+        return index, backend
+    finally:
+        cap.release()
+
+
+def discover_cameras(count=CAMERA_PROBE_COUNT, timeout=CAMERA_PROBE_TIMEOUT, backend=CAMERA_BACKEND, exclude=()):
+    """Probe device indices 0..count-1 concurrently.
+
+    Each probe runs in its own daemon thread, so a driver that hangs on open
+    costs at most ``timeout`` seconds for the whole scan instead of blocking
+    startup. Indices in ``exclude`` (e.g. a camera already in use) are
+    skipped. Returns the indices that delivered a frame, in order.
+    """
+    results = {}
+    threads = []
+
+    def worker(index):
+        try:
+            if probe_camera(index, backend):
+                results[index] = True
+        except cv2.error:
+            pass
+
+    for index in range(count):
+        if index in exclude:
+            continue
+        thread = threading.Thread(target=worker, args=(index,), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+    return sorted(index for index, ok in list(results.items()) if ok)
+
+
+def negotiate_resolution(cap, resolutions=RESOLUTIONS):
+    """Set the highest supported resolution from the list; returns what stuck"""
+    for width, height in resolutions:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if cap.get(cv2.CAP_PROP_FRAME_WIDTH) == width and cap.get(cv2.CAP_PROP_FRAME_HEIGHT) == height:
+            break
+    return int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+
+def open_camera(index, backend=CAMERA_BACKEND, resolution=None):
+    """Open a camera ready for capture.
+
+    With a known ``resolution`` it is set directly; otherwise the resolutions
+    in RESOLUTIONS are negotiated. Raises RuntimeError if no frame can be read.
+    Returns (cap, resolution).
+    """
+    cap = cv2.VideoCapture(index, backend)
+    if not cap.isOpened():
+        cap.release()
+        raise RuntimeError(f"Could not open camera {index}")
+    # Keep the driver queue short so reads return the newest frame
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    if resolution:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+        actual = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    else:
+        actual = negotiate_resolution(cap)
+    ret, _ = cap.read()
+    if not ret:
+        cap.release()
+        raise RuntimeError("Could not read frame from camera")
+    return cap, actual
+
+
+def open_profiled_camera(path=CAMERA_PROFILE_PATH):
+    """Open the last known-good camera directly. Returns (cap, profile) or None."""
+    profile = load_profile(path)
+    if profile is None:
+        return None
+    try:
+        cap, resolution = open_camera(profile["index"], profile["backend"], profile["resolution"])
+    except (RuntimeError, cv2.error):
+        return None
+    if profile["resolution"] and tuple(resolution) != tuple(profile["resolution"]):
+        # Device changed capabilities; renegotiate on the next full probe
+        cap.release()
+        return None
+    return cap, profile
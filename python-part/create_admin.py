@@ -1,6 +1,17 @@
+import argparse
+import csv
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import datetime
+
 import pymongo
 import bcrypt
-import os
+from pymongo import UpdateOne
+
+from qr_payload import QR_SIGNING_KEY, badge_payload
 
 # --- Configuration ---
 # Read from environment variables or use default values
@@ -8,8 +19,14 @@ MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
 DB_NAME = "attendance_system"
 ADMIN_USERNAME = "admin"
 ADMIN_PASSWORD = "admin123"
+PROVISION_CHUNK_SIZE = int(os.getenv("PROVISION_CHUNK_SIZE", "500"))
 # ---------------------
 
+EMPLOYEE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+EMPLOYEE_FIELDS = ("employee_id", "name", "email", "department")
+
+
 def create_admin_user():
     """
     Creates an admin user in the database with a hashed password.
@@ -57,5 +74,227 @@ def create_admin_user():
         if 'client' in locals() and client:
             client.close()
 
+
+def read_employees(path):
+    """Yield (row number, row dict) from a CSV, JSON Lines or JSON array file"""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            # Line 1 is the header
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row
+    elif path.lower().endswith(".json"):
+        # A JSON array has to be parsed whole; use .jsonl for very large files
+        with open(path, encoding="utf-8") as f:
+            for index, row in enumerate(json.load(f), start=1):
+                yield index, row
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, e
+
+
+def validate_employee(row):
+    """Return (employee, None) for a valid row or (None, reason)"""
+    if isinstance(row, Exception):
+        return None, f"invalid JSON: {row}"
+    if not isinstance(row, dict):
+        return None, "not an object"
+    employee = {field: str(row.get(field) or "").strip() for field in EMPLOYEE_FIELDS}
+    if not EMPLOYEE_ID_PATTERN.match(employee["employee_id"]):
+        return None, f"invalid employee_id {employee['employee_id']!r}"
+    if not employee["name"]:
+        return None, "missing name"
+    if employee["email"] and not EMAIL_PATTERN.match(employee["email"]):
+        return None, f"invalid email {employee['email']!r}"
+    if not employee["email"]:
+        del employee["email"]
+    if not employee["department"]:
+        del employee["department"]
+    return employee, None
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def upsert_employees(collection, employees, now=None):
+    """Unordered upsert of one chunk keyed by employee_id.
+
+    Returns (upserted, modified, errors); one failing row does not stop the
+    rest of the chunk.
+    """
+    now = now or datetime.now()
+    operations = [
+        UpdateOne(
+            {"employee_id": employee["employee_id"]},
+            {
+                # updated_at lets running kiosks pick the change up (employee_cache.py)
+                "$set": dict(employee, updated_at=now),
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+        )
+        for employee in employees
+    ]
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+        return result.upserted_count, result.modified_count, []
+    except pymongo.errors.BulkWriteError as e:
+        details = e.details
+        errors = [
+            f"{employees[error['index']]['employee_id']}: {error.get('errmsg')}"
+            for error in details.get("writeErrors", [])
+        ]
+        return details.get("nUpserted", 0), details.get("nModified", 0), errors
+
+
+def render_badge(employee, out_dir):
+    """Write <employee_id>.png with the badge QR and a caption; runs in a worker process"""
+    import qrcode
+    from PIL import Image, ImageDraw
+
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=10, border=4)
+    # Compact signed payload when QR_SIGNING_KEY is set, legacy JSON otherwise
+    qr.add_data(badge_payload(employee["employee_id"]))
+    qr.make(fit=True)
+    code = qr.make_image(fill_color="black", back_color="white").get_image().convert("RGB")
+
+    # Caption below the quiet zone so printed badges can be told apart
+    image = Image.new("RGB", (code.width, code.height + 30), "white")
+    image.paste(code, (0, 0))
+    caption = f"{employee['name']} ({employee['employee_id']})"
+    draw = ImageDraw.Draw(image)
+    text_width = draw.textlength(caption)
+    draw.text(((image.width - text_width) / 2, code.height + 8), caption, fill="black")
+
+    path = os.path.join(out_dir, f"{employee['employee_id']}.png")
+    image.save(path)
+    return path
+
+
+def provision_employees(path, badges_dir=None, chunk_size=PROVISION_CHUNK_SIZE, workers=None, dry_run=False):
+    """Validate and upsert employees from path, rendering badges in parallel"""
+    client = None
+    collection = None
+    if not dry_run:
+        client = pymongo.MongoClient(MONGO_URI)
+        collection = client[DB_NAME]["employees"]
+
+    pool = None
+    if badges_dir:
+        if not QR_SIGNING_KEY:
+            print("⚠️ QR_SIGNING_KEY is not set; badges use the unsigned legacy JSON payload")
+        os.makedirs(badges_dir, exist_ok=True)
+        pool = ProcessPoolExecutor(max_workers=workers)
+
+    totals = {"rows": 0, "valid": 0, "invalid": 0, "upserted": 0, "modified": 0, "failed": 0, "badges": 0}
+    seen = set()
+    in_flight = []
+    start = time.perf_counter()
+    upsert_seconds = 0.0
+    try:
+        for chunk in chunked(read_employees(path), chunk_size):
+            employees = []
+            for line_number, row in chunk:
+                totals["rows"] += 1
+                employee, reason = validate_employee(row)
+                if employee and employee["employee_id"] in seen:
+                    employee, reason = None, f"duplicate employee_id {employee['employee_id']!r}"
+                if reason:
+                    totals["invalid"] += 1
+                    print(f"  ⚠️ row {line_number}: {reason}")
+                    continue
+                seen.add(employee["employee_id"])
+                employees.append(employee)
+            totals["valid"] += len(employees)
+
+            # Badges for this chunk render while it is being written
+            if pool is not None:
+                previous, in_flight = in_flight, [pool.submit(render_badge, e, badges_dir) for e in employees]
+                totals["badges"] += _collect_badges(previous)
+
+            if collection is not None and employees:
+                upsert_start = time.perf_counter()
+                upserted, modified, errors = upsert_employees(collection, employees)
+                upsert_seconds += time.perf_counter() - upsert_start
+                totals["upserted"] += upserted
+                totals["modified"] += modified
+                totals["failed"] += len(errors)
+                for error in errors:
+                    print(f"  ❌ {error}")
+
+            elapsed = time.perf_counter() - start
+            print(f"{totals['rows']} rows, {totals['valid']} valid, {totals['upserted']} new, "
+                  f"{totals['modified']} updated, {totals['badges']} badges "
+                  f"({totals['rows'] / elapsed:.0f} rows/s)")
+
+        if pool is not None:
+            totals["badges"] += _collect_badges(in_flight)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if client is not None:
+            client.close()
+
+    elapsed = time.perf_counter() - start
+    print("✅ Provisioning finished" if not totals["failed"] else "⚠️ Provisioning finished with errors")
+    print(f"  Rows: {totals['rows']} ({totals['invalid']} invalid)")
+    if not dry_run:
+        print(f"  Employees: {totals['upserted']} created, {totals['modified']} updated, {totals['failed']} failed")
+        if upsert_seconds:
+            print(f"  Upsert throughput: {totals['valid'] / upsert_seconds:.0f} employees/s")
+    if badges_dir:
+        print(f"  Badges: {totals['badges']} written to {badges_dir}")
+    print(f"  Total: {elapsed:.1f}s, {totals['rows'] / elapsed if elapsed else 0:.0f} rows/s")
+    return totals
+
+
+def _collect_badges(futures):
+    wait(futures)
+    written = 0
+    for future in futures:
+        try:
+            future.result()
+            written += 1
+        except Exception as e:
+            print(f"  ❌ Badge failed: {e}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create the admin user or provision employees in bulk.")
+    subcommands = parser.add_subparsers(dest="command")
+    subcommands.add_parser("admin", help="create the default admin user (the default)")
+    employees = subcommands.add_parser("employees", help="upsert employees from a CSV, JSON Lines or JSON file")
+    employees.add_argument("file", help="columns/keys: employee_id, name, email, department")
+    employees.add_argument("--badges", metavar="DIR", help="also render a QR badge PNG per employee into DIR")
+    employees.add_argument("--chunk-size", type=int, default=PROVISION_CHUNK_SIZE, help="rows per bulk write")
+    employees.add_argument("--workers", type=int, help="badge rendering processes (default: CPU count)")
+    employees.add_argument("--dry-run", action="store_true", help="validate (and render badges) without writing to MongoDB")
+    args = parser.parse_args()
+
+    if args.command == "employees":
+        try:
+            provision_employees(args.file, args.badges, args.chunk_size, args.workers, args.dry_run)
+        except pymongo.errors.ConnectionFailure:
+            print("❌ Error: Could not connect to MongoDB.")
+            print(f"Please ensure MongoDB is running at {MONGO_URI}")
+    else:
+        create_admin_user()
+
+
 if __name__ == "__main__":
-    create_admin_user() 
\ No newline at end of file
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pymongo
+from bson import ObjectId
+
+# --- Configuration ---
+# Read from environment variables or use default values
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DB_NAME = os.getenv("DB_NAME", "attendance_system")
+# ---------------------
+
+# (collection, keys, options) for every index the apps rely on
+ATTENDANCE_DAY_INDEX = (
+    "attendance",
+    [("employee_id", pymongo.ASCENDING), ("attendance_day", pymongo.ASCENDING)],
+    # Partial, so records written before attendance_day existed don't clash
+    {"name": "employee_day_unique", "unique": True, "partialFilterExpression": {"attendance_day": {"$exists": True}}},
+)
+
+INDEXES = [
+    ATTENDANCE_DAY_INDEX,
+    # Today's / recent check-ins, newest first
+    ("attendance", [("check_in_time", pymongo.DESCENDING)], {"name": "check_in_time_desc"}),
+    # One employee's history over a date range
+    (
+        "attendance",
+        [("employee_id", pymongo.ASCENDING), ("check_in_time", pymongo.DESCENDING)],
+        {"name": "employee_check_in"},
+    ),
+    # Payroll export: streamed in (check_in_time, _id) order and resumed from a key
+    (
+        "attendance",
+        [("check_in_time", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+        {"name": "check_in_time_id"},
+    ),
+    ("employees", [("employee_id", pymongo.ASCENDING)], {"name": "employee_id_unique", "unique": True}),
+    # Incremental refresh of the desktop app's employee directory
+    ("employees", [("updated_at", pymongo.ASCENDING)], {"name": "updated_at"}),
+    ("admins", [("username", pymongo.ASCENDING)], {"name": "username_unique", "unique": True}),
+]
+
+
+def create_index(collection, keys, options):
+    """Create an index; a no-op if an identical one already exists"""
+    return collection.create_index(keys, **options)
+
+
+def ensure_indexes(db):
+    """Create every index in INDEXES, returning the names that failed"""
+    failed = []
+    for collection_name, keys, options in INDEXES:
+        try:
+            create_index(db[collection_name], keys, options)
+            print(f"✅ {collection_name}.{options['name']}")
+        except pymongo.errors.OperationFailure as e:
+            # Typically an index with the same name/keys but other options,
+            # or existing duplicates preventing a unique index
+            print(f"❌ {collection_name}.{options['name']}: {e}")
+            failed.append(options["name"])
+    return failed
+
+
+def verify_indexes(db):
+    """Check every index in INDEXES exists with the expected keys and options"""
+    failed = []
+    for collection_name, keys, options in INDEXES:
+        info = db[collection_name].index_information().get(options["name"])
+        if info is None:
+            print(f"❌ {collection_name}.{options['name']} is missing")
+            failed.append(options["name"])
+            continue
+        problems = []
+        if [(field, int(direction)) for field, direction in info["key"]] != [(f, int(d)) for f, d in keys]:
+            problems.append(f"keys are {info['key']}")
+        if bool(info.get("unique")) != bool(options.get("unique")):
+            problems.append(f"unique is {bool(info.get('unique'))}")
+        if info.get("partialFilterExpression") != options.get("partialFilterExpression"):
+            problems.append(f"partial filter is {info.get('partialFilterExpression')}")
+        if problems:
+            print(f"❌ {collection_name}.{options['name']}: " + ", ".join(problems))
+            failed.append(options["name"])
+    return failed
+
+
+def query_shapes(db):
+    """The queries the desktop app, export and timesheets issue, as (description, explain command)"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    tomorrow = today + timedelta(days=1)
+    sample = db["employees"].find_one({}, {"employee_id": 1}) or {}
+    employee_id = sample.get("employee_id", "EXPLAIN_PROBE")
+    today_range = {"$gte": today, "$lt": tomorrow}
+    return [
+        ("recent attendance (check_in_time range, sorted desc)", {
+            "find": "attendance",
+            "filter": {"check_in_time": today_range},
+            "sort": {"check_in_time": -1},
+            "limit": 10,
+        }),
+        ("recent attendance poll (new _ids today)", {
+            "find": "attendance",
+            "filter": {"check_in_time": today_range, "_id": {"$gt": ObjectId.from_datetime(today)}},
+            "sort": {"_id": 1},
+        }),
+        ("employee attendance for a day", {
+            "find": "attendance",
+            "filter": {"employee_id": employee_id, "check_in_time": today_range},
+        }),
+        ("today's attendance rebuild (check-in/out times)", {
+            "find": "attendance",
+            "filter": {"check_in_time": today_range},
+            "projection": {"_id": 0, "employee_id": 1, "check_in_time": 1, "check_out_time": 1},
+        }),
+        ("check-in upsert on (employee_id, attendance_day)", {
+            "update": "attendance",
+            "updates": [{
+                "q": {"employee_id": employee_id, "attendance_day": today.strftime("%Y-%m-%d")},
+                "u": {"$setOnInsert": {"employee_id": employee_id}},
+                "upsert": True,
+            }],
+        }),
+        ("check-out $max on (employee_id, check_in_time range)", {
+            "update": "attendance",
+            "updates": [{
+                "q": {"employee_id": employee_id, "check_in_time": today_range},
+                "u": {"$max": {"check_out_time": today}},
+            }],
+        }),
+        ("employee lookup by employee_id", {
+            "find": "employees",
+            "filter": {"employee_id": employee_id},
+            "limit": 1,
+        }),
+        ("employee directory delta (updated_at)", {
+            "find": "employees",
+            "filter": {"updated_at": {"$gt": today}},
+        }),
+        ("attendance export resumed after a key", {
+            "find": "attendance",
+            "filter": {"$and": [
+                {"check_in_time": {"$gte": today - timedelta(days=30), "$lt": tomorrow}},
+                {"$or": [
+                    {"check_in_time": {"$gt": today}},
+                    {"check_in_time": today, "_id": {"$gt": ObjectId.from_datetime(today)}},
+                ]},
+            ]},
+            "sort": {"check_in_time": 1, "_id": 1},
+        }),
+        ("timesheet events for a month", {
+            "find": "attendance",
+            "filter": {"check_in_time": {"$gte": today - timedelta(days=30), "$lt": tomorrow}},
+            "projection": {"_id": 0, "employee_id": 1, "check_in_time": 1, "check_out_time": 1},
+        }),
+    ]
+
+
+def _plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _plan_stages(value)
+
+
+def audit_query_plans(db):
+    """explain() every query shape; returns the ones that scan a collection"""
+    failed = []
+    for description, command in query_shapes(db):
+        explain = db.command("explain", command, verbosity="queryPlanner")
+        stages = list(_plan_stages(explain["queryPlanner"]["winningPlan"]))
+        if "COLLSCAN" in stages:
+            print(f"❌ COLLSCAN: {description}")
+            failed.append(description)
+        else:
+            print(f"✅ {' -> '.join(reversed(stages))}: {description}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and verify the attendance database indexes.")
+    parser.add_argument("--check", action="store_true", help="only verify indexes and query plans, create nothing")
+    args = parser.parse_args()
+
+    client = None
+    try:
+        client = pymongo.MongoClient(MONGO_URI)
+        db = client[DB_NAME]
+
+        failed = []
+        if not args.check:
+            print("Creating indexes...")
+            failed += ensure_indexes(db)
+        print("Verifying indexes...")
+        failed += verify_indexes(db)
+        print("Auditing query plans...")
+        failed += audit_query_plans(db)
+    except pymongo.errors.ConnectionFailure:
+        print("❌ Error: Could not connect to MongoDB.")
+        print(f"Please ensure MongoDB is running at {MONGO_URI}")
+        return 1
+    finally:
+        if client:
+            client.close()
+
+    if failed:
+        print(f"❌ {len(failed)} check(s) failed")
+        return 1
+    print("✅ All indexes present and every query shape uses an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import os
+import threading
+
+# --- Configuration ---
+# Read from environment variables or use default values
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "2000"))
+MONGO_HEALTH_INTERVAL = float(os.getenv("MONGO_HEALTH_INTERVAL", "5"))
+# ---------------------
+
+CONNECTING = "connecting"
+ONLINE = "online"
+OFFLINE = "offline"
+
+
+class DatabaseConnection:
+    """MongoDB client that connects in the background and keeps checking.
+
+    pymongo is imported and the client created on a daemon thread with short
+    server selection/connect timeouts, so callers never block on an
+    unreachable server. The thread pings every ``health_interval`` seconds;
+    pymongo reconnects by itself and the ping notices when it has.
+    ``on_state(state)`` is called from that thread whenever the state
+    changes, and ``state`` only moves on once the callback has returned, so
+    anything it sets up is ready by the time ``connected`` is True. If the
+    callback raises a database error the state is left unchanged and the
+    callback runs again after the next ping.
+    """
+
+    def __init__(self, uri, db_name, on_state=None, timeout_ms=MONGO_CONNECT_TIMEOUT_MS,
+                 health_interval=MONGO_HEALTH_INTERVAL):
+        self.uri = uri
+        self.db_name = db_name
+        self.on_state = on_state
+        self.timeout_ms = timeout_ms
+        self.health_interval = health_interval
+        self.state = CONNECTING
+        self.last_error = None
+        self.client = None
+        self.db = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def connected(self):
+        return self.state == ONLINE
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="mongo-connection", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self.client is not None:
+            self.client.close()
+
+    def _run(self):
+        import pymongo
+
+        self.client = pymongo.MongoClient(
+            self.uri,
+            serverSelectionTimeoutMS=self.timeout_ms,
+            connectTimeoutMS=self.timeout_ms,
+        )
+        self.db = self.client[self.db_name]
+        while not self._stopped.is_set():
+            try:
+                self.client.admin.command("ping")
+                state = ONLINE
+            except pymongo.errors.PyMongoError as e:
+                self.last_error = e
+                state = OFFLINE
+            if state != self.state:
+                try:
+                    if self.on_state is not None:
+                        self.on_state(state)
+                    self.state = state
+                except pymongo.errors.PyMongoError as e:
+                    # Lost the server mid-setup; the next ping retries it
+                    self.last_error = e
+                    print(f"Database went away while connecting: {e}")
+            self._stopped.wait(self.health_interval)
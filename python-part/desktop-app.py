@@ -1,15 +1,16 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import cv2
-from PIL import Image, ImageTk
 import threading
 import time
-import json
-from pyzbar import pyzbar
-import pymongo
-from datetime import datetime, timedelta
-import winsound
+from datetime import datetime
 import os
+from db_connection import CONNECTING, OFFLINE, ONLINE, DatabaseConnection
+from metrics import configure_from_env, metrics
+
+# OpenCV, pyzbar, PIL and pymongo take most of a second to import, so they
+# load on background threads (see preload_modules and DatabaseConnection)
+# and the modules that need them are imported where they are used.
 
 class AttendanceApp:
     def __init__(self):
@@ -22,31 +23,75 @@ class AttendanceApp:
         self.mongo_uri = os.getenv("MONGO_URI")
         self.db_name = os.getenv("DB_NAME")
         
-        # MongoDB connection
-        try:
-            self.client = pymongo.MongoClient(self.mongo_uri)
-            self.db = self.client[self.db_name]
-            self.employees_collection = self.db["employees"]
-            self.attendance_collection = self.db["attendance"]
-            
-            # Test connection
-            self.client.server_info()
-            self.db_connected = True
-        except Exception as e:
-            self.db_connected = False
-            messagebox.showerror("Database Error", f"Could not connect to MongoDB: {str(e)}")
+        # Lookups, dedup and journaled writes; created once MongoDB answers
+        self.attendance_service = None
+        self.recent_feed = None
+        self.recent_feed_wakeup = threading.Event()
+        
+        # MongoDB connection, established in the background with short timeouts
+        self.connection = DatabaseConnection(self.mongo_uri, self.db_name, on_state=self.on_db_state)
         
         # Camera setup
         self.camera_index = 0
         self.camera_available = False
         
         # State variables
-        self.current_frame = None
-        self.last_qr_time = 0
-        self.qr_cooldown = 3  # 3 seconds between QR scans
+        self.pipeline = None
+        self.preview = None
+        self.scanner = None
+        self.scan_queue = None
+        self.calibration = None
+        self.qr_cooldown = 3  # seconds a badge must be out of view before it scans again
         
         self.setup_ui()
+        # Per-stage processed/dropped frame counters in /metrics and the JSON dumps
+        metrics.register("pipeline", self.get_pipeline_stats)
+        self.connection.start()
+        self.start_recent_feed()
+        threading.Thread(target=self.preload_modules, daemon=True).start()
+
+    @property
+    def db_connected(self):
+        return self.connection.connected
+
+    def preload_modules(self):
+        """Import the vision stack off the UI thread, then set up the camera"""
+        import camera_discovery, motion, pipeline, preview, qr_decode  # noqa: F401
         self.root.after(0, self.setup_camera)
+
+    def on_db_state(self, state):
+        """Connection thread: bring the attendance service up, then update the UI"""
+        if self.attendance_service is None:
+            # Built exactly once, journal-only; if loading the database state
+            # below fails, DatabaseConnection retries only that part
+            self.create_attendance_service()
+        if state == ONLINE:
+            self.attendance_service.on_connected()
+            self.root.after(0, self.refresh_recent_attendance)
+        else:
+            self.attendance_service.on_disconnected()
+        self.root.after(0, self.show_db_state, state)
+
+    def create_attendance_service(self):
+        from attendance_service import AttendanceService
+        from recent_feed import RecentAttendanceFeed
+        
+        service = AttendanceService(
+            self.connection.db,
+            on_flushed=lambda count: self.recent_feed_wakeup.set(),
+        )
+        service.start(connected=False)
+        # Recent check-ins from every kiosk, patched into the view incrementally.
+        # They also reach today's set, so a scan here after someone entered
+        # through another kiosk counts as their check-out.
+        self.recent_feed = RecentAttendanceFeed(self.connection.db["attendance"], on_records=service.today.observe)
+        self.attendance_service = service
+
+    def show_db_state(self, state):
+        if state == ONLINE:
+            self.db_label.configure(text="Database: online", foreground="green")
+        elif state == OFFLINE:
+            self.db_label.configure(text="Database: offline, retrying...", foreground="red")
         
     def setup_ui(self):
         # Main container
@@ -90,6 +135,9 @@ class AttendanceApp:
         self.status_label = ttk.Label(status_frame, text="Ready - Please scan QR code",  font=("Arial", 12), foreground="blue")
         self.status_label.pack()
         
+        self.db_label = ttk.Label(status_frame, text="Database: connecting...", font=("Arial", 10), foreground="orange")
+        self.db_label.pack()
+        
         # Employee info display
         employee_frame = ttk.LabelFrame(info_frame, text="Last Scanned Employee", padding="10")
         employee_frame.pack(fill=tk.X, pady=(0, 10))
@@ -140,99 +188,67 @@ class AttendanceApp:
         self.refresh_recent_attendance()
         
     def start_camera_thread(self):
-        self.camera_thread = threading.Thread(target=self.camera_loop, daemon=True)
-        self.camera_thread.start()
-        
-    def camera_loop(self):
-        while True:
-            if not self.camera_available:
-                break
-                
-            ret, frame = self.cap.read()
-            if ret:
-                self.current_frame = frame.copy()
-                
-                # Detect QR codes
-                self.detect_qr_code(frame)
-                
-                # Add overlay text
-                cv2.putText(frame, "Scan QR Code Here", (10, 30), cv2.FONT_HERSHEY_COMPLEX_SMALL, 1, (0, 0, 0), 1)
-                
-                # Convert frame for display
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frame_pil = Image.fromarray(frame_rgb)
-                frame_tk = ImageTk.PhotoImage(frame_pil.resize((480, 360)))
-                
-                # Update UI in main thread
-                self.root.after(0, self.update_camera_display, frame_tk)
-                
-            time.sleep(0.03)  # ~30 FPS
-            
-    def update_camera_display(self, frame_tk):
-        if hasattr(self, 'camera_label'):
-            self.camera_label.configure(image=frame_tk)
-            self.camera_label.image = frame_tk
-        
+        """Start the capture -> decode -> render pipeline for the current camera"""
+        from motion import create_motion_gate
+        from pipeline import FramePipeline
+        from preview import PREVIEW_FPS
+        
+        self.stop_camera_thread()
+        # Idles at MOTION_IDLE_FPS without decoding while nobody is in front of the kiosk
+        self.pipeline = FramePipeline(
+            self.cap,
+            decode=self.detect_qr_code,
+            render=self.preview.render,
+            render_fps=PREVIEW_FPS,
+            motion=create_motion_gate(),
+        )
+        self.pipeline.start()
+
+    def stop_camera_thread(self):
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+
+    def get_pipeline_stats(self):
+        """Processed/dropped frame counters per pipeline stage"""
+        if self.pipeline is None:
+            return {}
+        return self.pipeline.stats()
+
     def detect_qr_code(self, frame):
-        # Check cooldown
-        current_time = time.time()
-        if current_time - self.last_qr_time < self.qr_cooldown:
-            return
-            
-        # Decode QR codes
-        qr_codes = pyzbar.decode(frame)
-        
-        for qr_code in qr_codes:
-            try:
-                # Extract QR code data
-                qr_data = qr_code.data.decode('utf-8')
-                employee_data = json.loads(qr_data)
-                employee_id = employee_data.get('employee_id')
-                
-                if employee_id:
-                    self.last_qr_time = current_time
-                    self.process_qr_detection(employee_id)
-                    break
-                    
-            except (json.JSONDecodeError, KeyError):
-                continue
+        # Decode (downscaled/ROI fast path unless QR_DECODE_MODE=full), parse
+        # every badge in the frame and queue new ones for process_qr_detection
+        calibration = self.calibration
+        if calibration is not None:
+            calibration.offer(frame)
+        self.scanner.scan(frame)
                 
     def process_qr_detection(self, employee_id):
-        if not self.db_connected:
-            self.update_status("Database not connected!", "red")
+        from attendance_service import CHECKED_OUT, DUPLICATE, MARKED
+        
+        # Once the service exists check-ins are journaled even while offline
+        if self.attendance_service is None:
+            self.root.after(0, self.update_status, "Database not connected!", "red")
             return
         try:
-            # Fetch employee from database
-            employee = self.employees_collection.find_one({"employee_id": employee_id})
-            if employee:
-                # Check if attendance already marked today
-                today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                tomorrow = today + timedelta(days=1)
-                already_marked = self.attendance_collection.find_one({
-                    "employee_id": employee['employee_id'],
-                    "check_in_time": {"$gte": today, "$lt": tomorrow}
-                })
-                if already_marked:
-                    self.root.after(0, self.update_status, f"⚠️ Attendance already marked for {employee['name']} today", "orange")
-                    return
-                # Mark attendance
-                attendance_record = {
-                    "employee_id": employee['employee_id'],
-                    "name": employee['name'],
-                    "check_in_time": datetime.now(),
-                    "verification_method": "qr_only"
-                }
-                # Insert into database
-                self.attendance_collection.insert_one(attendance_record)
+            result = self.attendance_service.check_in(employee_id, "qr_only")
+            employee = result.employee
+            if result.status == DUPLICATE:
+                self.root.after(0, self.update_status, f"⚠️ Attendance already marked for {employee['name']} today", "orange")
+            elif result.status == MARKED:
                 # Update UI
-                self.root.after(0, self.update_employee_info, employee, attendance_record["check_in_time"])
+                self.root.after(0, self.add_recent_record, result.record)
+                self.root.after(0, self.update_employee_info, employee, result.record["check_in_time"])
                 self.root.after(0, self.update_status, f"✓ Attendance marked for {employee['name']}", "green")
-                self.root.after(0, self.refresh_recent_attendance)
                 # Play success sound (if available)
                 try:
+                    import winsound
                     winsound.Beep(1000, 200)  # 1000 Hz for 200ms
                 except:
                     pass
+            elif result.status == CHECKED_OUT:
+                self.root.after(0, self.update_employee_info, employee, result.record["check_out_time"])
+                self.root.after(0, self.update_status, f"✓ Check-out recorded for {employee['name']}", "green")
             else:
                 self.root.after(0, self.update_status, "❌ Employee not found in database", "red")
         except Exception as e:
@@ -248,62 +264,84 @@ class AttendanceApp:
         self.status_label.configure(text=message, foreground=color)
         
     def refresh_recent_attendance(self):
-        if not self.db_connected:
+        """Reload the recent attendance panel from the database"""
+        if not self.db_connected or self.recent_feed is None:
             return
             
         try:
-            # Get today's attendance
-            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            tomorrow = today + timedelta(days=1)
-            
-            recent_records = list(self.attendance_collection.find({
-                "check_in_time": {"$gte": today, "$lt": tomorrow}
-            }).sort("check_in_time", -1).limit(10))
-            
-            # Clear existing items
-            for item in self.recent_tree.get_children():
-                self.recent_tree.delete(item)
-            
-            # Add new items
-            for record in recent_records:
-                check_in_time = record["check_in_time"].strftime("%H:%M:%S")
-                self.recent_tree.insert("", "end", values=(record["name"], check_in_time))
-                
+            self.apply_recent_changes(self.recent_feed.reload())
         except Exception as e:
             print(f"Error refreshing recent attendance: {e}")
             
+    def start_recent_feed(self, interval=5.0):
+        """Poll for check-ins from other kiosks in the background"""
+        def poll():
+            while True:
+                # Woken early when this kiosk's writer uploads records
+                self.recent_feed_wakeup.wait(interval)
+                self.recent_feed_wakeup.clear()
+                if not self.db_connected or self.recent_feed is None:
+                    continue
+                try:
+                    with metrics.time("recent_poll"):
+                        changes = self.recent_feed.poll()
+                    if changes:
+                        self.root.after(0, self.apply_recent_changes, changes)
+                except Exception as e:
+                    metrics.inc("db_errors")
+                    print(f"Error polling recent attendance: {e}")
+        
+        threading.Thread(target=poll, daemon=True).start()
+        
+    def add_recent_record(self, record):
+        """UI thread: show a check-in accepted here before it reaches the database"""
+        self.apply_recent_changes(self.recent_feed.add(record))
+
+    def apply_recent_changes(self, changes):
+        """Patch the recent attendance Treeview with feed operations"""
+        with metrics.time("ui_update"):
+            self._apply_recent_changes(changes)
+
+    def _apply_recent_changes(self, changes):
+        for change in changes:
+            if change[0] == "clear":
+                self.recent_tree.delete(*self.recent_tree.get_children())
+            elif change[0] == "delete":
+                if self.recent_tree.exists(change[1]):
+                    self.recent_tree.delete(change[1])
+            elif change[0] == "insert":
+                _, index, key, record = change
+                # Poll results are computed off the UI thread and can land
+                # after a later local add; the row may already be shown
+                if self.recent_tree.exists(key):
+                    self.recent_tree.move(key, "", index)
+                    continue
+                check_in_time = record["check_in_time"].strftime("%H:%M:%S")
+                self.recent_tree.insert("", index, iid=key, values=(record["name"], check_in_time))
+            
     def manual_entry(self):
-        if not self.db_connected:
+        from attendance_service import CHECKED_OUT, DUPLICATE, MARKED
+        
+        if self.attendance_service is None:
             messagebox.showerror("Error", "Database not connected!")
             return
         employee_id = simpledialog.askstring("Manual Entry", "Enter Employee ID:")
         if employee_id:
             try:
-                employee = self.employees_collection.find_one({"employee_id": employee_id})
-                if employee:
-                    # Check if attendance already marked today
-                    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                    tomorrow = today + timedelta(days=1)
-                    already_marked = self.attendance_collection.find_one({
-                        "employee_id": employee['employee_id'],
-                        "check_in_time": {"$gte": today, "$lt": tomorrow}
-                    })
-                    if already_marked:
-                        messagebox.showinfo("Already Marked", f"Attendance already marked for {employee['name']} today.")
-                        return
-                    # Mark attendance
-                    attendance_record = {
-                        "employee_id": employee['employee_id'],
-                        "name": employee['name'],
-                        "check_in_time": datetime.now(),
-                        "verification_method": "manual"
-                    }
-                    self.attendance_collection.insert_one(attendance_record)
+                result = self.attendance_service.check_in(employee_id, "manual")
+                employee = result.employee
+                if result.status == DUPLICATE:
+                    messagebox.showinfo("Already Marked", f"Attendance already marked for {employee['name']} today.")
+                elif result.status == MARKED:
                     # Update UI
-                    self.update_employee_info(employee, attendance_record["check_in_time"])
+                    self.add_recent_record(result.record)
+                    self.update_employee_info(employee, result.record["check_in_time"])
                     self.update_status(f"✓ Manual attendance marked for {employee['name']}", "green")
-                    self.refresh_recent_attendance()
                     messagebox.showinfo("Success", f"Manual attendance marked for {employee['name']}")
+                elif result.status == CHECKED_OUT:
+                    self.update_employee_info(employee, result.record["check_out_time"])
+                    self.update_status(f"✓ Manual check-out recorded for {employee['name']}", "green")
+                    messagebox.showinfo("Success", f"Check-out recorded for {employee['name']}")
                 else:
                     messagebox.showerror("Error", "Employee not found")
             except Exception as e:
@@ -313,39 +351,55 @@ class AttendanceApp:
         if not self.db_connected:
             messagebox.showerror("Error", "Database not connected!")
             return
+        from rollups import format_breakdown
             
         try:
-            # Get today's stats
-            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            tomorrow = today + timedelta(days=1)
+            # Get today's stats from the daily rollup (one document read)
+            today = datetime.now()
+            stats = self.attendance_service.rollups.day_stats(today)
             
-            total_employees = self.employees_collection.count_documents({})
-            today_attendance = self.attendance_collection.count_documents({
-                "check_in_time": {"$gte": today, "$lt": tomorrow}
-            })
+            total_employees = stats["headcount"]
+            today_attendance = stats["present"]
             
             attendance_rate = (today_attendance / total_employees * 100) if total_employees > 0 else 0
             
             stats_message = f"""Today's Attendance Statistics:\nTotal Employees: {total_employees}\nPresent Today: {today_attendance}\nAttendance Rate: {attendance_rate:.1f}%\nDate: {today.strftime('%Y-%m-%d')}"""
+            breakdown = format_breakdown(stats)
+            if breakdown:
+                stats_message += "\n\n" + breakdown
             messagebox.showinfo("Today's Statistics", stats_message)
             
         except Exception as e:
             messagebox.showerror("Error", f"Error fetching statistics: {str(e)}")
             
     def get_available_cameras(self):
-        """Get a list of available camera devices"""
-        available_cameras = []
-        for i in range(10):  # Check first 10 indexes
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                ret, _ = cap.read()
-                if ret:
-                    available_cameras.append(i)
-                cap.release()
-        return available_cameras
+        """Get a list of available camera devices (probed concurrently)"""
+        from camera_discovery import discover_cameras
+        return discover_cameras()
 
     def setup_camera(self):
         """Setup camera with proper error handling and camera selection"""
+        from camera_discovery import open_profiled_camera
+        from pipeline import ScanQueue
+        from qr_decode import QRScanner
+        
+        # Decoding only queues scans; check-ins and UI updates run on the queue's thread
+        self.scan_queue = ScanQueue(self.process_qr_detection).start()
+        self.scanner = QRScanner(self.scan_queue.submit, cooldown=self.qr_cooldown, decode=self.create_qr_decoder())
+        # Fast path: reopen the last known-good camera without probing
+        opened = open_profiled_camera()
+        if opened:
+            self.cap, profile = opened
+            self.camera_index = profile["index"]
+            self.camera_backend = profile["backend"]
+            self.camera_resolution = profile["resolution"]
+            self.camera_available = True
+            self.available_cameras = [self.camera_index]
+            self.show_camera_feed()
+            # Find the other cameras for switch_camera without delaying startup
+            threading.Thread(target=self.discover_other_cameras, daemon=True).start()
+            return
+        
         self.available_cameras = self.get_available_cameras()
         
         if not self.available_cameras:
@@ -359,9 +413,57 @@ class AttendanceApp:
             # Single camera case
             self.camera_index = self.available_cameras[0]
             self.initialize_camera()
+            if self.camera_available:
+                self.show_camera_feed()
+
+    def create_qr_decoder(self):
+        """Saved or pinned QR backend; else the first installed one until live calibration picks one"""
+        from qr_backends import first_backend
+        from qr_decode import (QR_BACKEND, QR_DECODE_MODE, LiveCalibration, create_decoder,
+                               create_fast_decoder, load_backend_choice)
+        
+        if QR_DECODE_MODE == "full" or QR_BACKEND != "auto":
+            return create_decoder()
+        choice = load_backend_choice()
+        if choice:
+            return create_fast_decoder(*choice).decode
+        # Calibrate on the first frames the decode stage sees, without delaying the camera
+        self.calibration = LiveCalibration(self.use_qr_backends)
+        return create_fast_decoder(first_backend()).decode
+
+    def use_qr_backends(self, backend, fallbacks):
+        """Calibration thread: swap the calibrated decoder into the running scanner"""
+        from qr_decode import create_fast_decoder
+        
+        self.scanner.decode = create_fast_decoder(backend, fallbacks).decode
+        self.calibration = None
+
+    def discover_other_cameras(self):
+        from camera_discovery import discover_cameras
+        others = discover_cameras(exclude=(self.camera_index,))
+        self.available_cameras = sorted(set(self.available_cameras) | set(others))
+
+    def show_camera_feed(self):
+        """Swap the placeholder for the live feed and start the pipeline"""
+        from preview import PreviewRenderer
+        
+        if self.preview is None:
+            self.preview = PreviewRenderer(self.camera_label, (480, 360), overlay="Scan QR Code Here")
+        # Remove the 'no camera' label if it exists
+        if hasattr(self, 'no_camera_label'):
+            self.no_camera_label.destroy()
+            del self.no_camera_label
+        # Pack the camera label if not already packed
+        if not self.camera_label.winfo_ismapped():
+            self.camera_label.pack()
+        if self.camera_available:
+            self.start_camera_thread()
 
     def show_camera_selection_window(self):
         """Show a window with live video previews for all available cameras. User selects by clicking a preview."""
+        import cv2
+        from preview import PREVIEW_FPS, PreviewRenderer
+        
         camera_dialog = tk.Toplevel(self.root)
         camera_dialog.title("Select Camera")
         camera_dialog.geometry("700x400")
@@ -386,15 +488,8 @@ class AttendanceApp:
             camera_dialog.destroy()
             self.camera_index = cam_idx
             self.initialize_camera()
-            # Remove the 'no camera' label if it exists
-            if hasattr(self, 'no_camera_label'):
-                self.no_camera_label.destroy()
-                del self.no_camera_label
-            # Pack the camera label if not already packed
-            if not self.camera_label.winfo_ismapped():
-                self.camera_label.pack()
             if self.camera_available:
-                self.start_camera_thread()
+                self.show_camera_feed()
         
         def make_preview(cam_idx, row, col):
             cap = cv2.VideoCapture(cam_idx)
@@ -409,20 +504,14 @@ class AttendanceApp:
             )
             label.grid(row=row, column=col, padx=10, pady=10)
             running = [True]
+            preview = PreviewRenderer(label, (200, 150))
             def update():
                 while running[0]:
                     ret, frame = cap.read()
                     if ret:
-                        frame = cv2.resize(frame, (200, 150))
-                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        img = Image.fromarray(frame_rgb)
-                        # Schedule the GUI update in the main thread
-                        def update_label():
-                            imgtk = ImageTk.PhotoImage(img)
-                            label.configure(image=imgtk)
-                            label.image = imgtk
-                        label.after(0, update_label)
-                    time.sleep(0.05)
+                        # Pasted into one PhotoImage on the main thread
+                        preview.render(frame)
+                    time.sleep(1.0 / PREVIEW_FPS)
             thread = threading.Thread(target=update, daemon=True)
             thread.start()
             label.bind("<Button-1>", lambda e, idx=cam_idx: on_select(idx))
@@ -443,33 +532,15 @@ class AttendanceApp:
 
     def initialize_camera(self):
         """Initialize the selected camera"""
+        from camera_discovery import CAMERA_BACKEND, open_camera, save_profile
+        
         try:
-            self.cap = cv2.VideoCapture(self.camera_index)
-            
-            # Try to set HD resolution
-            resolutions = [(1920, 1080), (1280, 720), (640, 480)]
-            
-            for width, height in resolutions:
-                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-                
-                # Check if resolution was actually set
-                actual_width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-                actual_height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-                
-                if actual_width == width and actual_height == height:
-                    break
-            
-            # Test camera capture
-            ret, frame = self.cap.read()
-            if not ret:
-                raise Exception("Could not read frame from camera")
-                
+            # Opens with a short driver queue and the best supported resolution
+            self.camera_backend = CAMERA_BACKEND
+            self.cap, self.camera_resolution = open_camera(self.camera_index, self.camera_backend)
             self.camera_available = True
-            self.camera_resolution = (
-                int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            )
+            # Remember this camera so the next start can open it directly
+            save_profile(self.camera_index, self.camera_backend, self.camera_resolution)
             
         except Exception as e:
             self.camera_available = False
@@ -488,6 +559,7 @@ class AttendanceApp:
     def switch_camera(self):
         """Switch to next available camera"""
         if self.camera_available:
+            self.stop_camera_thread()
             self.cap.release()
             
         # Get next camera index
@@ -497,16 +569,56 @@ class AttendanceApp:
         
         self.initialize_camera()
         if self.camera_available:
+            self.start_camera_thread()
             messagebox.showinfo("Camera Switch", f"Switched to Camera {self.camera_index}")
         
     def run(self):
         try:
             self.root.mainloop()
         finally:
+            self.stop_camera_thread()
+            if self.scan_queue is not None:
+                self.scan_queue.stop()
+            if self.attendance_service is not None:
+                self.attendance_service.stop()
+            self.connection.stop()
             if self.camera_available and hasattr(self, 'cap'):
                 self.cap.release()
-                cv2.destroyAllWindows()
+
+def probe_startup(app, timeout=15.0):
+    """Print when the window is up and when the database state settles, then quit.
+
+    Used by benchmarks/coldstart_bench.py; times are time.time() values.
+    """
+    deadline = time.monotonic() + timeout
+
+    def window_ready():
+        print(f"window {time.time():.6f}", flush=True)
+        wait_for_db()
+
+    def wait_for_db():
+        if app.connection.state != CONNECTING or time.monotonic() > deadline:
+            print(f"db {app.connection.state} {time.time():.6f}", flush=True)
+            app.root.destroy()
+            return
+        app.root.after(10, wait_for_db)
+
+    app.root.after(0, lambda: app.root.after_idle(window_ready))
 
 if __name__ == "__main__":
-    app = AttendanceApp()
-    app.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Codtecs attendance kiosk.")
+    parser.add_argument("--headless", metavar="CONFIG", help="run the multi-camera gate server from a JSON config instead of the window")
+    parser.add_argument("--dry-run", action="store_true", help="with --headless: don't connect to MongoDB, just print scans")
+    parser.add_argument("--startup-probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.headless:
+        from gate_server import run
+        run(args.headless, dry_run=args.dry_run)
+    else:
+        # Opt-in: METRICS_PORT serves /metrics, METRICS_JSON_PATH dumps snapshots
+        configure_from_env()
+        app = AttendanceApp()
+        if args.startup_probe:
+            probe_startup(app)
+        app.run()
\ No newline at end of file
@@ -0,0 +1,216 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import pymongo
+
+from metrics import metrics
+
+# --- Configuration ---
+EMPLOYEE_CACHE_MAX_ENTRIES = int(os.getenv("EMPLOYEE_CACHE_MAX_ENTRIES", "50000"))
+EMPLOYEE_UPDATED_FIELD = os.getenv("EMPLOYEE_UPDATED_FIELD", "updated_at")
+EMPLOYEE_REFRESH_INTERVAL = float(os.getenv("EMPLOYEE_REFRESH_INTERVAL", "60"))
+EMPLOYEE_FULL_RELOAD_INTERVAL = float(os.getenv("EMPLOYEE_FULL_RELOAD_INTERVAL", "21600"))
+# ---------------------
+
+PROJECTION = {"_id": 0, "employee_id": 1, "name": 1, "department": 1}
+
+
+class EmployeeDirectory:
+    """In-memory employee lookup table kept in sync with MongoDB.
+
+    A projected snapshot of the employees collection is loaded up front so
+    scans resolve employees without a database round-trip. Changes are
+    picked up from a change stream when the deployment supports one,
+    otherwise by polling for documents whose ``EMPLOYEE_UPDATED_FIELD`` is
+    newer than the last refresh. A periodic full reload catches deletions.
+
+    At most ``max_entries`` employees are kept; beyond that the directory
+    behaves as an LRU cache in front of ``find_one``.
+
+    With a ``snapshot`` store (the attendance journal) every full load is
+    saved locally and ``restore`` brings it back, so a process started
+    while MongoDB is down still resolves badges. While ``online`` is False
+    misses are answered from memory instead of waiting on ``find_one``.
+    """
+
+    def __init__(self, collection, max_entries=EMPLOYEE_CACHE_MAX_ENTRIES,
+                 refresh_interval=EMPLOYEE_REFRESH_INTERVAL,
+                 full_reload_interval=EMPLOYEE_FULL_RELOAD_INTERVAL,
+                 updated_field=EMPLOYEE_UPDATED_FIELD, snapshot=None):
+        self.collection = collection
+        self.snapshot = snapshot
+        self.online = True
+        self.max_entries = max_entries
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self.updated_field = updated_field
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_updated = None
+        self._last_full_reload = 0
+        self._running = False
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self):
+        """Replace the cache with a fresh snapshot of the collection"""
+        entries = OrderedDict()
+        last_updated = None
+        projection = dict(PROJECTION, **{self.updated_field: 1})
+        for doc in self.collection.find({}, projection):
+            if len(entries) >= self.max_entries:
+                break
+            entries[doc["employee_id"]] = self._entry(doc)
+            updated = doc.get(self.updated_field)
+            if isinstance(updated, datetime) and (last_updated is None or updated > last_updated):
+                last_updated = updated
+        with self._lock:
+            self._entries = entries
+            self._last_updated = last_updated
+        self._last_full_reload = time.monotonic()
+        self.online = True
+        if self.snapshot is not None:
+            try:
+                self.snapshot.save_employees(list(entries.values()))
+            except sqlite3.Error as e:
+                print(f"Could not save the employee directory snapshot: {e}")
+
+    def restore(self):
+        """Serve lookups from the snapshot saved by the last full load, if any"""
+        if self.snapshot is None:
+            return
+        try:
+            employees = self.snapshot.employees()
+        except sqlite3.Error as e:
+            print(f"Could not read the employee directory snapshot: {e}")
+            return
+        entries = OrderedDict((employee["employee_id"], self._entry(employee)) for employee in employees)
+        with self._lock:
+            self._entries = entries
+
+    def get(self, employee_id):
+        """Return {employee_id, name, department} or None if unknown"""
+        with self._lock:
+            entry = self._entries.get(employee_id)
+            if entry is not None:
+                self._entries.move_to_end(employee_id)
+                self.hits += 1
+                metrics.inc("employee_cache_hits")
+                return entry
+        self.misses += 1
+        metrics.inc("employee_cache_misses")
+        if not self.online:
+            # find_one would only wait out the server selection timeout
+            return None
+
+        # The snapshot can miss employees added since the last refresh (or
+        # evicted ones), so confirm with the database before rejecting a badge
+        try:
+            with metrics.time("employee_find_one"):
+                doc = self.collection.find_one({"employee_id": employee_id}, PROJECTION)
+        except pymongo.errors.PyMongoError:
+            metrics.inc("db_errors")
+            raise
+        if doc is None:
+            return None
+        entry = self._entry(doc)
+        self._store(entry)
+        return entry
+
+    def start(self):
+        """Load the snapshot and keep it fresh in a background thread"""
+        if self._running:
+            return
+        self.load()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="employee-directory", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    def _store(self, entry):
+        with self._lock:
+            self._entries[entry["employee_id"]] = entry
+            self._entries.move_to_end(entry["employee_id"])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _entry(doc):
+        return {
+            "employee_id": doc["employee_id"],
+            "name": doc.get("name"),
+            "department": doc.get("department"),
+        }
+
+    def _run(self):
+        while self._running:
+            try:
+                self._watch()
+            except pymongo.errors.OperationFailure:
+                # Standalone servers have no change streams; poll instead
+                self._poll()
+            except pymongo.errors.PyMongoError as e:
+                metrics.inc("db_errors")
+                print(f"Employee directory refresh failed: {e}")
+                time.sleep(self.refresh_interval)
+                # Changes may have been missed while the stream was down
+                try:
+                    self.load()
+                except pymongo.errors.PyMongoError:
+                    pass
+
+    def _watch(self):
+        with self.collection.watch(full_document="updateLookup", max_await_time_ms=1000) as stream:
+            while self._running:
+                change = stream.try_next()
+                if change is None:
+                    self._maybe_full_reload()
+                    continue
+                operation = change["operationType"]
+                if operation in ("insert", "update", "replace") and change.get("fullDocument"):
+                    self._store(self._entry(change["fullDocument"]))
+                elif operation == "delete":
+                    # Delete events only carry _id, so rebuild from scratch
+                    self.load()
+                elif operation in ("drop", "rename", "invalidate"):
+                    self.load()
+                    return
+
+    def _poll(self):
+        while self._running:
+            time.sleep(self.refresh_interval)
+            try:
+                if not self._maybe_full_reload():
+                    self._refresh_delta()
+            except pymongo.errors.PyMongoError as e:
+                metrics.inc("db_errors")
+                print(f"Employee directory refresh failed: {e}")
+
+    def _refresh_delta(self):
+        if self._last_updated is None:
+            # No employee carries the updated field, so there is nothing to
+            # diff against; reload everything each refresh instead
+            self.load()
+            return
+        projection = dict(PROJECTION, **{self.updated_field: 1})
+        for doc in self.collection.find({self.updated_field: {"$gt": self._last_updated}}, projection):
+            self._store(self._entry(doc))
+            updated = doc.get(self.updated_field)
+            if isinstance(updated, datetime) and updated > self._last_updated:
+                self._last_updated = updated
+
+    def _maybe_full_reload(self):
+        if time.monotonic() - self._last_full_reload < self.full_reload_interval:
+            return False
+        self.load()
+        return True
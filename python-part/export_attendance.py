@@ -0,0 +1,299 @@
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import pymongo
+from bson import ObjectId
+
+# --- Configuration ---
+# Read from environment variables or use default values
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DB_NAME = os.getenv("DB_NAME", "attendance_system")
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+# Rows per Parquet part file; a resumed export redoes at most one part
+EXPORT_PARQUET_PART_ROWS = int(os.getenv("EXPORT_PARQUET_PART_ROWS", "1000000"))
+# ---------------------
+
+COLUMNS = [
+    "employee_id", "name", "department", "attendance_day", "check_in_time", "check_out_time", "verification_method",
+]
+PROJECTION = dict({column: 1 for column in COLUMNS}, _id=1)
+# Matches the check_in_time_id index, so the sort streams instead of buffering
+SORT = [("check_in_time", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)]
+
+
+def build_filter(db, start=None, end=None, employee_ids=None, departments=None):
+    """Attendance query for a [start, end) range and optional employee/department filters"""
+    clauses = []
+    if start or end:
+        time_range = {}
+        if start:
+            time_range["$gte"] = start
+        if end:
+            time_range["$lt"] = end
+        clauses.append({"check_in_time": time_range})
+    if employee_ids:
+        clauses.append({"employee_id": {"$in": list(employee_ids)}})
+    if departments:
+        # Older records have no department; match those by the employee's current one
+        members = db["employees"].distinct("employee_id", {"department": {"$in": list(departments)}})
+        clauses.append({"$or": [
+            {"department": {"$in": list(departments)}},
+            {"department": {"$exists": False}, "employee_id": {"$in": members}},
+        ]})
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def after(position):
+    """Records strictly after a (check_in_time, _id) key"""
+    check_in_time, _id = position
+    return {"$or": [
+        {"check_in_time": {"$gt": check_in_time}},
+        {"check_in_time": check_in_time, "_id": {"$gt": _id}},
+    ]}
+
+
+def iter_batches(collection, query, position=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield lists of at most batch_size projected records in (check_in_time, _id) order"""
+    if position is not None:
+        query = {"$and": [query, after(position)]} if query else after(position)
+    cursor = collection.find(query, PROJECTION, sort=SORT, batch_size=batch_size)
+    batch = []
+    try:
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        cursor.close()
+
+
+class CsvExport:
+    """Appends rows to one CSV file; every batch is a resumable checkpoint"""
+
+    def __init__(self, path, resume_state=None):
+        self.path = path
+        if resume_state is not None:
+            # Drop anything written after the last checkpoint
+            self.file = open(path, "r+", newline="", encoding="utf-8")
+            self.file.truncate(resume_state["offset"])
+            self.file.seek(resume_state["offset"])
+            self.writer = csv.writer(self.file)
+        else:
+            self.file = open(path, "w", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(COLUMNS)
+
+    def write(self, batch):
+        self.writer.writerows(
+            [_csv_value(doc.get(column)) for column in COLUMNS]
+            for doc in batch
+        )
+
+    def checkpoint(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {"offset": self.file.tell()}
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetExport:
+    """Writes a directory of Parquet part files, one row group per batch.
+
+    A part only becomes a checkpoint once it is closed (its footer written),
+    so resuming discards the part that was in progress and redoes it.
+    """
+
+    def __init__(self, path, resume_state=None, part_rows=EXPORT_PARQUET_PART_ROWS):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.part_rows = part_rows
+        self.schema = pa.schema([
+            ("employee_id", pa.string()),
+            ("name", pa.string()),
+            ("department", pa.string()),
+            ("attendance_day", pa.string()),
+            ("check_in_time", pa.timestamp("ms")),
+            ("check_out_time", pa.timestamp("ms")),
+            ("verification_method", pa.string()),
+        ])
+        os.makedirs(path, exist_ok=True)
+        self.parts = resume_state["parts"] if resume_state else 0
+        # Remove parts from an earlier, interrupted run
+        for name in os.listdir(path):
+            if name.startswith("part-") and name.endswith(".parquet") and int(name[5:10]) >= self.parts:
+                os.remove(os.path.join(path, name))
+        self.writer = None
+        self.rows_in_part = 0
+
+    def write(self, batch):
+        if self.writer is None:
+            part_path = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+            self.writer = self.pq.ParquetWriter(part_path, self.schema, compression="zstd")
+        columns = {column: [doc.get(column) for doc in batch] for column in COLUMNS}
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+        self.rows_in_part += len(batch)
+
+    def checkpoint(self):
+        if self.writer is None or self.rows_in_part < self.part_rows:
+            return None
+        self._close_part()
+        return {"parts": self.parts}
+
+    def _close_part(self):
+        self.writer.close()
+        self.writer = None
+        self.rows_in_part = 0
+        self.parts += 1
+
+    def close(self):
+        if self.writer is not None:
+            self._close_part()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="seconds")
+    return value
+
+
+def _state_path(output):
+    return output.rstrip("/\\") + ".export-state.json"
+
+
+def _save_state(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def export_attendance(db, output, fmt="csv", start=None, end=None, employee_ids=None, departments=None,
+                      batch_size=EXPORT_BATCH_SIZE, restart=False, progress_every=100000):
+    """Stream matching attendance to output, resuming an interrupted run of the same export.
+
+    Memory stays bounded by batch_size records. Progress is saved next to
+    the output after every checkpoint as the (check_in_time, _id) of the
+    last exported record; the state file is removed when the export ends.
+    """
+    query = build_filter(db, start, end, employee_ids, departments)
+    signature = {
+        "format": fmt,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "employee_ids": sorted(employee_ids or []),
+        "departments": sorted(departments or []),
+    }
+    state_path = _state_path(output)
+    state = None
+    if os.path.exists(state_path) and not restart:
+        with open(state_path) as f:
+            state = json.load(f)
+        if state["signature"] != signature:
+            raise ValueError(f"{state_path} belongs to a different export; pass --restart to start over")
+
+    position = None
+    rows = 0
+    if state is not None:
+        rows = state["rows"]
+        if state["position"]:
+            position = (datetime.fromisoformat(state["position"][0]), ObjectId(state["position"][1]))
+        print(f"Resuming after {rows} rows")
+
+    if fmt == "parquet":
+        sink = ParquetExport(output, state["sink"] if state else None)
+    else:
+        sink = CsvExport(output, state["sink"] if state else None)
+
+    started = time.perf_counter()
+    exported = 0
+    next_progress = progress_every
+    pending_rows = 0
+    try:
+        for batch in iter_batches(db["attendance"], query, position, batch_size):
+            sink.write(batch)
+            pending_rows += len(batch)
+            sink_state = sink.checkpoint()
+            if sink_state is not None:
+                rows += pending_rows
+                exported += pending_rows
+                pending_rows = 0
+                last = batch[-1]
+                _save_state(state_path, {
+                    "signature": signature,
+                    "rows": rows,
+                    "position": [last["check_in_time"].isoformat(), str(last["_id"])],
+                    "sink": sink_state,
+                })
+            if exported + pending_rows >= next_progress:
+                next_progress += progress_every
+                elapsed = time.perf_counter() - started
+                print(f"  {rows + pending_rows} rows ({(exported + pending_rows) / elapsed:.0f} rows/s)")
+    finally:
+        # An interrupted run may leave rows past the checkpoint; resuming discards them
+        sink.close()
+    rows += pending_rows
+    exported += pending_rows
+
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    elapsed = time.perf_counter() - started
+    return {"rows": rows, "exported": exported, "seconds": elapsed,
+            "rows_per_second": exported / elapsed if elapsed else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export attendance records for payroll.")
+    parser.add_argument("output", help="CSV file, or a directory of part files with --format parquet")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--start", help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", help="last day, YYYY-MM-DD (inclusive)")
+    parser.add_argument("--employee", action="append", dest="employees", help="employee_id; repeatable")
+    parser.add_argument("--department", action="append", dest="departments", help="department; repeatable")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress and start over")
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start, "%Y-%m-%d") if args.start else None
+    end = datetime.strptime(args.end, "%Y-%m-%d") + timedelta(days=1) if args.end else None
+
+    client = pymongo.MongoClient(MONGO_URI)
+    try:
+        result = export_attendance(
+            client[DB_NAME], args.output, args.format, start, end,
+            args.employees, args.departments, args.batch_size, args.restart,
+        )
+        print(f"✅ Exported {result['rows']} rows to {args.output}")
+        print(f"  {result['exported']} rows this run in {result['seconds']:.1f}s "
+              f"({result['rows_per_second']:.0f} rows/s)")
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+    except pymongo.errors.ConnectionFailure:
+        print("❌ Error: Could not connect to MongoDB.")
+        print(f"Please ensure MongoDB is running at {MONGO_URI}")
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrupted; run the same command again to resume")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+import argparse
+import json
+import os
+import queue
+import signal
+import threading
+import time
+
+import cv2
+
+from attendance_service import CHECKED_OUT, DUPLICATE, MARKED, UNKNOWN, AttendanceService, CheckInResult
+from db_connection import ONLINE, DatabaseConnection
+from metrics import configure_from_env, metrics
+from motion import create_motion_gate
+from pipeline import LatestFrameQueue, ScanQueue, StageStats
+from qr_decode import QRScanner
+
+# --- Configuration ---
+# Read from environment variables or use default values
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DB_NAME = os.getenv("DB_NAME", "attendance_system")
+# ---------------------
+
+
+class CameraSource:
+    """One capture loop feeding a latest-frame-wins slot.
+
+    ``source`` is a device index or a video file path. Video files are
+    played back at their recorded frame rate (and optionally looped), so a
+    recording behaves like a live camera.
+    """
+
+    def __init__(self, name, source, ready, on_scan, decode_fps=10, loop=False, scan_cooldown=3, motion=True):
+        self.name = name
+        self.source = source
+        self.loop = loop
+        # Static scenes are not decoded; live cameras also drop to the idle rate
+        self.motion = create_motion_gate() if motion else None
+        self.decode_interval = 1.0 / decode_fps if decode_fps else 0
+        self.frames = LatestFrameQueue(1, name="decode_frames")
+        # Per-badge debounce; on_scan only queues the check-in
+        self.scanner = QRScanner(lambda employee_id: on_scan(self, employee_id), cooldown=scan_cooldown)
+        self.decode_lock = threading.Lock()
+        self.capture_stats = StageStats()
+        self.decode_stats = StageStats()
+        self.finished = False
+        self._ready = ready
+        self._pending = False
+        self._pending_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    @property
+    def is_file(self):
+        return isinstance(self.source, str) and not self.source.isdigit()
+
+    def open(self):
+        source = int(self.source) if isinstance(self.source, str) and self.source.isdigit() else self.source
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open source {self.name!r} ({self.source})")
+        if not self.is_file:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def start(self):
+        self.cap = self.open()
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name=f"capture-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self.frames.close()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        self.cap.release()
+
+    def take(self):
+        """Newest frame for a decode worker, or None if it was already taken"""
+        with self._pending_lock:
+            self._pending = False
+        return self.frames.get(timeout=0)
+
+    def _capture_loop(self):
+        frame_interval = 0
+        if self.is_file:
+            fps = self.cap.get(cv2.CAP_PROP_FPS)
+            frame_interval = 1.0 / fps if fps and fps > 0 else 1.0 / 30
+        next_frame = time.monotonic()
+        next_decode = 0
+
+        while self._running:
+            with metrics.time("capture_read"):
+                ret, frame = self.cap.read()
+            if not ret:
+                if self.is_file:
+                    if not self.loop:
+                        self.finished = True
+                        break
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                self.capture_stats.dropped += 1
+                metrics.inc("capture_frames_failed")
+                time.sleep(0.01)
+                continue
+            self.capture_stats.processed += 1
+            metrics.inc("capture_frames")
+
+            now = time.monotonic()
+            static = self.motion is not None and not self.motion.update(frame, now)
+            if static:
+                if not self.is_file:
+                    time.sleep(self.motion.idle_interval)
+            # Only hand frames to the shared pool at the per-source decode rate
+            elif now >= next_decode:
+                next_decode = now + self.decode_interval
+                self.frames.put(frame)
+                with self._pending_lock:
+                    notify = not self._pending
+                    self._pending = True
+                if notify:
+                    self._ready.put(self)
+
+            if frame_interval:
+                next_frame += frame_interval
+                delay = next_frame - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame = time.monotonic()
+
+
+class GateServer:
+    """N camera sources sharing one decode pool and one attendance service.
+
+    Capture loops are cheap; decoding is the expensive part, so it runs on a
+    fixed pool of ``decode_workers`` threads (pyzbar and OpenCV release the
+    GIL). Sources only queue their newest frame, at most ``decode_fps``
+    times a second, so adding a camera adds decode work only while the pool
+    has headroom and otherwise just drops stale frames.
+    """
+
+    def __init__(self, config, service):
+        self.service = service
+        self.scan_cooldown = config.get("scan_cooldown", 3)
+        self.decode_workers = config.get("decode_workers", max(1, (os.cpu_count() or 2) // 2))
+        self._ready = queue.Queue()
+        # Every source's scans go through one check-in thread, off the decode pool
+        self.check_ins = ScanQueue(self._check_in, name="check-in")
+        self.sources = [
+            CameraSource(
+                source.get("name", str(source["source"])),
+                source["source"],
+                self._ready,
+                self.check_ins.submit,
+                decode_fps=source.get("decode_fps", config.get("decode_fps", 10)),
+                loop=source.get("loop", False),
+                scan_cooldown=self.scan_cooldown,
+                motion=source.get("motion", config.get("motion", True)),
+            )
+            for source in config["sources"]
+        ]
+        self.scans = {MARKED: 0, CHECKED_OUT: 0, DUPLICATE: 0, UNKNOWN: 0, "error": 0}
+        self._scans_lock = threading.Lock()
+        self._running = False
+        self._workers = []
+
+    def start(self):
+        self._running = True
+        self.check_ins.start()
+        for source in list(self.sources):
+            try:
+                source.start()
+            except RuntimeError as e:
+                # A missing camera or file must not take the other entrances down
+                print(f"❌ {e}; skipping it")
+                self.sources.remove(source)
+        for i in range(self.decode_workers):
+            worker = threading.Thread(target=self._decode_loop, name=f"decode-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        self._running = False
+        for source in self.sources:
+            source.stop()
+        for worker in self._workers:
+            worker.join(1.0)
+        self._workers = []
+        self.check_ins.stop()
+
+    def finished(self):
+        """True once every (non-looping) video file source has ended"""
+        return all(source.finished for source in self.sources)
+
+    def stats(self):
+        with self._scans_lock:
+            scans = dict(self.scans)
+        sources = {}
+        for source in self.sources:
+            sources[source.name] = {
+                "capture": source.capture_stats.as_dict(),
+                "decode": dict(source.decode_stats.as_dict(), dropped=source.frames.dropped),
+            }
+            if source.motion is not None:
+                # CPU figures are process-wide, so they overlap between sources
+                sources[source.name]["motion"] = source.motion.stats()
+        return {
+            "scans": scans,
+            "check_in_queue": {
+                "processed": self.check_ins.processed,
+                "pending": self.check_ins.pending(),
+                "dropped": self.check_ins.dropped,
+            },
+            "sources": sources,
+        }
+
+    def _decode_loop(self):
+        while self._running:
+            try:
+                source = self._ready.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            frame = source.take()
+            if frame is None:
+                continue
+            # Per-source decoders keep ROI state, so one worker per source at a time
+            try:
+                with source.decode_lock, metrics.time("decode_stage"):
+                    source.scanner.scan(frame)
+            except Exception as e:
+                # An odd frame must not cost the pool one of its workers
+                print(f"[{source.name}] Error in decode stage: {e}")
+            source.decode_stats.processed += 1
+            metrics.inc("decode_frames")
+
+    def _check_in(self, source, employee_id):
+        try:
+            result = self.service.check_in(employee_id, "qr_only")
+        except Exception as e:
+            self._count("error")
+            print(f"[{source.name}] ❌ Error: {e}")
+            return
+        self._count(result.status)
+        if result.status == MARKED:
+            print(f"[{source.name}] ✓ Attendance marked for {result.employee['name']}")
+        elif result.status == CHECKED_OUT:
+            print(f"[{source.name}] ✓ Check-out recorded for {result.employee['name']}")
+        elif result.status == DUPLICATE:
+            print(f"[{source.name}] ⚠️ Attendance already marked for {result.employee['name']} today")
+        else:
+            print(f"[{source.name}] ❌ Employee {employee_id} not found in database")
+
+    def _count(self, status):
+        with self._scans_lock:
+            self.scans[status] += 1
+
+
+class DryRunService:
+    """Stand-in for AttendanceService that accepts every badge once a day"""
+
+    def __init__(self):
+        self.seen = set()
+
+    def start(self, connected=True):
+        pass
+
+    def stop(self):
+        pass
+
+    def check_in(self, employee_id, verification_method="qr_only", now=None):
+        employee = {"employee_id": employee_id, "name": employee_id}
+        if employee_id in self.seen:
+            return CheckInResult(DUPLICATE, employee, None)
+        self.seen.add(employee_id)
+        return CheckInResult(MARKED, employee, {"employee_id": employee_id})
+
+
+def load_config(path):
+    with open(path) as f:
+        config = json.load(f)
+    if not config.get("sources"):
+        raise ValueError(f"{path}: no sources configured")
+    return config
+
+
+def connect_service(stopping):
+    """(DatabaseConnection, AttendanceService) without blocking on an unreachable MongoDB.
+
+    The service is created on the connection thread once the first ping has
+    answered or timed out; while offline check-ins are only journaled, and
+    every reconnect reloads the directory and today's set. Returns
+    (connection, None) if ``stopping`` is set first.
+    """
+    ready = threading.Event()
+    service = None
+
+    def on_state(state):
+        nonlocal service
+        if service is None:
+            service = AttendanceService(connection.db)
+            service.start(connected=False)
+        if state == ONLINE:
+            service.on_connected()
+        else:
+            service.on_disconnected()
+            print(f"⚠️ MongoDB unreachable, journaling check-ins locally: {connection.last_error}")
+        ready.set()
+
+    connection = DatabaseConnection(MONGO_URI, DB_NAME, on_state=on_state)
+    connection.start()
+    while not ready.wait(0.5):
+        if stopping.is_set():
+            break
+    return connection, service
+
+
+def run(config_path, dry_run=False, stats_interval=30):
+    config = load_config(config_path)
+    configure_from_env()
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGINT, lambda *args: stopping.set())
+    signal.signal(signal.SIGTERM, lambda *args: stopping.set())
+
+    connection = None
+    if dry_run:
+        service = DryRunService()
+        service.start()
+    else:
+        connection, service = connect_service(stopping)
+        if service is None:
+            connection.stop()
+            return
+
+    server = GateServer(config, service)
+    # Camera names become a source="..." label rather than part of the metric name
+    metrics.register("gate", server.stats, labels={"sources": "source"})
+    next_stats = time.monotonic() + stats_interval
+    try:
+        server.start()
+        if not server.sources:
+            print("❌ No source could be opened")
+            return
+        print(f"Gate server running {len(server.sources)} source(s) on {server.decode_workers} decode worker(s)")
+        while not stopping.wait(1.0):
+            if server.finished():
+                break
+            if stats_interval and time.monotonic() >= next_stats:
+                next_stats += stats_interval
+                print(json.dumps(server.stats()))
+    finally:
+        server.stop()
+        service.stop()
+        if connection is not None:
+            connection.stop()
+        print(json.dumps(server.stats()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless multi-camera attendance station.")
+    parser.add_argument("config", help="JSON config file, see gate.example.json")
+    parser.add_argument("--dry-run", action="store_true", help="don't connect to MongoDB, just print scans")
+    parser.add_argument("--stats-interval", type=int, default=30, help="seconds between stats lines (0 = off)")
+    args = parser.parse_args()
+    run(args.config, dry_run=args.dry_run, stats_interval=args.stats_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Configuration ---
+# Port for the Prometheus endpoint; unset/0 disables it
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0") or 0)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# File for periodic JSON dumps; unset disables them
+METRICS_JSON_PATH = os.getenv("METRICS_JSON_PATH")
+METRICS_JSON_INTERVAL = float(os.getenv("METRICS_JSON_INTERVAL", "60"))
+# ---------------------
+
+# Seconds; spans a fast ROI decode up to a stalled database call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+PREFIX = "attendance_"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Counters and timing histograms for the scan hot path.
+
+    Disabled by default: ``inc`` and ``observe`` return immediately and
+    ``time`` hands back a shared no-op context manager, so instrumented
+    code pays one attribute check per call.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._counters = {}
+        self._histograms = {}
+        self._providers = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def enable(self):
+        self.enabled = True
+
+    def inc(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def register(self, name, provider, labels=None):
+        """Report ``provider()``, a dict of (nested dicts of) numbers, as gauges under name.
+
+        ``labels`` maps a key of that dict to a label name: each entry under
+        the key becomes a labelled series instead of part of the metric name,
+        e.g. {"sources": "source"} for per-camera stats keyed by camera name.
+        """
+        with self._lock:
+            self._providers[name] = (provider, labels or {})
+
+    def time(self, name):
+        """Context manager recording the duration of a block in histogram name"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timer(name)
+
+    @contextmanager
+    def _timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            snapshot = {
+                "timestamp": time.time(),
+                "counters": dict(self._counters),
+                "histograms": {
+                    name: {
+                        "count": h.count,
+                        "sum": h.sum,
+                        "buckets": dict(zip([str(b) for b in h.buckets] + ["+Inf"], _cumulative(h.counts))),
+                    }
+                    for name, h in self._histograms.items()
+                },
+            }
+            providers = dict(self._providers)
+        # Providers take their own locks, so they run outside ours
+        gauges = {}
+        for name, (provider, _) in providers.items():
+            try:
+                gauges[name] = provider()
+            except Exception as e:
+                print(f"Metrics provider {name} failed: {e}")
+        snapshot["gauges"] = gauges
+        return snapshot
+
+    def prometheus(self):
+        """Current values in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE {PREFIX}{name}_total counter")
+            lines.append(f"{PREFIX}{name}_total {value}")
+        for name, histogram in sorted(snapshot["histograms"].items()):
+            metric = f"{PREFIX}{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in histogram["buckets"].items():
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{metric}_sum {histogram['sum']}")
+            lines.append(f"{metric}_count {histogram['count']}")
+        with self._lock:
+            labels = {name: labels for name, (_, labels) in self._providers.items()}
+        series = {}
+        for name, values in snapshot["gauges"].items():
+            for metric, metric_labels, value in _flatten(values, labels.get(name, {}), PREFIX + _name(name)):
+                series.setdefault(metric, []).append((metric_labels, value))
+        for metric, samples in sorted(series.items()):
+            lines.append(f"# TYPE {metric} gauge")
+            for metric_labels, value in samples:
+                lines.append(f"{metric}{_labels(metric_labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=METRICS_PORT, host=METRICS_HOST):
+        """Expose /metrics over HTTP from a daemon thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"Metrics available at http://{host}:{self._server.server_address[1]}/metrics")
+
+    def dump_periodically(self, path=METRICS_JSON_PATH, interval=METRICS_JSON_INTERVAL):
+        """Write a JSON snapshot to path every interval seconds"""
+
+        def dump():
+            while True:
+                time.sleep(interval)
+                try:
+                    tmp_path = path + ".tmp"
+                    with open(tmp_path, "w") as f:
+                        json.dump(self.snapshot(), f)
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    print(f"Could not write metrics to {path}: {e}")
+
+        threading.Thread(target=dump, name="metrics-json", daemon=True).start()
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _cumulative(counts):
+    total = 0
+    result = []
+    for count in counts:
+        total += count
+        result.append(total)
+    return result
+
+
+def _name(key):
+    """Metric name segment: characters outside [a-zA-Z0-9_] become underscores"""
+    return re.sub(r"[^a-zA-Z0-9_]", "_", str(key))
+
+
+def _labels(labels):
+    """{label="value",...} with the values escaped, or "" without labels"""
+    if not labels:
+        return ""
+    pairs = []
+    for label, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{label}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _flatten(values, labels, prefix, current=()):
+    """[(metric name, ((label, value), ...), number)] for the numbers in nested dicts.
+
+    {"a": {"b": 1}} under prefix "x" is x_a_b; entries under a key listed
+    in ``labels`` keep the name of their parent and gain a label instead.
+    """
+    series = []
+    for key, value in values.items():
+        if key in labels and isinstance(value, dict):
+            for label_value, child in value.items():
+                if isinstance(child, dict):
+                    series += _flatten(child, labels, prefix, current + ((labels[key], label_value),))
+            continue
+        name = f"{prefix}_{_name(key)}"
+        if isinstance(value, dict):
+            series += _flatten(value, labels, name, current)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            series.append((name, current, value))
+    return series
+
+
+# Process-wide registry used by every instrumented module
+metrics = Metrics()
+
+
+def configure_from_env():
+    """Enable metrics if METRICS_PORT or METRICS_JSON_PATH is set"""
+    if not METRICS_PORT and not METRICS_JSON_PATH:
+        return
+    metrics.enable()
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+    if METRICS_JSON_PATH:
+        metrics.dump_periodically(METRICS_JSON_PATH)
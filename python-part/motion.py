@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+
+import cv2
+
+from metrics import metrics
+
+# --- Configuration ---
+# Read from environment variables or use default values
+# Capture rate while nothing moves; 0 disables motion gating
+MOTION_IDLE_FPS = float(os.getenv("MOTION_IDLE_FPS", "4"))
+# Mean absolute difference (0-255) between thumbnails that counts as motion
+MOTION_THRESHOLD = float(os.getenv("MOTION_THRESHOLD", "3.0"))
+# Seconds to stay at full rate after the last motion
+MOTION_HOLD_SECONDS = float(os.getenv("MOTION_HOLD_SECONDS", "5"))
+MOTION_SAMPLE_WIDTH = int(os.getenv("MOTION_SAMPLE_WIDTH", "64"))
+# ---------------------
+
+IDLE = "idle"
+ACTIVE = "active"
+
+
+class MotionGate:
+    """Frame-difference motion detector that switches the camera loop between rates.
+
+    Each captured frame is shrunk to a ``sample_width`` grayscale thumbnail
+    (area averaging also smooths out sensor noise) and compared with the
+    previous one. Motion keeps the gate ``active`` for ``hold`` seconds;
+    after that it goes ``idle``, where the caller should capture at
+    ``idle_fps`` and skip decoding. Process CPU time is charged to the state
+    it was spent in, so the savings can be read off ``stats()``.
+    """
+
+    def __init__(self, idle_fps=MOTION_IDLE_FPS, threshold=MOTION_THRESHOLD,
+                 hold=MOTION_HOLD_SECONDS, sample_width=MOTION_SAMPLE_WIDTH):
+        self.idle_interval = 1.0 / idle_fps
+        self.threshold = threshold
+        self.hold = hold
+        self.sample_width = sample_width
+        self.state = ACTIVE
+        self.score = 0.0
+        self.wake_ups = 0
+        self.static_frames = 0
+        self._previous = None
+        self._last_motion = time.monotonic()
+        self._lock = threading.Lock()
+        self._clock = None
+        self._cpu = {IDLE: 0.0, ACTIVE: 0.0}
+        self._wall = {IDLE: 0.0, ACTIVE: 0.0}
+
+    @property
+    def active(self):
+        return self.state == ACTIVE
+
+    def update(self, frame, now=None):
+        """Feed a captured frame; returns True if it should be decoded"""
+        now = time.monotonic() if now is None else now
+        self._account(now)
+
+        height, width = frame.shape[:2]
+        size = (self.sample_width, max(1, height * self.sample_width // width))
+        thumb = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if thumb.ndim == 3:
+            thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+
+        if self._previous is None:
+            self.score = 0.0
+        else:
+            self.score = float(cv2.absdiff(thumb, self._previous).mean())
+        self._previous = thumb
+
+        if self.score >= self.threshold:
+            self._last_motion = now
+            if self.state == IDLE:
+                self.wake_ups += 1
+                metrics.inc("motion_wake_ups")
+            self.state = ACTIVE
+        elif now - self._last_motion >= self.hold:
+            self.state = IDLE
+
+        if self.state == IDLE:
+            self.static_frames += 1
+            return False
+        return True
+
+    def _account(self, now):
+        """Charge CPU and wall time since the last frame to the current state"""
+        cpu = time.process_time()
+        with self._lock:
+            if self._clock is not None:
+                last_now, last_cpu = self._clock
+                self._cpu[self.state] += cpu - last_cpu
+                self._wall[self.state] += now - last_now
+                metrics.inc(f"cpu_seconds_{self.state}", cpu - last_cpu)
+            self._clock = (now, cpu)
+
+    def stats(self):
+        with self._lock:
+            result = {"state": self.state, "wake_ups": self.wake_ups, "static_frames": self.static_frames}
+            for state in (IDLE, ACTIVE):
+                wall = self._wall[state]
+                result[f"{state}_seconds"] = round(wall, 1)
+                result[f"{state}_cpu_seconds"] = round(self._cpu[state], 2)
+                # Share of one core used by the whole process in this state
+                result[f"{state}_cpu_percent"] = round(self._cpu[state] / wall * 100, 1) if wall else None
+            return result
+
+
+def create_motion_gate(idle_fps=MOTION_IDLE_FPS):
+    """A MotionGate, or None when MOTION_IDLE_FPS is 0"""
+    if idle_fps <= 0:
+        return None
+    return MotionGate(idle_fps)
@@ -0,0 +1,234 @@
+import queue
+import threading
+import time
+from collections import deque
+
+from metrics import metrics
+
+
+class LatestFrameQueue:
+    """Bounded queue where the newest frame always wins.
+
+    When the queue is full the oldest frame is discarded and counted as
+    dropped, so a slow consumer only ever sees recent frames.
+    """
+
+    def __init__(self, maxsize=1, name="frames"):
+        self.name = name
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                metrics.inc(f"{self.name}_dropped")
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued frame, or None on timeout/close"""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class ScanQueue:
+    """Runs scan handlers on a worker thread, in arrival order.
+
+    The decode stage only enqueues, so a slow check-in (journal fsync,
+    directory miss, UI work) never delays decoding of the next frame. When
+    ``maxsize`` scans are waiting, new ones are dropped and counted rather
+    than blocking the decoder.
+    """
+
+    def __init__(self, handler, maxsize=256, name="scan-queue"):
+        self.handler = handler
+        self.name = name
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self.processed = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, *args):
+        """Queue handler(*args); False if the queue was full"""
+        try:
+            self._queue.put_nowait(args)
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc("scans_queue_full")
+            return False
+        return True
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            args = self._queue.get()
+            if args is None:
+                break
+            try:
+                self.handler(*args)
+            except Exception as e:
+                print(f"Error handling scan: {e}")
+            self.processed += 1
+
+
+class StageStats:
+    """Per-stage frame counters"""
+
+    def __init__(self):
+        self.processed = 0
+        self.dropped = 0
+
+    def as_dict(self):
+        return {"processed": self.processed, "dropped": self.dropped}
+
+
+class FramePipeline:
+    """Capture -> decode -> render pipeline, one thread per stage.
+
+    The capture stage drains the camera as fast as it delivers frames and
+    hands the newest frame to the decode and render stages through
+    latest-frame-wins queues. Decoding and rendering therefore never stall
+    each other or let the camera buffer fill with stale frames.
+
+    With a ``motion`` gate (motion.MotionGate) the capture stage drops to
+    the gate's idle rate and stops feeding the decoder while the scene is
+    static, and returns to full rate on the first frame that moves.
+    """
+
+    def __init__(self, cap, decode, render, render_fps=30, decode_queue_size=1, motion=None):
+        self.cap = cap
+        self.decode = decode
+        self.render = render
+        self.motion = motion
+        self.render_interval = 1.0 / render_fps if render_fps else 0
+        self.decode_queue = LatestFrameQueue(decode_queue_size, name="decode_frames")
+        self.render_queue = LatestFrameQueue(1, name="render_frames")
+        self.capture_stats = StageStats()
+        self.decode_stats = StageStats()
+        self.render_stats = StageStats()
+        self._running = False
+        self._threads = []
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._decode_loop, name="decode", daemon=True),
+            threading.Thread(target=self._render_loop, name="render", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        self.decode_queue.close()
+        self.render_queue.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self._threads = []
+
+    @property
+    def running(self):
+        return self._running
+
+    def stats(self):
+        """Snapshot of frame counters for every stage"""
+        self.decode_stats.dropped = self.decode_queue.dropped
+        self.render_stats.dropped = self.render_queue.dropped
+        stats = {
+            "capture": self.capture_stats.as_dict(),
+            "decode": self.decode_stats.as_dict(),
+            "render": self.render_stats.as_dict(),
+        }
+        if self.motion is not None:
+            stats["motion"] = self.motion.stats()
+        return stats
+
+    def _capture_loop(self):
+        while self._running:
+            with metrics.time("capture_read"):
+                ret, frame = self.cap.read()
+            if not ret:
+                # Failed grab: count it and back off briefly so a
+                # disconnected camera does not spin the CPU
+                self.capture_stats.dropped += 1
+                metrics.inc("capture_frames_failed")
+                time.sleep(0.01)
+                continue
+            self.capture_stats.processed += 1
+            metrics.inc("capture_frames")
+            if self.motion is not None and not self.motion.update(frame):
+                # Static scene: keep the preview alive, skip decoding, and
+                # wait out the idle interval instead of draining the camera
+                self.render_queue.put(frame)
+                time.sleep(self.motion.idle_interval)
+                continue
+            self.decode_queue.put(frame)
+            self.render_queue.put(frame)
+
+    def _decode_loop(self):
+        while self._running:
+            frame = self.decode_queue.get(timeout=0.5)
+            if frame is None:
+                continue
+            try:
+                with metrics.time("decode_stage"):
+                    self.decode(frame)
+            except Exception as e:
+                print(f"Error in decode stage: {e}")
+            self.decode_stats.processed += 1
+            metrics.inc("decode_frames")
+
+    def _render_loop(self):
+        next_render = time.monotonic()
+        while self._running:
+            frame = self.render_queue.get(timeout=0.5)
+            if frame is None:
+                continue
+            try:
+                with metrics.time("render_stage"):
+                    self.render(frame)
+            except Exception as e:
+                print(f"Error in render stage: {e}")
+            self.render_stats.processed += 1
+            metrics.inc("render_frames")
+            # Pace the preview independently of the camera frame rate
+            next_render += self.render_interval
+            delay = next_render - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_render = time.monotonic()
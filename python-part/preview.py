@@ -0,0 +1,78 @@
+import os
+import threading
+import tkinter as tk
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+from metrics import metrics
+
+# --- Configuration ---
+# Read from environment variables or use default values
+PREVIEW_FPS = float(os.getenv("PREVIEW_FPS", "15"))
+# ---------------------
+
+
+class PreviewRenderer:
+    """Draws camera frames into one Tk label without per-frame allocations.
+
+    ``render`` runs on a worker thread: it shrinks the frame with OpenCV
+    into a preallocated buffer, draws the overlay on the small image and
+    converts it to RGBA into a second preallocated buffer, which a PIL image
+    maps without copying. The Tk thread then pastes that image into a single
+    PhotoImage. While a paste is still queued, new frames are skipped
+    instead of piling up behind the UI.
+    """
+
+    def __init__(self, label, size=(480, 360), overlay=None):
+        self.label = label
+        self.size = size
+        self.overlay = overlay
+        width, height = size
+        self._small = np.empty((height, width, 3), np.uint8)
+        self._rgba = np.empty((height, width, 4), np.uint8)
+        # RGBA has PIL's native pixel layout, so the image shares the buffer
+        self._image = Image.frombuffer("RGBA", size, self._rgba, "raw", "RGBA", 0, 1)
+        self._photo = None
+        self._pending = False
+        self._lock = threading.Lock()
+        self.rendered = 0
+        self.skipped = 0
+
+    def prepare(self, frame):
+        """Resize, annotate and color-convert frame into the shared buffer"""
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        if self.overlay:
+            cv2.putText(self._small, self.overlay, (10, 30), cv2.FONT_HERSHEY_COMPLEX_SMALL, 1, (0, 0, 0), 1)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2RGBA, dst=self._rgba)
+        return self._rgba
+
+    def render(self, frame):
+        with self._lock:
+            if self._pending:
+                self.skipped += 1
+                return
+            self._pending = True
+        self.prepare(frame)
+        try:
+            self.label.after(0, self._paste)
+        except (RuntimeError, tk.TclError):
+            # Window already closed
+            with self._lock:
+                self._pending = False
+
+    def _paste(self):
+        """Tk thread: copy the buffer into the shared PhotoImage"""
+        try:
+            with metrics.time("ui_update"):
+                if self._photo is None:
+                    self._photo = ImageTk.PhotoImage(self._image)
+                    self.label.configure(image=self._photo)
+                    self.label.image = self._photo
+                else:
+                    self._photo.paste(self._image)
+            self.rendered += 1
+        finally:
+            with self._lock:
+                self._pending = False
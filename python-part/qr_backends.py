@@ -0,0 +1,178 @@
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# rect is (left, top, width, height) in pixel coordinates of the decoded image
+DecodedQR = namedtuple("DecodedQR", ["data", "rect"])
+
+# Share of badge frames a backend decoded, and its mean time over all frames
+Calibration = namedtuple("Calibration", ["name", "detection_rate", "mean_ms"])
+
+
+def to_gray(frame):
+    """Return a single channel view of a BGR or already-gray frame"""
+    if frame.ndim == 2:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def _bounding_rect(corners):
+    x, y, w, h = cv2.boundingRect(np.asarray(corners, dtype=np.float32).reshape(-1, 2))
+    return (x, y, w, h)
+
+
+class PyzbarBackend:
+    """ZBar, restricted to QR symbols"""
+
+    name = "pyzbar"
+
+    def __init__(self):
+        from pyzbar import pyzbar
+        self._decode = pyzbar.decode
+        self._symbols = [pyzbar.ZBarSymbol.QRCODE]
+
+    def decode(self, image):
+        return [DecodedQR(code.data, tuple(code.rect)) for code in self._decode(image, symbols=self._symbols)]
+
+
+class OpenCVBackend:
+    """cv2.QRCodeDetector, decoding every code in the image at once"""
+
+    name = "opencv"
+    detector = "QRCodeDetector"
+
+    def __init__(self):
+        self._detector = getattr(cv2, self.detector)()
+
+    def decode(self, image):
+        ok, texts, points, _ = self._detector.detectAndDecodeMulti(image)
+        if not ok:
+            return []
+        # Codes that were located but not decoded come back as empty strings
+        return [DecodedQR(text.encode("utf-8"), _bounding_rect(corners)) for text, corners in zip(texts, points) if text]
+
+
+class OpenCVArucoBackend(OpenCVBackend):
+    """cv2.QRCodeDetectorAruco (OpenCV 4.8+): Aruco-based finder pattern search"""
+
+    name = "opencv-aruco"
+    detector = "QRCodeDetectorAruco"
+
+
+class WeChatBackend:
+    """cv2.wechat_qrcode_WeChatQRCode from opencv-contrib, without the CNN models"""
+
+    name = "wechat"
+
+    def __init__(self):
+        self._detector = cv2.wechat_qrcode_WeChatQRCode()
+
+    def decode(self, image):
+        texts, points = self._detector.detectAndDecode(image)
+        return [DecodedQR(text.encode("utf-8"), _bounding_rect(corners)) for text, corners in zip(texts, points) if text]
+
+
+BACKENDS = {backend.name: backend for backend in (PyzbarBackend, OpenCVBackend, OpenCVArucoBackend, WeChatBackend)}
+
+
+def create_backend(name):
+    """Instantiate a backend by name; ValueError if unknown or not installed"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown QR backend {name!r}; choose from {', '.join(BACKENDS)}")
+    try:
+        return BACKENDS[name]()
+    except (ImportError, AttributeError, cv2.error) as e:
+        raise ValueError(f"QR backend {name!r} is not available: {e}")
+
+
+def available_backends(names=None):
+    """Instances of every backend (or of ``names``) that works in this install"""
+    backends = []
+    for name in names or BACKENDS:
+        try:
+            backends.append(create_backend(name))
+        except ValueError:
+            continue
+    return backends
+
+
+def first_backend():
+    """Name of the first backend that works in this install, pyzbar if it does"""
+    for name in BACKENDS:
+        try:
+            create_backend(name)
+        except ValueError:
+            continue
+        return name
+    raise ValueError("No QR backend is available; install pyzbar (and libzbar) or opencv-python")
+
+
+class ChainedBackend:
+    """Tries backends in order until one decodes something"""
+
+    def __init__(self, backends):
+        self.backends = backends
+        self.name = "+".join(backend.name for backend in backends)
+        self.hits = {backend.name: 0 for backend in backends}
+
+    def decode(self, image):
+        for backend in self.backends:
+            results = backend.decode(image)
+            if results:
+                self.hits[backend.name] += 1
+                return results
+        return []
+
+
+def calibrate(frames, backends=None, min_rate=0.9):
+    """Time every backend on the same frames and pick one.
+
+    A frame counts as showing a badge if any backend decodes it, so live
+    frames need no labels. Returns (chosen name, [Calibration, ...] fastest
+    first); the choice is the fastest backend that decodes ``min_rate`` of
+    the badge frames, else the most reliable one, or None if no backend
+    found a badge at all.
+    """
+    backends = backends if backends is not None else available_backends()
+    images = [to_gray(frame) for frame in frames]
+    if not images or not backends:
+        return None, []
+    found = {}
+    elapsed = {}
+    for backend in backends:
+        try:
+            # The first call may load models or allocate buffers
+            backend.decode(images[0])
+            hits = []
+            start = time.perf_counter()
+            for image in images:
+                hits.append(bool(backend.decode(image)))
+        except cv2.error as e:
+            print(f"QR backend {backend.name} failed during calibration: {e}")
+            continue
+        elapsed[backend.name] = time.perf_counter() - start
+        found[backend.name] = hits
+    if not found:
+        return None, []
+
+    badge_frames = [any(hits[i] for hits in found.values()) for i in range(len(images))]
+    total = sum(badge_frames)
+    results = sorted(
+        (
+            Calibration(
+                name,
+                sum(hits) / float(total) if total else 0.0,
+                elapsed[name] / len(images) * 1000,
+            )
+            for name, hits in found.items()
+        ),
+        key=lambda result: result.mean_ms,
+    )
+    if not total:
+        return None, results
+    qualified = [result for result in results if result.detection_rate >= min_rate]
+    if qualified:
+        return qualified[0].name, results
+    return max(results, key=lambda result: result.detection_rate).name, results
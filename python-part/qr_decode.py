@@ -0,0 +1,441 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+
+from camera_discovery import CAMERA_PROFILE_PATH
+from metrics import metrics
+from qr_backends import ChainedBackend, DecodedQR, calibrate, create_backend, first_backend, to_gray
+from qr_payload import decode_payload
+
+# --- Configuration ---
+# "fast" = multi-resolution ROI decoding, "full" = pyzbar on the full frame
+QR_DECODE_MODE = os.getenv("QR_DECODE_MODE", "fast")
+QR_SCAN_WIDTH = int(os.getenv("QR_SCAN_WIDTH", "640"))
+# Decoder backend for the fast path: "auto" calibrates the installed ones at
+# startup; a name (pyzbar, opencv, opencv-aruco, wechat) or a comma-separated
+# list pins it, the rest of the list being the fallback
+QR_BACKEND = os.getenv("QR_BACKEND", "auto")
+# Calibration picks the fastest backend decoding at least this share of badge frames
+QR_MIN_DETECTION_RATE = float(os.getenv("QR_MIN_DETECTION_RATE", "0.9"))
+# With "auto", retry crops around a likely code with the most reliable other backend
+QR_FALLBACK = os.getenv("QR_FALLBACK", "1") == "1"
+QR_CALIBRATION_FRAMES = int(os.getenv("QR_CALIBRATION_FRAMES", "24"))
+# Where the "auto" choice is kept so later starts skip calibration; delete to recalibrate
+QR_BACKEND_CACHE_PATH = os.getenv(
+    "QR_BACKEND_CACHE_PATH",
+    os.path.join(os.path.dirname(CAMERA_PROFILE_PATH), "qr_backend.json"),
+)
+# ---------------------
+
+
+def downscale(gray, scan_width):
+    """(image no wider than scan_width, scale factor applied)"""
+    height, width = gray.shape[:2]
+    scale = min(1.0, scan_width / float(width))
+    if scale < 1.0:
+        return cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA), scale
+    return gray, scale
+
+
+def decode_full(frame):
+    """Reference decoder: pyzbar over the whole frame, as before"""
+    # Imported here so the other backends work without the zbar library
+    from pyzbar import pyzbar
+    return [DecodedQR(code.data, tuple(code.rect)) for code in pyzbar.decode(frame)]
+
+
+class FastQRDecoder:
+    """Multi-resolution QR decoder with region-of-interest tracking.
+
+    Each frame is tried in order of cost:
+
+    1. the tracked ROI around the last code seen, at full resolution
+    2. the whole frame, grayscale and downscaled to ``scan_width``
+    3. full-resolution crops around finder patterns located by a cheap
+       contour pre-pass on the downscaled frame
+
+    Once a code is found its bounding box becomes the tracked ROI, which is
+    kept until it misses ``roi_ttl`` frames in a row. Every ``sweep_every``
+    ROI hits the downscaled pass runs as well, so a second badge entering
+    elsewhere in the frame is picked up while the first is still tracked.
+
+    Every pass decodes with ``backend`` (see qr_backends; by default
+    pyzbar, or the first installed one). The crops of steps 1 and 3, where
+    a code is most likely present, are retried with ``fallback`` when the
+    backend misses.
+    """
+
+    def __init__(self, scan_width=QR_SCAN_WIDTH, roi_margin=0.5, roi_ttl=15, sweep_every=5,
+                 backend=None, fallback=None):
+        self.backend = backend if backend is not None else create_backend(first_backend())
+        self.fallback = fallback
+        self.scan_width = scan_width
+        self.roi_margin = roi_margin
+        self.roi_ttl = roi_ttl
+        self.sweep_every = sweep_every
+        self.roi = None
+        self._roi_misses = 0
+        self._roi_hits = 0
+        # How each frame was resolved, for benchmarking
+        self.stats = {"roi": 0, "sweep": 0, "downscaled": 0, "finder": 0, "miss": 0, "fallback": 0}
+
+    def reset(self):
+        self.roi = None
+        self._roi_misses = 0
+        self._roi_hits = 0
+
+    def decode(self, frame):
+        gray = to_gray(frame)
+        height, width = gray.shape[:2]
+
+        tracked = []
+        if self.roi is not None:
+            tracked = self._decode_region(gray, self.roi)
+            if tracked:
+                self._roi_hits += 1
+                if self._roi_hits % self.sweep_every:
+                    self._track(tracked, width, height)
+                    self.stats["roi"] += 1
+                    return tracked
+            else:
+                self._roi_misses += 1
+                if self._roi_misses >= self.roi_ttl:
+                    self.reset()
+
+        small, scale = downscale(gray, self.scan_width)
+        results = [
+            DecodedQR(code.data, self._scale_rect(code.rect, scale))
+            for code in self.backend.decode(small)
+        ]
+        if tracked:
+            # Periodic sweep: keep the tracked codes, add any new ones
+            seen = {code.data for code in tracked}
+            results = tracked + [code for code in results if code.data not in seen]
+            self._track(results, width, height)
+            self.stats["sweep"] += 1
+            return results
+        if results:
+            self._track(results, width, height)
+            self.stats["downscaled"] += 1
+            return results
+
+        if scale < 1.0:
+            for region in self._finder_regions(small, scale, width, height):
+                results = self._decode_region(gray, region)
+                if results:
+                    self._track(results, width, height)
+                    self.stats["finder"] += 1
+                    return results
+
+        self.stats["miss"] += 1
+        return []
+
+    def _decode_region(self, gray, region):
+        x, y, w, h = region
+        crop = gray[y:y + h, x:x + w]
+        if crop.size == 0:
+            return []
+        codes = self.backend.decode(crop)
+        if not codes and self.fallback is not None:
+            codes = self.fallback.decode(crop)
+            if codes:
+                self.stats["fallback"] += 1
+                metrics.inc("qr_fallback_hits")
+        return [
+            DecodedQR(code.data, (code.rect[0] + x, code.rect[1] + y, code.rect[2], code.rect[3]))
+            for code in codes
+        ]
+
+    def _track(self, results, width, height):
+        left = min(r.rect[0] for r in results)
+        top = min(r.rect[1] for r in results)
+        right = max(r.rect[0] + r.rect[2] for r in results)
+        bottom = max(r.rect[1] + r.rect[3] for r in results)
+        self.roi = self._expand((left, top, right - left, bottom - top), width, height)
+        self._roi_misses = 0
+
+    def _expand(self, rect, width, height):
+        x, y, w, h = rect
+        pad_x = int(w * self.roi_margin)
+        pad_y = int(h * self.roi_margin)
+        left = max(0, x - pad_x)
+        top = max(0, y - pad_y)
+        right = min(width, x + w + pad_x)
+        bottom = min(height, y + h + pad_y)
+        return (left, top, right - left, bottom - top)
+
+    @staticmethod
+    def _scale_rect(rect, scale):
+        return tuple(int(value / scale) for value in rect)
+
+    def _finder_regions(self, small, scale, width, height):
+        """Locate QR finder patterns (nested squares) on the downscaled frame"""
+        _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        contours, hierarchy = cv2.findContours(binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        if hierarchy is None:
+            return []
+        hierarchy = hierarchy[0]
+
+        finders = []
+        for i, contour in enumerate(contours):
+            # A finder pattern is a square with a square inside a square
+            child = hierarchy[i][2]
+            if child < 0 or hierarchy[child][2] < 0:
+                continue
+            area = cv2.contourArea(contour)
+            if area < 16:
+                continue
+            x, y, w, h = cv2.boundingRect(contour)
+            if not 0.5 < w / float(h) < 2.0:
+                continue
+            finders.append((x, y, w, h))
+
+        if not finders:
+            return []
+
+        # One region covering every finder, padded by a finder width so the
+        # whole symbol (and the fourth, finder-less corner) is included
+        pad = max(max(w, h) for _, _, w, h in finders)
+        left = min(x for x, _, _, _ in finders) - pad
+        top = min(y for _, y, _, _ in finders) - pad
+        right = max(x + w for x, _, w, _ in finders) + pad
+        bottom = max(y + h for _, y, _, h in finders) + pad
+        rect = (
+            max(0, int(left / scale)),
+            max(0, int(top / scale)),
+            int((right - left) / scale),
+            int((bottom - top) / scale),
+        )
+        x, y, w, h = rect
+        return [(x, y, min(w, width - x), min(h, height - y))]
+
+
+def employee_id_from_qr(data):
+    """Employee id from a signed compact or legacy JSON badge, or None"""
+    employee_id, kind = decode_payload(data)
+    # qr_payloads_signed/legacy/forged/malformed/... counters
+    metrics.inc(f"qr_payloads_{kind}")
+    return employee_id
+
+
+def sample_frames(count=QR_CALIBRATION_FRAMES, resolution=(1280, 720)):
+    """Synthetic badge frames under a few camera conditions, for calibration"""
+    from synthetic_frames import approach_clip, employee_payload
+
+    conditions = [{}, {"blur": 1.5}, {"angle": 20.0}, {"brightness": -60, "contrast": 0.7}]
+    per_condition = max(1, count // len(conditions))
+    frames = []
+    for seed, condition in enumerate(conditions):
+        clip, _ = approach_clip(employee_payload("CALIBRATION"), resolution, frames=per_condition,
+                                lead_in=0, badge_fraction=0.2, seed=seed, **condition)
+        frames += clip
+    return frames
+
+
+def select_backends(spec=QR_BACKEND, frames=None, min_rate=QR_MIN_DETECTION_RATE, fallback=QR_FALLBACK):
+    """(backend name, [fallback names]) for a QR_BACKEND value.
+
+    "auto" calibrates every installed backend on ``frames`` (live frames,
+    if any) plus synthetic badges, downscaled as the fast path sees them.
+    """
+    if spec != "auto":
+        names = [name.strip() for name in spec.split(",") if name.strip()]
+        return names[0], names[1:]
+
+    samples = list(frames or [])
+    try:
+        samples += sample_frames()
+    except ImportError as e:
+        print(f"⚠️ No synthetic calibration frames ({e})")
+    if not samples:
+        return first_backend(), []
+    chosen, results = calibrate([downscale(to_gray(frame), QR_SCAN_WIDTH)[0] for frame in samples], min_rate=min_rate)
+    for result in results:
+        print(f"QR backend {result.name:<13} {result.mean_ms:6.2f} ms/frame  {result.detection_rate * 100:5.1f}% detected")
+    if chosen is None:
+        return first_backend(), []
+
+    fallbacks = []
+    others = [result for result in results if result.name != chosen and result.detection_rate > 0]
+    if fallback and others:
+        fallbacks = [max(others, key=lambda result: (result.detection_rate, -result.mean_ms)).name]
+    print(f"✅ QR decoding with {chosen}" + (f", falling back to {fallbacks[0]}" if fallbacks else ""))
+    return chosen, fallbacks
+
+
+def load_backend_choice(path=QR_BACKEND_CACHE_PATH):
+    """Last calibrated (backend name, [fallback names]), or None if missing or not installed"""
+    try:
+        with open(path) as f:
+            choice = json.load(f)
+        backend = str(choice["backend"])
+        fallbacks = [str(name) for name in choice.get("fallback", [])]
+        for name in [backend] + fallbacks:
+            create_backend(name)
+        return backend, fallbacks
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_backend_choice(backend, fallbacks, path=QR_BACKEND_CACHE_PATH):
+    try:
+        with open(path, "w") as f:
+            json.dump({"backend": backend, "fallback": list(fallbacks)}, f)
+    except OSError as e:
+        print(f"Could not save QR backend choice: {e}")
+
+
+class LiveCalibration:
+    """QR_BACKEND=auto calibration on frames from the running camera.
+
+    ``offer`` is called from the decode stage and keeps every ``every``-th
+    frame, reduced straight away to the downscaled gray image calibration
+    works on rather than held at full resolution. Once ``count`` frames are
+    in, select_backends runs on its own thread, so decoding carries on with
+    the current backend meanwhile; the choice is saved to ``path`` and
+    passed to ``on_selected(backend, fallbacks)``.
+    """
+
+    def __init__(self, on_selected, count=QR_CALIBRATION_FRAMES, every=5, path=QR_BACKEND_CACHE_PATH):
+        self.on_selected = on_selected
+        self.count = count
+        self.every = every
+        self.path = path
+        self.frames = []
+        self._offered = 0
+        self._started = False
+        self._lock = threading.Lock()
+
+    def offer(self, frame):
+        with self._lock:
+            if self._started:
+                return
+            self._offered += 1
+            if (self._offered - 1) % self.every:
+                return
+            self.frames.append(downscale(to_gray(frame), QR_SCAN_WIDTH)[0])
+            if len(self.frames) < self.count:
+                return
+            self._started = True
+        threading.Thread(target=self._run, name="qr-calibration", daemon=True).start()
+
+    def _run(self):
+        frames, self.frames = self.frames, []
+        try:
+            backend, fallbacks = select_backends("auto", frames)
+        except Exception as e:
+            print(f"⚠️ QR backend calibration failed: {e}")
+            return
+        save_backend_choice(backend, fallbacks, self.path)
+        self.on_selected(backend, fallbacks)
+
+
+_selection = None
+_selection_lock = threading.Lock()
+
+
+def default_backends():
+    """The process-wide backend choice: the saved one if any, else select_backends()"""
+    global _selection
+    with _selection_lock:
+        if _selection is None:
+            _selection = (QR_BACKEND == "auto" and load_backend_choice()) or select_backends()
+        return _selection
+
+
+def create_fast_decoder(backend_name, fallback_names=()):
+    """FastQRDecoder with fresh backend instances (OpenCV detectors are not shared)"""
+    fallbacks = [create_backend(name) for name in fallback_names]
+    if not fallbacks:
+        fallback = None
+    elif len(fallbacks) == 1:
+        fallback = fallbacks[0]
+    else:
+        fallback = ChainedBackend(fallbacks)
+    return FastQRDecoder(backend=create_backend(backend_name), fallback=fallback)
+
+
+def create_decoder(mode=QR_DECODE_MODE):
+    """Return a callable mapping a frame to a list of DecodedQR"""
+    if mode == "full":
+        return decode_full
+    return create_fast_decoder(*default_backends()).decode
+
+
+class RecentScans:
+    """Per-employee debounce: which badges were seen in the last ``window`` seconds.
+
+    Sightings are kept in time buckets of ``bucket`` seconds. Lookups check
+    the few live buckets and whole buckets expire at once, so the map only
+    ever holds the badges seen in roughly the last window. Every sighting
+    refreshes the badge, so one held in view never fires twice; it fires
+    again only after it has been out of view for ``window`` seconds.
+    """
+
+    def __init__(self, window=3, bucket=1.0):
+        self.window = window
+        self.bucket = bucket
+        self._buckets = OrderedDict()  # bucket number -> {employee_id: last seen}
+        self._lock = threading.Lock()
+
+    def seen(self, employee_id, now=None):
+        """Record a sighting; True if the badge was already seen within the window"""
+        if self.window <= 0:
+            return False
+        now = time.monotonic() if now is None else now
+        current = int(now // self.bucket)
+        with self._lock:
+            # Drop buckets that are entirely older than the window
+            oldest = int((now - self.window) // self.bucket)
+            while self._buckets and next(iter(self._buckets)) < oldest:
+                self._buckets.popitem(last=False)
+
+            recent = False
+            for number, sightings in self._buckets.items():
+                last = sightings.get(employee_id)
+                if last is not None and now - last < self.window:
+                    recent = True
+                    if number != current:
+                        del sightings[employee_id]
+                    break
+            self._buckets.setdefault(current, {})[employee_id] = now
+            return recent
+
+
+class QRScanner:
+    """Frame -> badge scan step shared by the kiosk, gate server and benchmarks.
+
+    Decodes a frame and calls ``on_scan(employee_id)`` once for every
+    distinct valid badge in it. A badge is ignored until it has been out of
+    view for ``cooldown`` seconds (see RecentScans); other badges are not
+    held up by it. ``on_scan`` runs on the decode thread, so it should only
+    queue the check-in (see pipeline.ScanQueue).
+    """
+
+    def __init__(self, on_scan, cooldown=3, decode=None):
+        self.on_scan = on_scan
+        self.cooldown = cooldown
+        self.decode = decode or create_decoder()
+        self.recent = RecentScans(cooldown)
+
+    def scan(self, frame, now=None):
+        """Returns the employee ids passed to on_scan for this frame"""
+        with metrics.time("qr_decode"):
+            qr_codes = self.decode(frame)
+
+        now = time.monotonic() if now is None else now
+        scanned = []
+        for qr_code in qr_codes:
+            employee_id = employee_id_from_qr(qr_code.data)
+            if not employee_id:
+                continue
+            if self.recent.seen(employee_id, now):
+                metrics.inc("scans_debounced")
+                continue
+            scanned.append(employee_id)
+            self.on_scan(employee_id)
+        return scanned
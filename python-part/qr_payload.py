@@ -0,0 +1,127 @@
+import hashlib
+import hmac
+import json
+import os
+
+# --- Configuration ---
+# Read from environment variables or use default values
+# Shared secret for badge tags; badges fall back to legacy JSON without it
+QR_SIGNING_KEY = os.getenv("QR_SIGNING_KEY", "")
+# Keep accepting unsigned {"employee_id": ...} badges while reprinting
+QR_ACCEPT_LEGACY = os.getenv("QR_ACCEPT_LEGACY", "1") == "1"
+# ---------------------
+
+# Version prefix of the compact format; bump it if the layout changes
+VERSION = "A1"
+TAG_BYTES = 6
+
+# RFC 9285 alphabet, which is exactly the QR alphanumeric character set
+BASE45_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+_BASE45_VALUES = {char: value for value, char in enumerate(BASE45_ALPHABET)}
+
+
+def base45_encode(data):
+    chars = []
+    for i in range(0, len(data) - 1, 2):
+        n = data[i] * 256 + data[i + 1]
+        n, c = divmod(n, 45)
+        e, d = divmod(n, 45)
+        chars += [BASE45_ALPHABET[c], BASE45_ALPHABET[d], BASE45_ALPHABET[e]]
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        chars += [BASE45_ALPHABET[c], BASE45_ALPHABET[d]]
+    return "".join(chars)
+
+
+def base45_decode(text):
+    """Inverse of base45_encode; raises ValueError on malformed input"""
+    if len(text) % 3 == 1:
+        raise ValueError("invalid base45 length")
+    try:
+        values = [_BASE45_VALUES[char] for char in text]
+    except KeyError:
+        raise ValueError("invalid base45 character")
+    data = bytearray()
+    for i in range(0, len(values), 3):
+        chunk = values[i:i + 3]
+        if len(chunk) == 3:
+            n = chunk[0] + chunk[1] * 45 + chunk[2] * 45 * 45
+            if n > 0xFFFF:
+                raise ValueError("invalid base45 triplet")
+            data += bytes(divmod(n, 256))
+        else:
+            n = chunk[0] + chunk[1] * 45
+            if n > 0xFF:
+                raise ValueError("invalid base45 pair")
+            data.append(n)
+    return bytes(data)
+
+
+def _tag(employee_id_bytes, key):
+    return hmac.new(key, VERSION.encode("ascii") + employee_id_bytes, hashlib.sha256).digest()[:TAG_BYTES]
+
+
+def encode_payload(employee_id, key=QR_SIGNING_KEY):
+    """Compact signed badge text: VERSION + base45(employee id + HMAC tag).
+
+    Uses only QR alphanumeric characters, so the code is encoded at 5.5 bits
+    per character and typically one or two versions smaller than the JSON
+    payload.
+    """
+    if not key:
+        raise ValueError("QR_SIGNING_KEY is required for signed badges")
+    key = key.encode("utf-8") if isinstance(key, str) else key
+    employee_id_bytes = employee_id.encode("utf-8")
+    return VERSION + base45_encode(employee_id_bytes + _tag(employee_id_bytes, key))
+
+
+def legacy_payload(employee_id):
+    """The original unsigned JSON badge payload"""
+    return json.dumps({"employee_id": employee_id})
+
+
+def badge_payload(employee_id, key=QR_SIGNING_KEY):
+    """Payload to print on a new badge: signed if a key is configured"""
+    if key:
+        return encode_payload(employee_id, key)
+    return legacy_payload(employee_id)
+
+
+def decode_payload(data, key=QR_SIGNING_KEY, accept_legacy=QR_ACCEPT_LEGACY):
+    """(employee_id, kind) for a scanned badge; employee_id is None if rejected.
+
+    Compact badges are verified against the HMAC tag locally, no database
+    needed. kind is "signed" or "legacy" for accepted badges, otherwise the
+    reason: "malformed", "forged", "unverifiable" or "legacy_rejected".
+    """
+    try:
+        text = data.decode("utf-8") if isinstance(data, bytes) else data
+    except UnicodeDecodeError:
+        return None, "malformed"
+
+    if text.startswith(VERSION):
+        if not key:
+            return None, "unverifiable"
+        key = key.encode("utf-8") if isinstance(key, str) else key
+        try:
+            body = base45_decode(text[len(VERSION):])
+        except ValueError:
+            return None, "malformed"
+        employee_id_bytes, tag = body[:-TAG_BYTES], body[-TAG_BYTES:]
+        if not employee_id_bytes or not hmac.compare_digest(tag, _tag(employee_id_bytes, key)):
+            return None, "forged"
+        try:
+            return employee_id_bytes.decode("utf-8"), "signed"
+        except UnicodeDecodeError:
+            return None, "malformed"
+
+    if not accept_legacy:
+        return None, "legacy_rejected"
+    try:
+        employee_data = json.loads(text)
+    except json.JSONDecodeError:
+        return None, "malformed"
+    employee_id = employee_data.get("employee_id") if isinstance(employee_data, dict) else None
+    if not isinstance(employee_id, str) or not employee_id:
+        return None, "malformed"
+    return employee_id, "legacy"
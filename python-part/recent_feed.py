@@ -0,0 +1,118 @@
+import threading
+from datetime import datetime
+
+import pymongo
+
+from attendance_dedup import attendance_day, day_bounds
+
+PROJECTION = {"employee_id": 1, "name": 1, "check_in_time": 1, "attendance_day": 1}
+
+
+def record_key(record):
+    """Stable row id for a check-in: one per employee per day"""
+    day = record.get("attendance_day") or attendance_day(record["check_in_time"])
+    return f"{record['employee_id']}|{day}"
+
+
+class RecentAttendanceFeed:
+    """Today's latest check-ins, maintained incrementally.
+
+    Keeps at most ``size`` records sorted newest first. Every change is
+    returned as a list of operations for the view to replay, so a new
+    check-in costs one insert (and at most one eviction) regardless of how
+    many people have checked in today:
+
+        ("clear",)
+        ("insert", index, key, record)
+        ("delete", key)
+
+    ``poll`` only fetches documents inserted since the last poll, using the
+    monotonically increasing ``_id``, which also catches records a kiosk
+    uploads late with an earlier check-in time.
+    """
+
+    def __init__(self, collection, size=10, on_records=None):
+        self.collection = collection
+        self.size = size
+        # Called with every batch of records fetched from the database
+        self.on_records = on_records
+        self.day = None
+        self._records = []
+        self._keys = set()
+        self._last_id = None
+        self._lock = threading.Lock()
+
+    def reload(self, now=None):
+        """Rebuild from the database; returns the operations to redraw the view"""
+        now = now or datetime.now()
+        start, end = day_bounds(now)
+        newest = self.collection.find_one({}, {"_id": 1}, sort=[("_id", pymongo.DESCENDING)])
+        records = list(self.collection.find(
+            {"check_in_time": {"$gte": start, "$lt": end}}, PROJECTION
+        ).sort("check_in_time", pymongo.DESCENDING).limit(self.size))
+        if self.on_records is not None:
+            self.on_records(records)
+        with self._lock:
+            self.day = attendance_day(now)
+            self._records = []
+            self._keys = set()
+            self._last_id = newest["_id"] if newest else None
+            ops = [("clear",)]
+            for record in records:
+                ops += self._add(record)
+        return ops
+
+    def poll(self, now=None):
+        """Fetch check-ins written since the last poll"""
+        now = now or datetime.now()
+        if attendance_day(now) != self.day:
+            return self.reload(now)
+        start, end = day_bounds(now)
+        query = {"check_in_time": {"$gte": start, "$lt": end}}
+        if self._last_id is not None:
+            query["_id"] = {"$gt": self._last_id}
+        records = list(self.collection.find(query, PROJECTION).sort("_id", pymongo.ASCENDING))
+        if self.on_records is not None and records:
+            self.on_records(records)
+        ops = []
+        with self._lock:
+            for record in records:
+                self._last_id = record["_id"]
+                ops += self._add(record)
+        return ops
+
+    def add(self, record, now=None):
+        """Show a record accepted on this kiosk before it reaches the database"""
+        now = now or datetime.now()
+        with self._lock:
+            if attendance_day(now) != self.day:
+                # Rolled over since the last poll; start the new day empty
+                self.day = attendance_day(now)
+                self._records = []
+                self._keys = set()
+                return [("clear",)] + self._add(record)
+            return self._add(record)
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def _add(self, record):
+        key = record_key(record)
+        if key in self._keys:
+            return []
+        # Find the slot keeping the list newest first (at most `size` steps)
+        index = 0
+        while index < len(self._records) and self._records[index]["check_in_time"] >= record["check_in_time"]:
+            index += 1
+        if index >= self.size:
+            return []
+        self._records.insert(index, record)
+        self._keys.add(key)
+        ops = [("insert", index, key, record)]
+        if len(self._records) > self.size:
+            evicted = self._records.pop()
+            evicted_key = record_key(evicted)
+            self._keys.discard(evicted_key)
+            ops.append(("delete", evicted_key))
+        return ops
@@ -0,0 +1,219 @@
+import argparse
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import pymongo
+
+from attendance_dedup import attendance_day
+
+# --- Configuration ---
+# Read from environment variables or use default values
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DB_NAME = os.getenv("DB_NAME", "attendance_system")
+ROLLUP_COLLECTION = "attendance_daily"
+# ---------------------
+
+UNASSIGNED = "Unassigned"
+
+
+def field_key(name):
+    """Department/method name usable as a field name in $inc paths"""
+    name = str(name or UNASSIGNED).replace(".", "_")
+    return "_" + name[1:] if name.startswith("$") else name
+
+
+class AttendanceRollups:
+    """Per-day attendance counters in the attendance_daily collection.
+
+    One document per day, keyed by attendance_day::
+
+        {"_id": "2025-06-30", "present": 42, "headcount": 50,
+         "by_department": {"Engineering": 20, ...},
+         "by_method": {"qr_only": 40, "manual": 2}}
+
+    ``record`` is called by the attendance writer with newly inserted
+    check-ins, so reading stats for a day is a single _id lookup and a date
+    range is one document per day. ``backfill`` rebuilds counters for
+    existing data with an aggregation that ``$merge``s into the collection.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db[ROLLUP_COLLECTION]
+
+    def headcount(self):
+        # Collection metadata, so constant time however many employees
+        return self.db["employees"].estimated_document_count()
+
+    def record(self, records):
+        """Add newly inserted check-in records to their days' counters"""
+        increments = defaultdict(Counter)
+        for record in records:
+            counters = increments[record.get("attendance_day") or attendance_day(record["check_in_time"])]
+            counters["present"] += 1
+            counters["by_department." + field_key(record.get("department"))] += 1
+            counters["by_method." + field_key(record.get("verification_method"))] += 1
+        # A flushed batch almost always falls on one day, so one update_one
+        # per day costs the same round trips as a bulk_write (and also runs
+        # on mongomock, whose bulk_write rejects pymongo 4.11+ UpdateOne)
+        for day, counters in increments.items():
+            self.collection.update_one(
+                {"_id": day},
+                {
+                    "$inc": dict(counters),
+                    # Headcount is taken when the day's first check-in arrives
+                    "$setOnInsert": {"headcount": self.headcount()},
+                },
+                upsert=True,
+            )
+
+    def day_stats(self, day):
+        """Counters for one day ('YYYY-MM-DD' or datetime)"""
+        if isinstance(day, datetime):
+            day = attendance_day(day)
+        doc = self.collection.find_one({"_id": day}) or {"_id": day}
+        return self._normalize(doc)
+
+    def range_stats(self, start, end):
+        """Summed counters for every day from start to end inclusive"""
+        if isinstance(start, datetime):
+            start = attendance_day(start)
+        if isinstance(end, datetime):
+            end = attendance_day(end)
+        totals = {"present": 0, "days": 0, "by_department": Counter(), "by_method": Counter()}
+        for doc in self.collection.find({"_id": {"$gte": start, "$lte": end}}):
+            doc = self._normalize(doc)
+            totals["present"] += doc["present"]
+            totals["days"] += 1
+            totals["by_department"].update(doc["by_department"])
+            totals["by_method"].update(doc["by_method"])
+        totals["by_department"] = dict(totals["by_department"])
+        totals["by_method"] = dict(totals["by_method"])
+        return totals
+
+    def _normalize(self, doc):
+        return {
+            "day": doc["_id"],
+            "present": doc.get("present", 0),
+            "headcount": doc["headcount"] if "headcount" in doc else self.headcount(),
+            "by_department": doc.get("by_department", {}),
+            "by_method": doc.get("by_method", {}),
+        }
+
+    def backfill(self, start=None, end=None):
+        """Recompute counters from the attendance collection via $merge.
+
+        Not atomic with the writers' live $inc, so run it while kiosks are
+        idle (e.g. overnight); increments landing mid-recount are lost or
+        counted twice.
+        """
+        match = {}
+        if start or end:
+            match["check_in_time"] = {}
+            if start:
+                match["check_in_time"]["$gte"] = start
+            if end:
+                match["check_in_time"]["$lt"] = end
+
+        def sanitized(expression):
+            return {"$replaceAll": {"input": {"$toString": expression}, "find": ".", "replacement": "_"}}
+
+        def counts_by(field):
+            # {name: n} object from the day's (department, method, n) rows
+            return {"$arrayToObject": {"$map": {
+                "input": {"$setUnion": ["$rows." + field]},
+                "as": "name",
+                "in": {"k": "$$name", "v": {"$sum": {"$map": {
+                    "input": {"$filter": {"input": "$rows", "cond": {"$eq": ["$$this." + field, "$$name"]}}},
+                    "in": "$$this.n",
+                }}}},
+            }}}
+
+        pipeline = [
+            {"$match": match},
+            # Older records have no department; take it from the employee
+            {"$lookup": {
+                "from": "employees",
+                "localField": "employee_id",
+                "foreignField": "employee_id",
+                "as": "employee",
+            }},
+            {"$group": {
+                "_id": {
+                    "day": {"$ifNull": [
+                        "$attendance_day",
+                        {"$dateToString": {"format": "%Y-%m-%d", "date": "$check_in_time"}},
+                    ]},
+                    "department": sanitized({"$ifNull": [
+                        "$department", {"$first": "$employee.department"}, UNASSIGNED,
+                    ]}),
+                    "method": sanitized({"$ifNull": ["$verification_method", UNASSIGNED]}),
+                },
+                "n": {"$sum": 1},
+            }},
+            {"$group": {
+                "_id": "$_id.day",
+                "present": {"$sum": "$n"},
+                "rows": {"$push": {"department": "$_id.department", "method": "$_id.method", "n": "$n"}},
+            }},
+            {"$project": {
+                "present": 1,
+                "by_department": counts_by("department"),
+                "by_method": counts_by("method"),
+                "headcount": {"$literal": self.headcount()},
+            }},
+            {"$merge": {
+                "into": ROLLUP_COLLECTION,
+                "on": "_id",
+                # Recount everything but keep the headcount recorded on the day
+                "whenMatched": [{"$set": {
+                    "present": "$$new.present",
+                    "by_department": "$$new.by_department",
+                    "by_method": "$$new.by_method",
+                    "headcount": {"$ifNull": ["$headcount", "$$new.headcount"]},
+                }}],
+                "whenNotMatched": "insert",
+            }},
+        ]
+        self.db["attendance"].aggregate(pipeline, allowDiskUse=True)
+
+
+def format_breakdown(stats):
+    """Per-department and per-method lines for a stats dict"""
+    lines = []
+    for title, key in (("By department", "by_department"), ("By method", "by_method")):
+        if stats[key]:
+            lines.append(f"{title}:")
+            for name, count in sorted(stats[key].items(), key=lambda item: -item[1]):
+                lines.append(f"  {name}: {count}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain and query daily attendance rollups.")
+    parser.add_argument("--backfill", action="store_true", help="recompute rollups from the attendance collection")
+    parser.add_argument("--start", help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", help="last day, YYYY-MM-DD (inclusive)")
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start, "%Y-%m-%d") if args.start else None
+    end = datetime.strptime(args.end, "%Y-%m-%d") + timedelta(days=1) if args.end else None
+
+    client = pymongo.MongoClient(MONGO_URI)
+    try:
+        rollups = AttendanceRollups(client[DB_NAME])
+        if args.backfill:
+            rollups.backfill(start, end)
+            print("✅ Rollups backfilled")
+        today = datetime.now()
+        stats = rollups.range_stats(start or today, (end - timedelta(days=1)) if end else today)
+        print(f"{stats['days']} day(s) with attendance")
+        print(f"Present: {stats['present']}")
+        print(format_breakdown(stats))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import os
+
+import cv2
+import numpy as np
+import qrcode
+
+from qr_payload import badge_payload
+
+
+def make_badge(payload, module_px=8, border=4):
+    """Render a QR payload as a black-on-white grayscale image"""
+    qr = qrcode.QRCode(border=border, error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    matrix = np.array(qr.get_matrix(), dtype=np.uint8)
+    modules = np.where(matrix == 1, 0, 255).astype(np.uint8)
+    size = modules.shape[0] * module_px
+    return cv2.resize(modules, (size, size), interpolation=cv2.INTER_NEAREST)
+
+
+def employee_payload(employee_id):
+    """The payload printed on a badge (signed if QR_SIGNING_KEY is set)"""
+    return badge_payload(employee_id)
+
+
+def render_frame(badge, resolution=(1280, 720), badge_width=None, center=None, angle=0.0,
+                 blur=0, brightness=0, contrast=1.0, noise=4.0, rng=None):
+    """Place a badge on a textured background and apply camera-like degradations.
+
+    ``badge_width`` is the on-screen badge size in pixels, ``blur`` a
+    Gaussian sigma, and ``brightness``/``contrast`` a linear lighting change.
+    Returns a BGR frame of the given resolution.
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    width, height = resolution
+
+    # Smooth gradient plus low-frequency texture, roughly like an office wall
+    xs = np.linspace(90, 170, width, dtype=np.float32)
+    background = np.tile(xs, (height, 1))
+    texture = rng.normal(0, 20, (max(1, height // 16), max(1, width // 16))).astype(np.float32)
+    background += cv2.resize(texture, (width, height), interpolation=cv2.INTER_CUBIC)
+
+    frame = background
+    if badge is not None:
+        if badge_width is None:
+            badge_width = height // 3
+        scale = badge_width / float(badge.shape[1])
+        if center is None:
+            center = (width / 2.0, height / 2.0)
+        # Rotate and scale the badge about its own center, then move it
+        matrix = cv2.getRotationMatrix2D((badge.shape[1] / 2.0, badge.shape[0] / 2.0), angle, scale)
+        matrix[0, 2] += center[0] - badge.shape[1] / 2.0
+        matrix[1, 2] += center[1] - badge.shape[0] / 2.0
+        warped = cv2.warpAffine(badge.astype(np.float32), matrix, (width, height), flags=cv2.INTER_LINEAR, borderValue=-1)
+        mask = cv2.warpAffine(np.ones_like(badge, dtype=np.float32), matrix, (width, height), flags=cv2.INTER_LINEAR)
+        frame = background * (1 - mask) + np.clip(warped, 0, 255) * mask
+
+    if blur:
+        frame = cv2.GaussianBlur(frame, (0, 0), blur)
+    frame = frame * contrast + brightness
+    if noise:
+        frame = frame + rng.normal(0, noise, frame.shape).astype(np.float32)
+    gray = np.clip(frame, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def approach_clip(payload, resolution=(1280, 720), frames=60, lead_in=10, badge_fraction=0.25,
+                  angle=0.0, blur=0, brightness=0, contrast=1.0, seed=0):
+    """A person walking up to the camera: empty frames, then a badge that
+    grows to ``badge_fraction`` of the frame height while drifting.
+
+    Returns (frames, index of the first frame showing the badge).
+    """
+    rng = np.random.default_rng(seed)
+    badge = make_badge(payload)
+    width, height = resolution
+    clip = []
+    for i in range(frames):
+        if i < lead_in:
+            clip.append(render_frame(None, resolution, brightness=brightness, contrast=contrast, rng=rng))
+            continue
+        t = (i - lead_in) / float(max(1, frames - lead_in - 1))
+        size = badge_fraction * (0.6 + 0.4 * min(1.0, 2 * t))
+        center = (width * (0.45 + 0.1 * np.sin(t * 3)), height * (0.5 + 0.05 * np.cos(t * 5)))
+        clip.append(render_frame(
+            badge, resolution,
+            badge_width=int(height * size),
+            center=center,
+            angle=angle + 3 * np.sin(t * 7),
+            blur=blur,
+            brightness=brightness,
+            contrast=contrast,
+            rng=rng,
+        ))
+    return clip, lead_in
+
+
+def write_video(path, employee_ids, resolution=(1280, 720), fps=15, frames_per_badge=45):
+    """Record badges walking up one after another, e.g. to replay through the gate server.
+
+    Returns the number of frames written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, resolution)
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open {path} for writing")
+    count = 0
+    try:
+        for seed, employee_id in enumerate(employee_ids):
+            clip, _ = approach_clip(employee_payload(employee_id), resolution, frames=frames_per_badge,
+                                    lead_in=frames_per_badge // 3, seed=seed)
+            for frame in clip:
+                writer.write(frame)
+                count += 1
+    finally:
+        writer.release()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic entrance recording (no camera needed).")
+    parser.add_argument("path", help="video file to write, e.g. recordings/entrance.mp4")
+    parser.add_argument("--employees", nargs="+", default=["EMP001", "EMP002", "EMP003"], help="badges to show")
+    parser.add_argument("--fps", type=int, default=15)
+    args = parser.parse_args()
+    count = write_video(args.path, args.employees, fps=args.fps)
+    print(f"✅ {count} frames, {len(args.employees)} badges written to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from attendance_dedup import CheckOutRules, DailyAttendanceSet  # noqa: E402
+
+RULES = CheckOutRules(min_minutes=60, repeat_minutes=5)
+CHECK_IN = datetime(2025, 3, 3, 9, 0)
+
+
+def test_check_out_needs_min_minutes_after_check_in():
+    assert not RULES.allows(CHECK_IN, None, CHECK_IN + timedelta(minutes=59, seconds=59))
+    assert RULES.allows(CHECK_IN, None, CHECK_IN + timedelta(minutes=60))
+
+
+def test_later_check_out_needs_repeat_minutes():
+    check_out = CHECK_IN + timedelta(hours=8)
+    assert not RULES.allows(CHECK_IN, check_out, check_out + timedelta(minutes=4, seconds=59))
+    assert RULES.allows(CHECK_IN, check_out, check_out + timedelta(minutes=5))
+
+
+def test_min_minutes_applies_before_repeat_minutes():
+    # A recorded check-out does not let a scan through before min_minutes
+    check_out = CHECK_IN + timedelta(minutes=1)
+    assert not RULES.allows(CHECK_IN, check_out, CHECK_IN + timedelta(minutes=30))
+
+
+def test_daily_set_check_out():
+    today = DailyAttendanceSet(collection=None)
+    today.day = "2025-03-03"
+    assert today.mark("E1", CHECK_IN)
+    assert not today.mark("E1", CHECK_IN + timedelta(minutes=1))
+
+    assert today.check_out("E1", CHECK_IN + timedelta(minutes=30), RULES) == (False, None)
+    first = CHECK_IN + timedelta(hours=8)
+    assert today.check_out("E1", first, RULES) == (True, None)
+    assert today.check_out("E1", first + timedelta(minutes=2), RULES) == (False, None)
+    assert today.check_out("E1", first + timedelta(minutes=5), RULES) == (True, first)
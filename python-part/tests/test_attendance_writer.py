@@ -0,0 +1,192 @@
+import sqlite3
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pytest
+
+pymongo = pytest.importorskip("pymongo")
+
+from attendance_dedup import CHECK_OUT, CheckOutRules  # noqa: E402
+from attendance_writer import DUPLICATE_KEY_ERROR, AttendanceJournal, AttendanceWriter  # noqa: E402
+
+BulkResult = namedtuple("BulkResult", ["upserted_ids"])
+UpdateResult = namedtuple("UpdateResult", ["matched_count"])
+
+MORNING = datetime(2025, 3, 3, 9, 0)
+RULES = CheckOutRules(min_minutes=60, repeat_minutes=5)
+
+
+class FakeAttendance:
+    """Records bulk upserts and check-out updates; answers from scripted results"""
+
+    def __init__(self):
+        self.bulks = []
+        self.updates = []
+        self.bulk_results = []
+        self.matched = {}
+        self.update_error = None
+
+    def bulk_write(self, operations, ordered):
+        assert ordered
+        self.bulks.append([operation._filter["employee_id"] for operation in operations])
+        result = self.bulk_results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def update_one(self, query, update):
+        if self.update_error is not None:
+            raise self.update_error
+        self.updates.append((query["employee_id"], update["$max"]["check_out_time"]))
+        return UpdateResult(self.matched.get(query["employee_id"], 1))
+
+
+class FakeRollups:
+    def __init__(self):
+        self.recorded = []
+
+    def record(self, records):
+        self.recorded.append([record["employee_id"] for record in records])
+
+
+def check_in(employee_id, minutes=0):
+    return {"employee_id": employee_id, "name": employee_id, "check_in_time": MORNING + timedelta(minutes=minutes)}
+
+
+def check_out(employee_id, hours):
+    moment = MORNING + timedelta(hours=hours)
+    return {"employee_id": employee_id, "attendance_day": "2025-03-03", "check_out_time": moment}
+
+
+def write_error(index, code, errmsg="error"):
+    return {"index": index, "code": code, "errmsg": errmsg}
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "journal.db")
+
+
+@pytest.fixture
+def writer(journal_path):
+    writer = AttendanceWriter(FakeAttendance(), journal=AttendanceJournal(journal_path), rollups=FakeRollups(),
+                              check_out=RULES)
+    yield writer
+    writer.journal.close()
+
+
+def pending_ids(writer):
+    return [record["employee_id"] for _, _, record in writer.journal.pending(100)]
+
+
+def rejected(journal_path):
+    with sqlite3.connect(journal_path) as conn:
+        return [error for error, in conn.execute("SELECT error FROM rejected ORDER BY id")]
+
+
+def test_batch_upserted(writer):
+    for employee_id in ["A", "B", "C"]:
+        writer.submit(check_in(employee_id))
+    # B's record already existed (written by another kiosk)
+    writer.collection.bulk_results.append(BulkResult({0: "id-a", 2: "id-c"}))
+
+    assert writer.flush_once() is False
+    assert writer.collection.bulks == [["A", "B", "C"]]
+    assert writer.rollups.recorded == [["A", "C"]]
+    # The existing record gets B's scan as a check-out, under the rules' filter
+    assert writer.collection.updates == [("B", MORNING)]
+    assert writer.duplicates == 1
+    assert writer.flushed == 3
+    assert pending_ids(writer) == []
+
+
+def test_ordered_error_on_duplicate_key(writer):
+    for employee_id in ["A", "B", "C", "D"]:
+        writer.submit(check_in(employee_id))
+    # A inserted, B matched, C lost a race with another kiosk; D was never tried
+    writer.collection.bulk_results.append(pymongo.errors.BulkWriteError({
+        "writeErrors": [write_error(2, DUPLICATE_KEY_ERROR)],
+        "upserted": [{"index": 0, "_id": "id-a"}],
+    }))
+
+    assert writer.flush_once() is True
+    assert writer.rollups.recorded == [["A"]]
+    assert writer.collection.updates == [("B", MORNING)]
+    assert writer.duplicates == 2
+    assert writer.flushed == 3
+    assert pending_ids(writer) == ["D"]
+
+
+def test_ordered_error_rejects_record(writer, journal_path):
+    for employee_id in ["A", "B", "C"]:
+        writer.submit(check_in(employee_id))
+    writer.collection.bulk_results.append(pymongo.errors.BulkWriteError({
+        "writeErrors": [write_error(1, 121, "Document failed validation")],
+        "upserted": [{"index": 0, "_id": "id-a"}],
+    }))
+
+    assert writer.flush_once() is True
+    assert writer.rollups.recorded == [["A"]]
+    assert writer.collection.updates == []
+    assert rejected(journal_path) == ["Document failed validation"]
+    assert pending_ids(writer) == ["C"]
+    assert writer.flushed == 1
+
+
+def test_write_concern_error_keeps_batch(writer):
+    for employee_id in ["A", "B"]:
+        writer.submit(check_in(employee_id))
+    writer.collection.bulk_results.append(pymongo.errors.BulkWriteError({
+        "writeErrors": [],
+        "writeConcernErrors": [{"code": 64, "errmsg": "waiting for replication timed out"}],
+    }))
+
+    with pytest.raises(pymongo.errors.BulkWriteError):
+        writer.flush_once()
+    assert pending_ids(writer) == ["A", "B"]
+    assert writer.rollups.recorded == []
+
+
+def test_failed_rescan_retries_batch(writer):
+    for employee_id in ["A", "B"]:
+        writer.submit(check_in(employee_id))
+    writer.collection.bulk_results.append(BulkResult({0: "id-a"}))
+    writer.collection.update_error = pymongo.errors.AutoReconnect("connection lost")
+
+    with pytest.raises(pymongo.errors.AutoReconnect):
+        writer.flush_once()
+    # Nothing is removed until B's check-out made it, so the batch is replayed
+    assert pending_ids(writer) == ["A", "B"]
+
+
+def test_check_outs_split_runs(writer, journal_path):
+    writer.submit(check_in("A"))
+    writer.submit(check_in("B", minutes=1))
+    writer.submit(check_out("A", hours=8), CHECK_OUT)
+    writer.submit(check_out("Z", hours=8), CHECK_OUT)
+    writer.submit(check_in("C", minutes=2))
+    writer.collection.bulk_results += [BulkResult({0: "id-a", 1: "id-b"}), BulkResult({0: "id-c"})]
+    writer.collection.matched["Z"] = 0
+
+    while writer.flush_once():
+        pass
+    # The check-out waits for the check-ins before it and goes before the one after
+    assert writer.collection.bulks == [["A", "B"], ["C"]]
+    assert writer.collection.updates == [("A", MORNING + timedelta(hours=8)), ("Z", MORNING + timedelta(hours=8))]
+    assert writer.rollups.recorded == [["A", "B"], ["C"]]
+    # Z never checked in: nothing to check out of
+    assert rejected(journal_path) == ["no attendance record to check out of"]
+    assert pending_ids(writer) == []
+
+
+def test_journal_replayed_after_restart(journal_path):
+    first = AttendanceWriter(FakeAttendance(), journal=AttendanceJournal(journal_path))
+    first.submit(check_in("A"))
+    first.journal.close()
+
+    second = AttendanceWriter(FakeAttendance(), journal=AttendanceJournal(journal_path))
+    second.collection.bulk_results.append(BulkResult({0: "id-a"}))
+    assert second.flush_once() is False
+    assert second.collection.bulks == [["A"]]
+    assert pending_ids(second) == []
+    second.journal.close()
@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("pymongo")
+
+from attendance_writer import AttendanceJournal  # noqa: E402
+from employee_cache import EmployeeDirectory  # noqa: E402
+
+EMPLOYEES = [
+    {"employee_id": "E1", "name": "Ada", "department": "Ops"},
+    {"employee_id": "E2", "name": "Grace", "department": None},
+]
+
+
+class FakeEmployees:
+    def __init__(self, docs):
+        self.docs = docs
+        self.find_one_calls = 0
+
+    def find(self, query, projection):
+        return [dict(doc) for doc in self.docs]
+
+    def find_one(self, query, projection):
+        self.find_one_calls += 1
+        return next((dict(doc) for doc in self.docs if doc["employee_id"] == query["employee_id"]), None)
+
+
+def test_snapshot_survives_restart(tmp_path):
+    journal = AttendanceJournal(str(tmp_path / "journal.db"))
+    EmployeeDirectory(FakeEmployees(EMPLOYEES), snapshot=journal).load()
+    journal.close()
+
+    # Next start, database down: nothing is loaded, the snapshot answers
+    offline = FakeEmployees([])
+    directory = EmployeeDirectory(offline, snapshot=AttendanceJournal(str(tmp_path / "journal.db")))
+    directory.restore()
+    directory.online = False
+    assert directory.get("E1") == EMPLOYEES[0]
+    assert directory.get("E2") == EMPLOYEES[1]
+    assert len(directory) == 2
+
+
+def test_offline_miss_skips_find_one(tmp_path):
+    employees = FakeEmployees(EMPLOYEES)
+    directory = EmployeeDirectory(employees, snapshot=AttendanceJournal(str(tmp_path / "journal.db")))
+    directory.online = False
+    assert directory.get("E1") is None
+    assert employees.find_one_calls == 0
+
+    directory.online = True
+    assert directory.get("E1") == EMPLOYEES[0]
+    assert employees.find_one_calls == 1
+
+
+def test_load_replaces_snapshot(tmp_path):
+    journal = AttendanceJournal(str(tmp_path / "journal.db"))
+    EmployeeDirectory(FakeEmployees(EMPLOYEES), snapshot=journal).load()
+    EmployeeDirectory(FakeEmployees(EMPLOYEES[1:]), snapshot=journal).load()
+    assert journal.employees() == EMPLOYEES[1:]
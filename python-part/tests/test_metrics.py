@@ -0,0 +1,48 @@
+import re
+
+from metrics import Metrics
+
+# Prometheus text format: name{label="value",...} value
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*"(,[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*")*\})? \S+$')
+
+
+def gate_stats():
+    return {
+        "scans": {"marked": 2},
+        "sources": {
+            "entrance-1": {"capture": {"processed": 3, "dropped": 1}, "motion": {"state": "idle"}},
+            'front "door"': {"capture": {"processed": 4, "dropped": 0}},
+        },
+    }
+
+
+def test_gauges_in_snapshot():
+    metrics = Metrics()
+    metrics.register("gate", gate_stats, labels={"sources": "source"})
+    assert metrics.snapshot()["gauges"] == {"gate": gate_stats()}
+
+
+def test_gauge_keys_become_labels():
+    metrics = Metrics()
+    metrics.register("gate", gate_stats, labels={"sources": "source"})
+    lines = metrics.prometheus().splitlines()
+    assert 'attendance_gate_capture_processed{source="entrance-1"} 3' in lines
+    assert 'attendance_gate_capture_processed{source="front \\"door\\""} 4' in lines
+    assert "attendance_gate_scans_marked 2" in lines
+    # Strings are not gauges
+    assert not any("motion_state" in line for line in lines)
+    assert lines.count("# TYPE attendance_gate_capture_processed gauge") == 1
+
+
+def test_gauge_names_are_valid():
+    metrics = Metrics()
+    metrics.register("pipe line", gate_stats)
+    for line in metrics.prometheus().splitlines():
+        if not line.startswith("#"):
+            assert SAMPLE.match(line), line
+
+
+def test_failing_provider_is_skipped():
+    metrics = Metrics()
+    metrics.register("broken", lambda: 1 / 0)
+    assert metrics.snapshot()["gauges"] == {}
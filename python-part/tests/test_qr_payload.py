@@ -0,0 +1,95 @@
+import pytest
+
+from qr_payload import (
+    VERSION,
+    base45_decode,
+    base45_encode,
+    decode_payload,
+    encode_payload,
+    legacy_payload,
+)
+
+KEY = "test-signing-key"
+
+
+@pytest.mark.parametrize("data", [b"", b"A", b"AB", b"EMP00042", bytes(range(256)), b"\xff\xff\xff"])
+def test_base45_round_trip(data):
+    assert base45_decode(base45_encode(data)) == data
+
+
+def test_base45_rfc_vectors():
+    # RFC 9285 section 4.4
+    assert base45_encode(b"AB") == "BB8"
+    assert base45_encode(b"Hello!!") == "%69 VD92EX0"
+    assert base45_decode("QED8WEX0") == b"ietf!"
+
+
+def test_base45_rejects_bad_triplet():
+    # ":::" is 44 + 44 * 45 + 44 * 45 * 45 > 0xFFFF
+    with pytest.raises(ValueError, match="triplet"):
+        base45_decode(":::")
+
+
+def test_base45_rejects_bad_pair():
+    with pytest.raises(ValueError, match="pair"):
+        base45_decode("::")
+
+
+def test_base45_rejects_bad_length():
+    with pytest.raises(ValueError, match="length"):
+        base45_decode("BB8B")
+
+
+def test_base45_rejects_bad_character():
+    with pytest.raises(ValueError, match="character"):
+        base45_decode("bb8")
+
+
+def test_signed_payload_round_trip():
+    payload = encode_payload("EMP00042", KEY)
+    assert payload.startswith(VERSION)
+    assert decode_payload(payload, KEY) == ("EMP00042", "signed")
+    assert decode_payload(payload.encode("ascii"), KEY) == ("EMP00042", "signed")
+
+
+def test_signed_payload_is_smaller_than_legacy():
+    assert len(encode_payload("EMP00042", KEY)) < len(legacy_payload("EMP00042"))
+
+
+def test_encode_requires_key():
+    with pytest.raises(ValueError):
+        encode_payload("EMP00042", "")
+
+
+def test_forged_with_other_key():
+    payload = encode_payload("EMP00042", "another-key")
+    assert decode_payload(payload, KEY) == (None, "forged")
+
+
+def test_forged_with_changed_employee_id():
+    body = base45_decode(encode_payload("EMP00042", KEY)[len(VERSION):])
+    tampered = VERSION + base45_encode(b"EMP00043" + body[-6:])
+    assert decode_payload(tampered, KEY) == (None, "forged")
+
+
+def test_unverifiable_without_key():
+    payload = encode_payload("EMP00042", KEY)
+    assert decode_payload(payload, "") == (None, "unverifiable")
+
+
+def test_malformed_signed_body():
+    assert decode_payload(VERSION + ":::", KEY) == (None, "malformed")
+
+
+def test_legacy_json_accepted():
+    assert decode_payload(legacy_payload("EMP00042"), KEY, accept_legacy=True) == ("EMP00042", "legacy")
+    assert decode_payload(b'{"employee_id": "EMP7", "name": "x"}', "", accept_legacy=True) == ("EMP7", "legacy")
+
+
+def test_legacy_rejected():
+    assert decode_payload(legacy_payload("EMP00042"), KEY, accept_legacy=False) == (None, "legacy_rejected")
+
+
+@pytest.mark.parametrize("data", [b"not json", b'{"name": "x"}', b'{"employee_id": 42}', b'["EMP1"]', b"\xff\xfe"])
+def test_legacy_malformed(data):
+    assert decode_payload(data, KEY, accept_legacy=True) == (None, "malformed")
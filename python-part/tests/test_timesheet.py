@@ -0,0 +1,97 @@
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pymongo")
+
+from timesheet import AttendanceEvents, daily, summarize  # noqa: E402
+
+
+def events(records):
+    """AttendanceEvents from (employee_id, check_in, check_out or None) tuples"""
+    codes = {}
+    employee = [codes.setdefault(employee_id, len(codes)) for employee_id, _, _ in records]
+    return AttendanceEvents(
+        list(codes),
+        np.array(employee, dtype=np.int32),
+        np.array([check_in for _, check_in, _ in records], dtype="datetime64[s]"),
+        np.array([check_out for _, _, check_out in records], dtype="datetime64[s]"),
+    )
+
+
+def test_full_day_with_overtime():
+    rows = daily(events([("E1", datetime(2025, 3, 3, 9, 0), datetime(2025, 3, 3, 18, 30))]),
+                 workday_start="09:00", grace_minutes=5, standard_hours=8)
+    assert rows["worked_minutes"].tolist() == [570.0]
+    assert rows["overtime_minutes"].tolist() == [90.0]
+    assert rows["late_minutes"].tolist() == [0.0]
+
+
+def test_missing_check_out_is_nan():
+    ev = events([
+        ("E1", datetime(2025, 3, 3, 9, 0), None),
+        ("E1", datetime(2025, 3, 4, 9, 0), datetime(2025, 3, 4, 17, 0)),
+    ])
+    rows = daily(ev, standard_hours=8)
+    assert np.isnat(rows["check_out"][0])
+    assert np.isnan(rows["worked_minutes"][0])
+    assert np.isnan(rows["overtime_minutes"][0])
+
+    totals = summarize(ev, rows)
+    assert totals["days"].tolist() == [2]
+    assert totals["missing_check_outs"].tolist() == [1]
+    assert totals["worked_hours"].tolist() == [8.0]
+    assert totals["overtime_hours"].tolist() == [0.0]
+
+
+def test_legacy_duplicates_collapse_into_one_day():
+    # Records from before the unique per-day index: earliest check-in, latest check-out
+    ev = events([
+        ("E1", datetime(2025, 3, 3, 9, 30), datetime(2025, 3, 3, 12, 0)),
+        ("E1", datetime(2025, 3, 3, 8, 55), None),
+        ("E1", datetime(2025, 3, 3, 10, 0), datetime(2025, 3, 3, 17, 55)),
+    ])
+    rows = daily(ev, workday_start="09:00", grace_minutes=5, standard_hours=8)
+    assert len(rows["day"]) == 1
+    assert rows["check_in"][0] == np.datetime64("2025-03-03T08:55:00")
+    assert rows["check_out"][0] == np.datetime64("2025-03-03T17:55:00")
+    assert rows["worked_minutes"].tolist() == [540.0]
+
+    totals = summarize(ev, rows)
+    assert totals["days"].tolist() == [1]
+    assert totals["missing_check_outs"].tolist() == [0]
+
+
+def test_late_arrival_grace_period():
+    ev = events([
+        ("E1", datetime(2025, 3, 3, 9, 5), None),   # at the end of the grace period
+        ("E2", datetime(2025, 3, 3, 9, 6), None),   # just past it
+        ("E3", datetime(2025, 3, 3, 8, 45), None),  # early
+    ])
+    rows = daily(ev, workday_start="09:00", grace_minutes=5)
+    late = dict(zip((ev.employee_ids[i] for i in rows["employee"]), rows["late_minutes"].tolist()))
+    assert late == {"E1": 0.0, "E2": 6.0, "E3": 0.0}
+
+    totals = summarize(ev, rows)
+    assert totals["late_days"].tolist() == [0, 1, 0]
+    assert totals["late_minutes"].tolist() == [0.0, 6.0, 0.0]
+
+
+def test_days_and_employees_are_kept_apart():
+    ev = events([
+        ("E2", datetime(2025, 3, 4, 9, 0), datetime(2025, 3, 4, 13, 0)),
+        ("E1", datetime(2025, 3, 3, 9, 0), datetime(2025, 3, 3, 17, 0)),
+        ("E1", datetime(2025, 3, 4, 9, 0), datetime(2025, 3, 4, 19, 0)),
+    ])
+    totals = summarize(ev, daily(ev, standard_hours=8))
+    assert dict(zip(totals["employee_id"], totals["days"].tolist())) == {"E2": 1, "E1": 2}
+    assert dict(zip(totals["employee_id"], totals["worked_hours"].tolist())) == {"E2": 4.0, "E1": 18.0}
+    assert dict(zip(totals["employee_id"], totals["overtime_hours"].tolist())) == {"E2": 0.0, "E1": 2.0}
+
+
+def test_no_events():
+    ev = events([])
+    rows = daily(ev)
+    assert len(rows["day"]) == 0
+    assert summarize(ev, rows)["days"].tolist() == []
@@ -0,0 +1,190 @@
+import argparse
+import csv
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pymongo
+
+# --- Configuration ---
+# Read from environment variables or use default values
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DB_NAME = os.getenv("DB_NAME", "attendance_system")
+# Check-ins after WORKDAY_START plus the grace period count as late
+WORKDAY_START = os.getenv("WORKDAY_START", "09:00")
+LATE_GRACE_MINUTES = float(os.getenv("LATE_GRACE_MINUTES", "5"))
+# Time worked beyond this is overtime
+STANDARD_HOURS = float(os.getenv("STANDARD_HOURS", "8"))
+TIMESHEET_BATCH_SIZE = int(os.getenv("TIMESHEET_BATCH_SIZE", "10000"))
+# ---------------------
+
+PROJECTION = {"_id": 0, "employee_id": 1, "check_in_time": 1, "check_out_time": 1}
+MINUTE = np.timedelta64(1, "m")
+
+DAILY_COLUMNS = ["employee_id", "day", "check_in", "check_out", "worked_minutes", "overtime_minutes", "late_minutes"]
+SUMMARY_COLUMNS = ["employee_id", "days", "missing_check_outs", "worked_hours", "overtime_hours",
+                   "late_days", "late_minutes"]
+
+
+class AttendanceEvents:
+    """Check-in/check-out events as parallel NumPy columns.
+
+    ``employee`` holds indexes into ``employee_ids``; ``check_out`` is NaT
+    where nobody checked out.
+    """
+
+    def __init__(self, employee_ids, employee, check_in, check_out):
+        self.employee_ids = employee_ids
+        self.employee = employee
+        self.check_in = check_in
+        self.check_out = check_out
+
+    def __len__(self):
+        return len(self.employee)
+
+
+def load_events(collection, start, end, employee_ids=None, batch_size=TIMESHEET_BATCH_SIZE):
+    """Attendance with check_in_time in [start, end) as AttendanceEvents"""
+    query = {"check_in_time": {"$gte": start, "$lt": end}}
+    if employee_ids:
+        query["employee_id"] = {"$in": list(employee_ids)}
+    codes = {}
+    employee, check_in, check_out = [], [], []
+    for doc in collection.find(query, PROJECTION, batch_size=batch_size):
+        employee.append(codes.setdefault(doc["employee_id"], len(codes)))
+        check_in.append(doc["check_in_time"])
+        check_out.append(doc.get("check_out_time"))
+    return AttendanceEvents(
+        list(codes),
+        np.array(employee, dtype=np.int32),
+        np.array(check_in, dtype="datetime64[s]"),
+        # None becomes NaT
+        np.array(check_out, dtype="datetime64[s]"),
+    )
+
+
+def daily(events, workday_start=WORKDAY_START, grace_minutes=LATE_GRACE_MINUTES, standard_hours=STANDARD_HOURS):
+    """One row per employee and day, as a dict of columns.
+
+    Minutes worked and overtime are NaN for days without a check-out; late
+    minutes count from the start of the workday and are 0 within the grace
+    period. Legacy duplicates of a day collapse to the earliest check-in and
+    latest check-out.
+    """
+    day = events.check_in.astype("datetime64[D]")
+    order = np.lexsort((events.check_in, day, events.employee))
+    employee = events.employee[order]
+    day = day[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (employee[1:] != employee[:-1]) | (day[1:] != day[:-1])
+    starts = np.flatnonzero(first)
+
+    check_in = events.check_in[order][starts]
+    if len(starts):
+        # NaT is the smallest int64, so a max over the group ignores it
+        check_out = np.maximum.reduceat(events.check_out[order].view(np.int64), starts).view("datetime64[s]")
+    else:
+        check_out = events.check_out[:0]
+    employee = employee[starts]
+    day = day[starts]
+
+    hours, minutes = (int(part) for part in workday_start.split(":"))
+    due = day + np.timedelta64(hours * 60 + minutes, "m")
+    late = (check_in - due) / MINUTE
+    worked = (check_out - check_in) / MINUTE
+    return {
+        "employee": employee,
+        "day": day,
+        "check_in": check_in,
+        "check_out": check_out,
+        "worked_minutes": worked,
+        "overtime_minutes": np.clip(worked - standard_hours * 60, 0, None),
+        "late_minutes": np.where(late > grace_minutes, late, 0.0),
+    }
+
+
+def summarize(events, rows):
+    """Per-employee totals of daily() rows, as a dict of columns"""
+    count = len(events.employee_ids)
+    employee = rows["employee"]
+    complete = ~np.isnan(rows["worked_minutes"])
+
+    def total(values):
+        return np.bincount(employee, weights=values, minlength=count)
+
+    return {
+        "employee_id": np.array(events.employee_ids, dtype=object),
+        "days": np.bincount(employee, minlength=count),
+        "missing_check_outs": total(~complete).astype(np.int64),
+        "worked_hours": total(np.where(complete, rows["worked_minutes"], 0.0)) / 60,
+        "overtime_hours": total(np.where(complete, rows["overtime_minutes"], 0.0)) / 60,
+        "late_days": total(rows["late_minutes"] > 0).astype(np.int64),
+        "late_minutes": total(rows["late_minutes"]),
+    }
+
+
+def _cell(value):
+    if isinstance(value, float):
+        return "" if np.isnan(value) else round(value, 2)
+    if value is None:
+        return ""
+    return value
+
+
+def write_csv(path, header, columns):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in zip(*(column.tolist() for column in columns)):
+            writer.writerow([_cell(value) for value in row])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute hours worked, overtime and late arrivals.")
+    parser.add_argument("--start", required=True, help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="last day, YYYY-MM-DD (inclusive)")
+    parser.add_argument("--employee", action="append", dest="employees", help="employee_id; repeatable")
+    parser.add_argument("--summary", help="write per-employee totals to this CSV")
+    parser.add_argument("--daily", help="write one row per employee and day to this CSV")
+    parser.add_argument("--show", type=int, default=20, help="employees to print")
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start, "%Y-%m-%d")
+    end = datetime.strptime(args.end, "%Y-%m-%d") + timedelta(days=1)
+
+    client = pymongo.MongoClient(MONGO_URI)
+    try:
+        started = time.perf_counter()
+        events = load_events(client[DB_NAME]["attendance"], start, end, args.employees)
+        loaded = time.perf_counter()
+        rows = daily(events)
+        totals = summarize(events, rows)
+        computed = time.perf_counter()
+    except pymongo.errors.ConnectionFailure:
+        print("❌ Error: Could not connect to MongoDB.")
+        print(f"Please ensure MongoDB is running at {MONGO_URI}")
+        return
+    finally:
+        client.close()
+
+    print(f"✅ {len(events)} records, {len(events.employee_ids)} employees "
+          f"(loaded in {loaded - started:.2f}s, computed in {computed - loaded:.2f}s)")
+    print(f"{'Employee':<16} {'Days':>5} {'Hours':>8} {'Overtime':>9} {'Late':>5} {'No out':>7}")
+    for index in np.argsort(totals["employee_id"])[:args.show]:
+        print(f"{totals['employee_id'][index]:<16} {totals['days'][index]:5d} {totals['worked_hours'][index]:8.1f} "
+              f"{totals['overtime_hours'][index]:9.1f} {totals['late_days'][index]:5d} "
+              f"{totals['missing_check_outs'][index]:7d}")
+
+    if args.summary:
+        write_csv(args.summary, SUMMARY_COLUMNS, [totals[name] for name in SUMMARY_COLUMNS])
+        print(f"✅ Summary written to {args.summary}")
+    if args.daily:
+        ids = np.array(events.employee_ids, dtype=object)[rows["employee"]]
+        columns = [ids] + [rows[name] for name in DAILY_COLUMNS[1:]]
+        write_csv(args.daily, DAILY_COLUMNS, columns)
+        print(f"✅ Daily rows written to {args.daily}")
+
+
+if __name__ == "__main__":
+    main()